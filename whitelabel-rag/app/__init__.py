@@ -68,4 +68,9 @@ def create_app(config_name=None):
     from app.websocket_events import register_websocket_events
     register_websocket_events(socketio)
     
+    # Resume ingestion jobs left queued or interrupted by a previous run
+    if os.environ.get('TESTING', 'false').lower() != 'true':
+        from app.services.ingestion_jobs import get_ingestion_job_queue_instance
+        get_ingestion_job_queue_instance().start()
+    
     return app
\ No newline at end of file
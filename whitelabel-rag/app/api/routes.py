@@ -3,10 +3,13 @@ API routes for WhiteLabelRAG
 """
 
 import os
+import json
 import uuid
+import queue
 import logging
+import threading
 from datetime import datetime
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, Response
 from werkzeug.utils import secure_filename
 from flask import Blueprint
 api_bp = Blueprint('api_routes', __name__)
@@ -17,7 +20,14 @@ from app.services.document_processor import DocumentProcessor
 from app.services.internet_search_agent import get_internet_search_agent_instance
 from app.services.multimedia_agent import get_multimedia_agent_instance
 from app.services.file_manager import get_file_manager_instance
+from app.services.ingestion_jobs import get_ingestion_job_queue_instance
+from app.services.task_store import get_task_store_instance
+from app.services.step_cache import get_step_cache_instance
+from app.services.single_flight import get_single_flight_stats
+from app.services.llm_factory import LLMFactory
+from app.services.reranker import get_reranker_instance
 from app.utils.file_utils import allowed_file
+from app.utils.session_auth import get_verified_session_id
 
 
 logger = logging.getLogger(__name__)
@@ -81,6 +91,43 @@ def get_accuracy_regression():
         logger.error(f"Error calculating accuracy and regression: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/metrics/cache', methods=['GET'])
+def get_cache_metrics():
+    """Return hit/miss statistics for the service caches and request coalescing."""
+    try:
+        chroma_service = get_chroma_service_instance()
+        
+        return jsonify({
+            'embedding_cache': chroma_service.get_embedding_cache_stats(),
+            'retrieval_cache': chroma_service.get_retrieval_cache_stats(),
+            'llm_response_cache': LLMFactory.get_response_cache_stats(),
+            'reranker': get_reranker_instance().get_stats(),
+            'step_cache': get_step_cache_instance().get_stats(),
+            'coalescing': get_single_flight_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting cache metrics: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/metrics/tasks', methods=['GET'])
+def get_task_metrics():
+    """Return task step pool usage, including timed-out attempts still holding threads."""
+    try:
+        from app.services.task_assistant import get_task_assistant_instance
+        return jsonify({'step_pool': get_task_assistant_instance().get_step_pool_stats()})
+    except Exception as e:
+        logger.error(f"Error getting task metrics: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/metrics/llm', methods=['GET'])
+def get_llm_metrics():
+    """Return per-model rate limiter queue depth, retries and queue wait times."""
+    try:
+        return jsonify({'rate_limiter': LLMFactory.get_rate_limiter_stats()})
+    except Exception as e:
+        logger.error(f"Error getting LLM metrics: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @api_bp.route('/decompose', methods=['POST'])
 def decompose_task():
     """Decompose user message into steps or handle conversation."""
@@ -170,17 +217,35 @@ def validate_result():
         logger.error(f"Error in validate_result: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/tasks', methods=['GET'])
+def list_tasks():
+    """List the requesting session's task history, newest first."""
+    try:
+        session_id = get_verified_session_id(request.args, request.headers)
+        if not session_id:
+            return jsonify({'error': 'session_id and its session_token are required'}), 401
+        
+        limit = min(int(request.args.get('limit', 20)), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        status = request.args.get('status')
+        
+        page = get_task_store_instance().list_tasks(limit=limit, offset=offset, session_id=session_id, status=status)
+        return jsonify({**page, 'limit': limit, 'offset': offset})
+        
+    except Exception as e:
+        logger.error(f"Error in list_tasks: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @api_bp.route('/tasks/<task_id>/results', methods=['GET'])
 def get_task_results(task_id):
     """Get task results by ID."""
     try:
-        # This would typically fetch from a database
-        # For now, return a placeholder response
-        return jsonify({
-            'task_id': task_id,
-            'status': 'completed',
-            'steps': []
-        })
+        task = get_task_store_instance().get_task(task_id)
+        # A session's tasks are only shown to that session; others are known by ID alone
+        if not task or (task['user_session'] and task['user_session'] != get_verified_session_id(request.args, request.headers)):
+            return jsonify({'error': 'Task not found'}), 404
+        
+        return jsonify(task)
         
     except Exception as e:
         logger.error(f"Error in get_task_results: {str(e)}")
@@ -334,36 +399,141 @@ def upload_and_ingest_document():
         file_path = os.path.join(upload_path, filename)
         file.save(file_path)
         
+        # Queue ingestion in the background unless the caller asks to wait
+        if request.args.get('wait', 'false').lower() != 'true':
+            job_queue = get_ingestion_job_queue_instance()
+            job_queue.start()
+            job_id = job_queue.submit([file_path], {
+                # Progress and job listings are tied to the session only if the caller proves it owns it
+                'session_id': get_verified_session_id(request.form, request.headers),
+                'extra_metadata': {'timestamp': datetime.now().isoformat()}
+            })
+            
+            return jsonify({
+                'message': 'Document uploaded and queued for ingestion.',
+                'filename': filename,
+                'job_id': job_id,
+                'status_url': f'/api/documents/jobs/{job_id}'
+            }), 202
+        
         # Process and ingest the document
         processor = DocumentProcessor()
         rag_manager = get_rag_manager()
         
-        # Extract text and create chunks
-        chunks = processor.process_document(file_path)
-        
-        # Store in vector database
-        for i, chunk in enumerate(chunks):
-            rag_manager.store_document_chunk(
-                content=chunk['content'],
-                metadata={
-                    'source': filename,
-                    'chunk_id': i,
-                    'total_chunks': len(chunks),
-                    'file_path': file_path,
-                    'timestamp': datetime.now().isoformat()
-                }
+        # Extract, chunk and store, skipping unchanged content
+        result = rag_manager.ingest_document(
+            file_path,
+            processor,
+            extra_metadata={'timestamp': datetime.now().isoformat()}
+        )
+        
+        if result['unchanged']:
+            message = f'Document unchanged; skipped re-ingestion of {result["chunks_total"]} chunks.'
+        else:
+            message = (
+                f'Document uploaded and ingested successfully. Created {result["chunks_total"]} chunks '
+                f'({result["chunks_added"]} new, {result["chunks_removed"]} removed).'
             )
         
         return jsonify({
-            'message': f'Document uploaded and ingested successfully. Created {len(chunks)} chunks.',
+            'message': message,
             'filename': filename,
-            'chunks_created': len(chunks)
+            'chunks_created': result['chunks_total'],
+            'chunks_added': result['chunks_added'],
+            'chunks_removed': result['chunks_removed'],
+            'unchanged': result['unchanged']
         })
         
     except Exception as e:
         logger.error(f"Error in upload_and_ingest_document: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/documents/ingest_folder', methods=['POST'])
+def ingest_folder():
+    """Ingest every supported document in the upload folder through the parallel pipeline."""
+    try:
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        upload_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), upload_folder)
+        
+        if not os.path.exists(upload_path):
+            return jsonify({'message': 'No documents to ingest', 'results': []})
+        
+        file_paths = [
+            os.path.join(upload_path, filename)
+            for filename in sorted(os.listdir(upload_path))
+            if os.path.isfile(os.path.join(upload_path, filename)) and allowed_file(filename)
+        ]
+        
+        if request.args.get('wait', 'false').lower() != 'true':
+            job_queue = get_ingestion_job_queue_instance()
+            job_queue.start()
+            job_id = job_queue.submit(file_paths, {
+                'session_id': get_verified_session_id(request.args, request.headers),
+                'extra_metadata': {'timestamp': datetime.now().isoformat()}
+            })
+            
+            return jsonify({
+                'message': f'Queued {len(file_paths)} documents for ingestion.',
+                'job_id': job_id,
+                'status_url': f'/api/documents/jobs/{job_id}'
+            }), 202
+        
+        processor = DocumentProcessor()
+        rag_manager = get_rag_manager()
+        results = rag_manager.ingest_documents(
+            file_paths,
+            processor,
+            extra_metadata={'timestamp': datetime.now().isoformat()}
+        )
+        
+        return jsonify({
+            'message': f'Processed {len(results)} documents.',
+            'documents_ingested': len([r for r in results if not r.get('error') and not r.get('unchanged')]),
+            'documents_unchanged': len([r for r in results if r.get('unchanged')]),
+            'documents_failed': len([r for r in results if r.get('error')]),
+            'chunks_added': sum(r.get('chunks_added', 0) for r in results),
+            'results': results
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in ingest_folder: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/documents/jobs', methods=['GET'])
+def list_ingestion_jobs():
+    """List the requesting session's recent ingestion jobs."""
+    try:
+        session_id = get_verified_session_id(request.args, request.headers)
+        if not session_id:
+            return jsonify({'error': 'session_id and its session_token are required'}), 401
+        
+        limit = min(int(request.args.get('limit', 20)), 100)
+        status = request.args.get('status')
+        
+        job_queue = get_ingestion_job_queue_instance()
+        jobs = job_queue.list_jobs(session_id, limit=limit, status=status)
+        return jsonify({'jobs': [job_queue.public_view(job) for job in jobs]})
+        
+    except Exception as e:
+        logger.error(f"Error in list_ingestion_jobs: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/documents/jobs/<job_id>', methods=['GET'])
+def get_ingestion_job(job_id):
+    """Get the status and progress of an ingestion job."""
+    try:
+        job_queue = get_ingestion_job_queue_instance()
+        job = job_queue.get_job(job_id)
+        # A session's jobs are only shown to that session; others are known by ID alone
+        if not job or (job['session_id'] and job['session_id'] != get_verified_session_id(request.args, request.headers)):
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job_queue.public_view(job))
+        
+    except Exception as e:
+        logger.error(f"Error in get_ingestion_job: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @api_bp.route('/chroma/store_document_embedding', methods=['POST'])
 def store_document_embedding():
     """Store document embedding in ChromaDB."""
@@ -439,3 +609,59 @@ def query_documents():
     except Exception as e:
         logger.error(f"Error in query_documents: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/query/stream', methods=['POST'])
+def query_documents_stream():
+    """Server-Sent Events variant of /query that streams the answer as it is generated."""
+    try:
+        data = request.get_json()
+        if not data or 'query' not in data:
+            return jsonify({'error': 'Query is required'}), 400
+        
+        query = data['query']
+        top_k = data.get('top_k', 3)
+        use_internet_search = data.get('use_internet_search', True)
+        workflow_type = data.get('workflow', 'basic')
+        
+        rag_manager = get_rag_manager()
+        events = queue.Queue()
+        
+        def run_query():
+            try:
+                combined_response = rag_manager.query_documents(
+                    query,
+                    n_results=top_k,
+                    workflow_type=workflow_type,
+                    force_internet_search=use_internet_search,
+                    stream_callback=lambda text: events.put(('chunk', {'text': text}))
+                )
+                events.put(('done', {
+                    'success': True,
+                    'rag_response': combined_response.get('rag_response', {}),
+                    'internet_search_response': combined_response.get('internet_search_response', None)
+                }))
+            except Exception as e:
+                logger.error(f"Error in query_documents_stream: {str(e)}")
+                events.put(('error', {'error': 'Internal server error'}))
+        
+        threading.Thread(target=run_query, daemon=True).start()
+        
+        def generate():
+            while True:
+                event, payload = events.get()
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                if event in ('done', 'error'):
+                    break
+        
+        return Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in query_documents_stream: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
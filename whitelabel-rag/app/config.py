@@ -23,8 +23,49 @@ class Config:
     # Add Chroma API implementation setting for FastAPI or AsyncFastAPI
     CHROMA_API_IMPL = os.environ.get('CHROMA_API_IMPL', 'chromadb.api.fastapi.FastAPI')
     
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_PATH = os.environ.get('EMBEDDING_CACHE_PATH', os.path.join(CHROMA_DB_PATH, 'embedding_cache.sqlite3'))
+    EMBEDDING_CACHE_MAX_MB = int(os.environ.get('EMBEDDING_CACHE_MAX_MB', 512))
+    
+    # Document Manifest Configuration
+    DOCUMENT_MANIFEST_PATH = os.environ.get('DOCUMENT_MANIFEST_PATH', os.path.join(CHROMA_DB_PATH, 'document_manifest.sqlite3'))
+    
+    # Lexical (BM25) Index Configuration
+    LEXICAL_INDEX_PATH = os.environ.get('LEXICAL_INDEX_PATH', os.path.join(CHROMA_DB_PATH, 'lexical_index.sqlite3'))
+    RRF_K = int(os.environ.get('RRF_K', 60))
+    
+    # Retrieval Cache Configuration (invalidated when the corpus version changes)
+    RETRIEVAL_CACHE_ENABLED = os.environ.get('RETRIEVAL_CACHE_ENABLED', 'true').lower() == 'true'
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.environ.get('RETRIEVAL_CACHE_MAX_ENTRIES', 2000))
+    RETRIEVAL_CACHE_TTL_SECONDS = int(os.environ.get('RETRIEVAL_CACHE_TTL_SECONDS', 300))
+    
     # LLM Configuration
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    GEMINI_TRANSPORT = os.environ.get('GEMINI_TRANSPORT', 'grpc')  # grpc or rest
+    LLM_POOL_SIZE = int(os.environ.get('LLM_POOL_SIZE', 10))
+    LLM_KEEPALIVE_SECONDS = int(os.environ.get('LLM_KEEPALIVE_SECONDS', 30))
+    
+    # LLM Rate Limiting Configuration (limits apply per model)
+    LLM_RATE_LIMIT_ENABLED = os.environ.get('LLM_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LLM_RATE_LIMIT_BACKEND = os.environ.get('LLM_RATE_LIMIT_BACKEND', 'local')  # local or redis
+    LLM_REQUESTS_PER_MINUTE = float(os.environ.get('LLM_REQUESTS_PER_MINUTE', 60))
+    LLM_BURST = int(os.environ.get('LLM_BURST', 10))
+    LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE', 100))
+    LLM_MAX_QUEUE_WAIT_SECONDS = float(os.environ.get('LLM_MAX_QUEUE_WAIT_SECONDS', 30))
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 3))
+    LLM_RETRY_BASE_SECONDS = float(os.environ.get('LLM_RETRY_BASE_SECONDS', 1))
+    LLM_RETRY_MAX_SECONDS = float(os.environ.get('LLM_RETRY_MAX_SECONDS', 20))
+    
+    # LLM Response Cache Configuration
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 3600))
+    RESPONSE_CACHE_MAX_TEMPERATURE = float(os.environ.get('RESPONSE_CACHE_MAX_TEMPERATURE', 0.2))
+    RESPONSE_CACHE_SEMANTIC_ENABLED = os.environ.get('RESPONSE_CACHE_SEMANTIC_ENABLED', 'false').lower() == 'true'
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD = float(os.environ.get('RESPONSE_CACHE_SEMANTIC_THRESHOLD', 0.95))
+    
+    # Identical concurrent (non-streamed) LLM calls share one request
+    LLM_COALESCE_ENABLED = os.environ.get('LLM_COALESCE_ENABLED', 'true').lower() == 'true'
 
     # Internet Search API Configuration
     INTERNET_SEARCH_API_KEY = os.environ.get('GOOGLE_API_KEY', '')
@@ -40,14 +81,72 @@ class Config:
             )
         return True
     
+    # Intent Classifier Configuration
+    INTENT_CLASSIFIER_ENABLED = os.environ.get('INTENT_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+    INTENT_CLASSIFIER_THRESHOLD = float(os.environ.get('INTENT_CLASSIFIER_THRESHOLD', 0.8))
+    INTENT_LOG_PATH = os.environ.get('INTENT_LOG_PATH', os.path.join(CHROMA_DB_PATH, 'intent_log.jsonl'))
+    
     # RAG Configuration
     CHUNK_SIZE = int(os.environ.get('CHUNK_SIZE', 500))
     CHUNK_OVERLAP = int(os.environ.get('CHUNK_OVERLAP', 50))
     TOP_K_RESULTS = int(os.environ.get('TOP_K_RESULTS', 3))
+    RETRIEVAL_WORKERS = int(os.environ.get('RETRIEVAL_WORKERS', 8))
+    CONTEXT_MAX_TOKENS = int(os.environ.get('CONTEXT_MAX_TOKENS', 3000))
+    CONTEXT_CHARS_PER_TOKEN = float(os.environ.get('CONTEXT_CHARS_PER_TOKEN', 4.0))
+    
+    # Reranker Configuration
+    RERANKER = os.environ.get('RERANKER', 'cross-encoder')  # cross-encoder or none
+    RERANKER_MODEL = os.environ.get('RERANKER_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+    RERANK_CANDIDATES = int(os.environ.get('RERANK_CANDIDATES', 10))
+    RERANK_TOP_N = int(os.environ.get('RERANK_TOP_N', 3))
+    RERANK_BATCH_SIZE = int(os.environ.get('RERANK_BATCH_SIZE', 16))
+    RERANK_BUDGET_MS = float(os.environ.get('RERANK_BUDGET_MS', 150))
+    RERANK_CACHE_SIZE = int(os.environ.get('RERANK_CACHE_SIZE', 10000))
+    
+    # Ingestion Pipeline Configuration
+    INGESTION_WORKERS = int(os.environ.get('INGESTION_WORKERS', os.cpu_count() or 1))
+    INGESTION_QUEUE_SIZE = int(os.environ.get('INGESTION_QUEUE_SIZE', 8))
+    INGESTION_EMBED_BATCH_SIZE = int(os.environ.get('INGESTION_EMBED_BATCH_SIZE', 64))
+    PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', 20))
+    
+    # Ingestion Job Queue Configuration
+    INGESTION_JOBS_DB_PATH = os.environ.get('INGESTION_JOBS_DB_PATH', os.path.join(CHROMA_DB_PATH, 'ingestion_jobs.sqlite3'))
+    INGESTION_JOB_WORKERS = int(os.environ.get('INGESTION_JOB_WORKERS', 1))
+    
+    # Task Execution Configuration
+    TASK_STEP_WORKERS = int(os.environ.get('TASK_STEP_WORKERS', 8))
+    TASK_MAX_CONCURRENT_STEPS = int(os.environ.get('TASK_MAX_CONCURRENT_STEPS', 3))
+    TASK_STEP_TIMEOUT = int(os.environ.get('TASK_STEP_TIMEOUT', 300))  # 5 minutes
+    TASK_MAX_ABANDONED_STEPS = int(os.environ.get('TASK_MAX_ABANDONED_STEPS', 4))  # timed-out attempts still running
+    TASK_TIMEOUT = int(os.environ.get('TASK_TIMEOUT', 1800))  # 30 minutes
+    TASK_STORE_PATH = os.environ.get('TASK_STORE_PATH', os.path.join(CHROMA_DB_PATH, 'tasks.sqlite3'))
+    STEP_CACHE_ENABLED = os.environ.get('STEP_CACHE_ENABLED', 'true').lower() == 'true'
+    STEP_CACHE_AGENT_TYPES = os.environ.get('STEP_CACHE_AGENT_TYPES', 'SearchAgent')
+    STEP_CACHE_MAX_ENTRIES = int(os.environ.get('STEP_CACHE_MAX_ENTRIES', 1000))
+    STEP_CACHE_TTL_SECONDS = int(os.environ.get('STEP_CACHE_TTL_SECONDS', 3600))
+    
+    # WebSocket Chat Workers (messages beyond the pending limits get a "busy" reply)
+    CHAT_WORKERS = int(os.environ.get('CHAT_WORKERS', 32))
+    CHAT_MAX_PENDING = int(os.environ.get('CHAT_MAX_PENDING', 256))
+    CHAT_MAX_PENDING_PER_SESSION = int(os.environ.get('CHAT_MAX_PENDING_PER_SESSION', 4))
+    
+    # WebSocket Status Updates (minimum spacing per session)
+    STATUS_UPDATE_INTERVAL_MS = int(os.environ.get('STATUS_UPDATE_INTERVAL_MS', 100))
     
     # Redis Configuration
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
     
+    # Conversation Store Configuration
+    CONVERSATION_STORE = os.environ.get('CONVERSATION_STORE', 'memory')  # memory or redis
+    CONVERSATION_TTL_HOURS = int(os.environ.get('CONVERSATION_TTL_HOURS', 24))
+    CONVERSATION_MAX_SESSIONS = int(os.environ.get('CONVERSATION_MAX_SESSIONS', 10000))
+    CONVERSATION_MAX_MB = int(os.environ.get('CONVERSATION_MAX_MB', 256))
+    CONVERSATION_CLEANUP_INTERVAL_SECONDS = int(os.environ.get('CONVERSATION_CLEANUP_INTERVAL_SECONDS', 300))
+    # Older turns are summarized once unsummarized history exceeds the threshold
+    CONVERSATION_SUMMARY_THRESHOLD = int(os.environ.get('CONVERSATION_SUMMARY_THRESHOLD', 12))
+    CONVERSATION_RECENT_TURNS = int(os.environ.get('CONVERSATION_RECENT_TURNS', 6))
+    CONVERSATION_CONTEXT_MAX_CHARS = int(os.environ.get('CONVERSATION_CONTEXT_MAX_CHARS', 2000))
+    
     # Assistant Configuration
     ASSISTANT_CONFIGS = {
         'Concierge': {
@@ -0,0 +1,66 @@
+"""
+Asyncio adapter over the synchronous retrieval services
+"""
+
+import asyncio
+import logging
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from app.config import Config
+from app.services.chroma_service import get_chroma_service_instance
+
+logger = logging.getLogger(__name__)
+
+class AsyncRetrieval:
+    """
+    Awaitable wrappers for ChromaService lookups.
+    Chroma's client and the SQLite lexical index are blocking, so calls run on a
+    dedicated bounded pool; coroutines awaiting them leave the event loop free.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-retrieval")
+        self._chroma_service = None
+
+    @property
+    def chroma_service(self):
+        if self._chroma_service is None:
+            self._chroma_service = get_chroma_service_instance()
+        return self._chroma_service
+
+    async def run(self, func, *args):
+        """Run a blocking retrieval-side call (lookup, reranking, internet search) on the pool."""
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not carry context variables; the LLM priority and
+        # status session must follow the call onto the pool thread
+        return await loop.run_in_executor(self.executor, contextvars.copy_context().run, func, *args)
+
+    async def query_documents(self, query: str, n_results: int = 3,
+                              where: Optional[Dict] = None) -> Dict[str, Any]:
+        return await self.run(self.chroma_service.query_documents, query, n_results, where)
+
+    async def query_documents_batch(self, queries: List[str], n_results: int = 3,
+                                    where: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.chroma_service.query_documents_batch, queries, n_results, where)
+
+    async def lexical_search(self, query: str, n_results: int = 3) -> Dict[str, Any]:
+        return await self.run(self.chroma_service.lexical_search, query, n_results)
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
+        return await self.run(self.chroma_service.get_collection_stats)
+
+# Singleton instance
+_async_retrieval_instance = None
+_async_retrieval_lock = threading.Lock()
+
+def get_async_retrieval_instance() -> AsyncRetrieval:
+    """Get the singleton AsyncRetrieval instance."""
+    global _async_retrieval_instance
+    if _async_retrieval_instance is None:
+        with _async_retrieval_lock:
+            if _async_retrieval_instance is None:
+                _async_retrieval_instance = AsyncRetrieval(max_workers=Config.RETRIEVAL_WORKERS)
+    return _async_retrieval_instance
@@ -5,6 +5,7 @@ Base Assistant class for all specialized assistants
 import logging
 from datetime import datetime
 from abc import ABC, abstractmethod
+from app.services.status_emitter import get_status_session, get_status_emitter_instance
 
 logger = logging.getLogger(__name__)
 
@@ -26,22 +27,20 @@ class BaseAssistant(ABC):
         
         self.logger.info(f"Status update: {status} ({progress}%) - {details}")
         
-        # Emit WebSocket event with status update
-        try:
-            # Lazy import to avoid circular dependency
-            import sys
-            if 'app' in sys.modules:
-                from app import socketio
-                socketio.emit('assistant_status_update', {
-                    'assistant_id': id(self),
-                    'name': self.name,
-                    'status': status,
-                    'progress': progress,
-                    'details': details,
-                    'timestamp': datetime.now().isoformat()
-                })
-        except Exception as e:
-            self.logger.debug(f"WebSocket not available for status update: {str(e)}")
+        # Queue the WebSocket event for the originating session's room only
+        session_id = get_status_session()
+        if not session_id:
+            return
+        
+        get_status_emitter_instance().publish(session_id, 'assistant_status_update', {
+            'assistant_id': id(self),
+            'name': self.name,
+            'status': status,
+            'progress': progress,
+            'details': details,
+            'session_id': session_id,
+            'timestamp': datetime.now().isoformat()
+        })
             
     def report_success(self, text, additional_data=None):
         """Report successful completion of task."""
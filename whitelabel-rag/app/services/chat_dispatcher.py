@@ -0,0 +1,100 @@
+"""
+Bounded, per-session ordered execution of chat messages off the Socket.IO handlers
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Deque
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ChatDispatcher:
+    """
+    Runs chat jobs on a fixed worker pool.
+    Jobs from one session run one at a time in arrival order; different sessions run
+    concurrently. New jobs are refused once the process-wide or per-session backlog
+    is full, so callers can answer "busy" instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int = 32, max_pending: int = 256, max_pending_per_session: int = 4):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_pending_per_session = max_pending_per_session
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-worker")
+
+        self.accepted = 0
+        self.rejected = 0
+
+        # session_id -> jobs not yet started; a session is present while it has work
+        self._queues: Dict[str, Deque[Callable[[], None]]] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: str, job: Callable[[], None]) -> bool:
+        """Queue a job for a session; returns False if the backlog is full."""
+        with self._lock:
+            queue = self._queues.get(session_id)
+            if self._pending >= self.max_pending or (queue is not None and len(queue) >= self.max_pending_per_session):
+                self.rejected += 1
+                return False
+
+            self._pending += 1
+            self.accepted += 1
+            if queue is None:
+                # No job running for this session: start draining it
+                self._queues[session_id] = deque([job])
+                self.executor.submit(self._drain, session_id)
+            else:
+                queue.append(job)
+        return True
+
+    def _drain(self, session_id: str):
+        """Run the session's next job, then hand the worker back before running another."""
+        with self._lock:
+            job = self._queues[session_id][0]
+
+        try:
+            job()
+        except Exception as e:
+            logger.error(f"Chat job for session {session_id} failed: {str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                queue = self._queues[session_id]
+                queue.popleft()
+                self._pending -= 1
+                if queue:
+                    # Requeue behind other sessions so one busy session cannot hog a worker
+                    self.executor.submit(self._drain, session_id)
+                else:
+                    del self._queues[session_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'pending': self._pending,
+                'active_sessions': len(self._queues),
+                'accepted': self.accepted,
+                'rejected': self.rejected
+            }
+
+# Singleton instance
+_chat_dispatcher_instance = None
+_chat_dispatcher_lock = threading.Lock()
+
+def get_chat_dispatcher_instance() -> ChatDispatcher:
+    """Get the singleton ChatDispatcher instance."""
+    global _chat_dispatcher_instance
+    if _chat_dispatcher_instance is None:
+        with _chat_dispatcher_lock:
+            if _chat_dispatcher_instance is None:
+                _chat_dispatcher_instance = ChatDispatcher(
+                    max_workers=Config.CHAT_WORKERS,
+                    max_pending=Config.CHAT_MAX_PENDING,
+                    max_pending_per_session=Config.CHAT_MAX_PENDING_PER_SESSION
+                )
+    return _chat_dispatcher_instance
@@ -3,10 +3,17 @@ ChromaDB service for vector storage and retrieval
 """
 
 import os
+import copy
+import hashlib
 import logging
 import chromadb
 from chromadb.utils import embedding_functions
 import google.generativeai as genai
+from app.services.embedding_cache import CachedEmbeddingFunction, get_embedding_cache_instance
+from app.services.document_manifest import get_document_manifest_instance
+from app.services.lexical_index import get_lexical_index_instance
+from app.services.retrieval_cache import RetrievalCache, get_retrieval_cache_instance
+from app.services.single_flight import get_single_flight_instance
 from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
@@ -60,12 +67,50 @@ class ChromaService:
                 metadata={"description": "Task step embeddings"}
             )
             
+            # Track which chunks are stored for each source file
+            self.manifest = get_document_manifest_instance()
+            
+            # BM25 index kept in step with the documents collection
+            self.lexical_index = get_lexical_index_instance()
+            self._backfill_lexical_index()
+            
+            # Repeated queries and stats reads are served until the corpus version changes
+            if os.environ.get('RETRIEVAL_CACHE_ENABLED', 'true').lower() == 'true':
+                self.retrieval_cache = get_retrieval_cache_instance()
+            else:
+                self.retrieval_cache = None
+            
+            # Concurrent identical lookups share one index query
+            if os.environ.get('RETRIEVAL_COALESCE_ENABLED', 'true').lower() == 'true':
+                self.inflight = get_single_flight_instance('retrieval')
+            else:
+                self.inflight = None
+            
             logger.info("ChromaDB initialized successfully")
             
         except Exception as e:
             logger.error(f"Error setting up ChromaDB: {str(e)}")
             raise
     
+    def _backfill_lexical_index(self, page_size: int = 1000):
+        """Index chunks stored before the lexical index existed."""
+        try:
+            collection_count = self.documents_collection.count()
+            if collection_count == 0 or self.lexical_index.count() > 0:
+                return
+            
+            logger.info(f"Building lexical index for {collection_count} existing chunks")
+            for offset in range(0, collection_count, page_size):
+                page = self.documents_collection.get(
+                    limit=page_size,
+                    offset=offset,
+                    include=['documents', 'metadatas']
+                )
+                self.lexical_index.add(page['ids'], page['documents'], page['metadatas'])
+            
+        except Exception as e:
+            logger.error(f"Error building lexical index: {str(e)}")
+    
     def _setup_embedding_function(self):
         """Setup embedding function for ChromaDB."""
         try:
@@ -73,16 +118,18 @@ class ChromaService:
             api_key = os.environ.get('GEMINI_API_KEY')
             if api_key:
                 genai.configure(api_key=api_key)
-                self.embedding_function = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
+                self.embedding_model_name = "models/embedding-001"
+                embedding_function = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
                     api_key=api_key,
-                    model_name="models/embedding-001"
+                    model_name=self.embedding_model_name
                 )
                 logger.info("✅ Google Generative AI embedding function configured")
             else:
                 # Fallback to sentence transformers
                 logger.warning("⚠️ GEMINI_API_KEY not found, falling back to SentenceTransformer embeddings")
-                self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name="all-MiniLM-L6-v2"
+                self.embedding_model_name = "all-MiniLM-L6-v2"
+                embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                    model_name=self.embedding_model_name
                 )
                 logger.info("✅ SentenceTransformer embedding function configured")
             
@@ -90,26 +137,218 @@ class ChromaService:
             logger.error(f"Error setting up embedding function: {str(e)}")
             logger.warning("⚠️ Falling back to default embedding function")
             # Fallback to default
-            self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            self.embedding_model_name = "default"
+            embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
+        self.raw_embedding_function = embedding_function
+        
+        # Serve previously embedded texts from the persistent cache
+        try:
+            self.embedding_cache = get_embedding_cache_instance()
+            self.embedding_function = CachedEmbeddingFunction(
+                embedding_function,
+                self.embedding_model_name,
+                self.embedding_cache
+            )
+            logger.info("✅ Embedding cache enabled")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache unavailable, embedding without cache: {str(e)}")
+            self.embedding_cache = None
+            self.embedding_function = embedding_function
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache hit/miss statistics."""
+        if not self.embedding_cache:
+            return {'enabled': False}
+        return {'enabled': True, **self.embedding_cache.get_stats()}
+    
+    def _generate_document_id(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Generate a deterministic, content-addressed ID for a document chunk."""
+        source = str(metadata.get('source', '')) if metadata else ''
+        digest = hashlib.sha256(f"{source}\x00{content}".encode('utf-8')).hexdigest()
+        return f"doc_{digest[:32]}"
     
     def store_document(self, content: str, metadata: Dict[str, Any]) -> str:
         """Store a document chunk in the vector database."""
+        return self.store_documents([content], [metadata])[0]
+    
+    def store_documents(self, contents: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """Store many document chunks in the vector database with a single add call."""
+        if len(contents) != len(metadatas):
+            raise ValueError("contents and metadatas must have the same length")
+        
         try:
-            # Generate unique ID
-            doc_id = f"doc_{len(self.documents_collection.get()['ids'])}"
+            ids = []
+            batch_documents = []
+            batch_metadatas = []
+            batch_ids = []
+            seen_ids = set()
             
-            # Store in collection
-            self.documents_collection.add(
-                documents=[content],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
+            for content, metadata in zip(contents, metadatas):
+                doc_id = self._generate_document_id(content, metadata)
+                ids.append(doc_id)
+                
+                # Identical chunks from the same source share an ID; add it once
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
+                
+                batch_documents.append(content)
+                batch_metadatas.append(metadata)
+                batch_ids.append(doc_id)
+            
+            if batch_ids:
+                self.documents_collection.add(
+                    documents=batch_documents,
+                    metadatas=batch_metadatas,
+                    ids=batch_ids
+                )
+                self.lexical_index.add(batch_ids, batch_documents, batch_metadatas)
+                self.manifest.bump_corpus_version()
             
-            logger.info(f"Stored document chunk with ID: {doc_id}")
-            return doc_id
+            logger.info(f"Stored {len(batch_ids)} document chunks")
+            return ids
             
         except Exception as e:
-            logger.error(f"Error storing document: {str(e)}")
+            logger.error(f"Error storing documents: {str(e)}")
+            raise
+    
+    def is_document_current(self, source: str, file_hash: str) -> bool:
+        """Check whether a source file was already ingested with the same content."""
+        entry = self.manifest.get(source)
+        return entry is not None and entry['file_hash'] == file_hash
+    
+    def get_document_manifest(self, source: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry for an ingested source file."""
+        return self.manifest.get(source)
+    
+    def get_corpus_version(self) -> int:
+        """Version stamp of the document corpus, for invalidating derived caches."""
+        return self.manifest.get_corpus_version()
+    
+    def _lookup_version(self) -> Optional[int]:
+        """Corpus version for cache and coalescing keys, if either is enabled."""
+        if self.retrieval_cache or self.inflight:
+            return self.manifest.get_corpus_version()
+        return None
+    
+    def _coalesce(self, key, version: Optional[int], func):
+        """Run a lookup, joining an identical one already in flight against the same corpus version."""
+        if not self.inflight:
+            return func()
+        return self.inflight.do(key + (version,), func)
+    
+    def get_retrieval_cache_stats(self) -> Dict[str, Any]:
+        """Get retrieval cache hit/miss statistics."""
+        if not self.retrieval_cache:
+            return {'enabled': False}
+        return {'enabled': True, **self.retrieval_cache.get_stats()}
+    
+    def embed_documents(self, contents: List[str]) -> List[List[float]]:
+        """Compute embeddings for document texts with the configured embedding function."""
+        if not contents:
+            return []
+        return [list(embedding) for embedding in self.embedding_function(contents)]
+    
+    def embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed one-off texts such as questions without storing them in the embedding cache."""
+        if not texts:
+            return []
+        return [list(embedding) for embedding in self.raw_embedding_function(texts)]
+    
+    def plan_document_sync(self, source: str, contents: List[str],
+                           metadatas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Work out which chunks of a source file must be added, kept or removed."""
+        if len(contents) != len(metadatas):
+            raise ValueError("contents and metadatas must have the same length")
+        
+        previous = self.manifest.get(source)
+        previous_ids = previous['chunk_ids'] if previous else []
+        
+        chunk_ids = []
+        candidates = {}
+        for content, metadata in zip(contents, metadatas):
+            doc_id = self._generate_document_id(content, metadata)
+            chunk_ids.append(doc_id)
+            candidates.setdefault(doc_id, (content, metadata))
+        
+        current_ids = set(chunk_ids)
+        stale_ids = [doc_id for doc_id in dict.fromkeys(previous_ids) if doc_id not in current_ids]
+        
+        # Check the collection itself so chunks stored before the manifest existed are reused
+        existing_ids = set()
+        if candidates:
+            existing_ids = set(self.documents_collection.get(ids=list(candidates), include=[])['ids'])
+        
+        new_ids = [doc_id for doc_id in candidates if doc_id not in existing_ids]
+        kept_ids = [doc_id for doc_id in candidates if doc_id in existing_ids]
+        
+        return {
+            'source': source,
+            'chunk_ids': chunk_ids,
+            'new_ids': new_ids,
+            'kept_ids': kept_ids,
+            'stale_ids': stale_ids,
+            'new_documents': [candidates[doc_id][0] for doc_id in new_ids],
+            'new_metadatas': [candidates[doc_id][1] for doc_id in new_ids],
+            'kept_metadatas': [candidates[doc_id][1] for doc_id in kept_ids]
+        }
+    
+    def apply_document_sync(self, plan: Dict[str, Any], file_hash: str,
+                            embeddings: Optional[List[List[float]]] = None) -> Dict[str, Any]:
+        """Apply a plan from plan_document_sync, optionally with precomputed embeddings."""
+        source = plan['source']
+        
+        if plan['stale_ids']:
+            self.documents_collection.delete(ids=plan['stale_ids'])
+            self.lexical_index.delete(plan['stale_ids'])
+        
+        if plan['new_ids']:
+            add_kwargs = {
+                'documents': plan['new_documents'],
+                'metadatas': plan['new_metadatas'],
+                'ids': plan['new_ids']
+            }
+            if embeddings is not None:
+                add_kwargs['embeddings'] = embeddings
+            self.documents_collection.add(**add_kwargs)
+            self.lexical_index.add(plan['new_ids'], plan['new_documents'], plan['new_metadatas'])
+        
+        # Refresh positional metadata without re-embedding unchanged chunks
+        if plan['kept_ids']:
+            self.documents_collection.update(
+                ids=plan['kept_ids'],
+                metadatas=plan['kept_metadatas']
+            )
+            self.lexical_index.update_metadata(plan['kept_ids'], plan['kept_metadatas'])
+        
+        self.manifest.put(source, file_hash, plan['chunk_ids'])
+        self.manifest.bump_corpus_version()
+        
+        logger.info(
+            f"Synced {source}: {len(plan['new_ids'])} added, "
+            f"{len(plan['kept_ids'])} unchanged, {len(plan['stale_ids'])} removed"
+        )
+        return {
+            'ids': plan['chunk_ids'],
+            'chunks_total': len(plan['chunk_ids']),
+            'chunks_added': len(plan['new_ids']),
+            'chunks_unchanged': len(plan['kept_ids']),
+            'chunks_removed': len(plan['stale_ids'])
+        }
+    
+    def sync_documents(self, source: str, contents: List[str], metadatas: List[Dict[str, Any]],
+                       file_hash: str) -> Dict[str, Any]:
+        """
+        Bring the stored chunks for a source file in line with the given chunks.
+        Only new chunks are embedded; chunks no longer present are deleted.
+        """
+        try:
+            plan = self.plan_document_sync(source, contents, metadatas)
+            return self.apply_document_sync(plan, file_hash)
+            
+        except Exception as e:
+            logger.error(f"Error syncing documents for {source}: {str(e)}")
             raise
     
     def store_step_embedding(self, step_id: str, content: str, metadata: Dict[str, Any]) -> str:
@@ -121,6 +360,9 @@ class ChromaService:
                 ids=[step_id]
             )
             
+            if self.retrieval_cache:
+                self.retrieval_cache.invalidate(self.retrieval_cache.make_key('stats'))
+            
             logger.info(f"Stored step embedding with ID: {step_id}")
             return step_id
             
@@ -132,11 +374,21 @@ class ChromaService:
                        where: Optional[Dict] = None) -> Dict[str, Any]:
         """Query documents using vector similarity search."""
         try:
-            results = self.documents_collection.query(
+            version = self._lookup_version()
+            cache_key = RetrievalCache.make_key('query', query, n_results, where)
+            if self.retrieval_cache:
+                cached = self.retrieval_cache.get(cache_key, version)
+                if cached is not None:
+                    return cached
+            
+            results = self._coalesce(cache_key, version, lambda: self.documents_collection.query(
                 query_texts=[query],
                 n_results=n_results,
                 where=where
-            )
+            ))
+            
+            if self.retrieval_cache:
+                self.retrieval_cache.put(cache_key, version, results)
             
             logger.info(f"Query returned {len(results['documents'][0])} results")
             return results
@@ -145,6 +397,93 @@ class ChromaService:
             logger.error(f"Error querying documents: {str(e)}")
             return {'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
     
+    def query_documents_batch(self, queries: List[str], n_results: int = 3,
+                              where: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """
+        Query documents for several query texts in a single call.
+        Returns one result per query, shaped like query_documents() results.
+        """
+        empty = {'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        if not queries:
+            return []
+        
+        try:
+            batch: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+            version = self._lookup_version()
+            keys = [RetrievalCache.make_key('query', query, n_results, where) for query in queries]
+            if self.retrieval_cache:
+                for i, key in enumerate(keys):
+                    batch[i] = self.retrieval_cache.get(key, version)
+            
+            # Only the queries without a cached result go to the index
+            missing = [i for i, result in enumerate(batch) if result is None]
+            
+            # Misses already being queried by another caller are waited for, not repeated
+            flights = {}
+            if self.inflight:
+                for i in missing:
+                    flights[i] = self.inflight.claim(keys[i] + (version,))
+                followed = [i for i in missing if not flights[i][1]]
+                missing = [i for i in missing if flights[i][1]]
+            else:
+                followed = []
+            
+            if missing:
+                try:
+                    results = self.documents_collection.query(
+                        query_texts=[queries[i] for i in missing],
+                        n_results=n_results,
+                        where=where
+                    )
+                    
+                    for j, i in enumerate(missing):
+                        batch[i] = {
+                            'documents': [results['documents'][j]],
+                            'metadatas': [results['metadatas'][j]],
+                            'distances': [results['distances'][j]]
+                        }
+                except Exception as e:
+                    for i in missing:
+                        if i in flights:
+                            self.inflight.resolve(keys[i] + (version,), flights[i][0], error=e)
+                    raise
+                
+                for i in missing:
+                    if i in flights:
+                        self.inflight.resolve(keys[i] + (version,), flights[i][0], batch[i])
+                    if self.retrieval_cache:
+                        self.retrieval_cache.put(keys[i], version, batch[i])
+            
+            for i in followed:
+                batch[i] = copy.deepcopy(flights[i][0].result())
+            
+            logger.info(f"Batch query of {len(queries)} queries returned {sum(len(r['documents'][0]) for r in batch)} results")
+            return batch
+            
+        except Exception as e:
+            logger.error(f"Error batch querying documents: {str(e)}")
+            return [empty for _ in queries]
+    
+    def lexical_search(self, query: str, n_results: int = 3) -> Dict[str, Any]:
+        """Query documents by BM25 term matching."""
+        try:
+            version = self._lookup_version()
+            cache_key = RetrievalCache.make_key('lexical', query, n_results)
+            if self.retrieval_cache:
+                cached = self.retrieval_cache.get(cache_key, version)
+                if cached is not None:
+                    return cached
+            
+            results = self._coalesce(cache_key, version, lambda: self.lexical_index.search(query, n_results))
+            if self.retrieval_cache:
+                self.retrieval_cache.put(cache_key, version, results)
+            logger.info(f"Lexical query returned {len(results['documents'][0])} results")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in lexical search: {str(e)}")
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+    
     def query_steps(self, query: str, n_results: int = 3) -> Dict[str, Any]:
         """Query step embeddings using vector similarity search."""
         try:
@@ -162,23 +501,38 @@ class ChromaService:
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collections."""
         try:
-            doc_count = self.documents_collection.count()
-            step_count = self.steps_collection.count()
+            version = self._lookup_version()
+            cache_key = RetrievalCache.make_key('stats')
+            if self.retrieval_cache:
+                cached = self.retrieval_cache.get(cache_key, version)
+                if cached is not None:
+                    return cached
             
-            return {
-                'documents_count': doc_count,
-                'steps_count': step_count,
-                'total_items': doc_count + step_count
-            }
+            stats = self._coalesce(cache_key, version, self._count_collections)
+            if self.retrieval_cache:
+                self.retrieval_cache.put(cache_key, version, stats)
+            return stats
             
         except Exception as e:
             logger.error(f"Error getting collection stats: {str(e)}")
             return {'documents_count': 0, 'steps_count': 0, 'total_items': 0}
     
+    def _count_collections(self) -> Dict[str, Any]:
+        doc_count = self.documents_collection.count()
+        step_count = self.steps_collection.count()
+        
+        return {
+            'documents_count': doc_count,
+            'steps_count': step_count,
+            'total_items': doc_count + step_count
+        }
+    
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document from the collection."""
         try:
             self.documents_collection.delete(ids=[doc_id])
+            self.lexical_index.delete([doc_id])
+            self.manifest.bump_corpus_version()
             logger.info(f"Deleted document with ID: {doc_id}")
             return True
             
@@ -203,6 +557,10 @@ class ChromaService:
                 embedding_function=self.embedding_function
             )
             
+            self.manifest.clear()
+            self.lexical_index.clear()
+            self.manifest.bump_corpus_version()
+            
             logger.info("Collections reset successfully")
             
         except Exception as e:
@@ -2,17 +2,66 @@
 Concierge Agent - Main orchestrator and entry point for user interactions
 """
 
+import asyncio
 import logging
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 from app.services.base_assistant import BaseAssistant
 from app.services.llm_factory import LLMFactory
 from app.services.conversation_store import get_conversation_store
 from app.services.rag_manager import get_rag_manager
+from app.services.async_retrieval import get_async_retrieval_instance
+from app.services.intent_classifier import get_intent_classifier_instance, VALID_INTENTS
+from app.services.conversation_summarizer import get_conversation_summarizer_instance
+from app.services.status_emitter import status_session
+from app.services.llm_limiter import llm_priority, PRIORITY_INTERACTIVE
 from app.config import Config
 
 logger = logging.getLogger(__name__)
 
+INTENT_SYSTEM_PROMPT = """
+            Classify the user's message into one of these categories based on the message and conversation context:
+            
+            - simple_query: Direct question that can be answered with general knowledge, system functions (time, stats), or brief response
+            - document_search: Request to find specific information in documents or knowledge base
+            - task_request: Complex multi-step task that requires decomposition and planning
+            - clarification: User asking for clarification or followup on previous response
+            - feedback: User providing feedback on previous response
+            - meta: Question about the system itself, capabilities, or how it works
+            
+            Note: System function requests like "show stats", "what time is it", "help" should be classified as simple_query.
+            
+            Consider the conversation context and respond with only the category name.
+            """
+
+META_SYSTEM_PROMPT = """
+            You are the WhiteLabelRAG Concierge. Answer questions about the system's capabilities,
+            how it works, and what it can do. Be helpful and informative.
+            
+            Key capabilities:
+            - Document search and retrieval using RAG (Retrieval-Augmented Generation)
+            - Conversational AI with context awareness
+            - File upload and processing (PDF, DOCX, TXT, MD, CSV)
+            - Task decomposition and execution
+            - Real-time status updates
+            """
+
+SIMPLE_QUERY_SYSTEM_PROMPT = """
+            You are the WhiteLabelRAG Concierge assistant. Provide a clear, informative response to the user's question.
+            You have access to document search capabilities and can help with various tasks.
+            Be conversational and helpful. If you don't know something, say so honestly.
+            """
+
+def build_intent_prompt(message: str, conversation) -> str:
+    """Intent classification prompt for a message, with the conversation's recent context."""
+    context = conversation.get_context_string(500)
+    return f"Conversation context:\n{context}\n\nCurrent message: {message}"
+
+def parse_llm_intent(response: str) -> Optional[str]:
+    """Return the intent named by an LLM classification response, or None if it names none."""
+    intent = response.strip().lower()
+    return intent if intent in VALID_INTENTS else None
+
 class Concierge(BaseAssistant):
     """
     Concierge Agent - Main orchestrator for all user interactions.
@@ -38,11 +87,21 @@ class Concierge(BaseAssistant):
     def get_greeting(self) -> str:
         """Return the greeting message."""
         return self.greeting
-    def handle_message(self, message: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    def handle_message(self, message: str, session_id: Optional[str] = None,
+                       stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Main entry point for handling user messages.
         Implements the hierarchical workflow architecture.
+        If stream_callback is given, generated answer text is passed to it incrementally;
+        the returned response always carries the complete text.
+        Status updates raised while handling the message go to the session's room only.
+        LLM calls made for the message are queued ahead of background work.
         """
+        with status_session(session_id), llm_priority(PRIORITY_INTERACTIVE):
+            return self._handle_message(message, session_id, stream_callback)
+    
+    def _handle_message(self, message: str, session_id: Optional[str],
+                        stream_callback: Optional[Callable[[str], None]]) -> Dict[str, Any]:
         try:
             # Validate input
             is_valid, validation_message = self._validate_input(message)
@@ -106,19 +165,22 @@ class Concierge(BaseAssistant):
             self._update_status("running", 50, f"Processing {intent} request...")
             
             if intent == "document_search":
-                response = self._handle_document_search(message, conversation)
+                response = self._handle_document_search(message, conversation, stream_callback)
             elif intent == "task_request":
-                response = self._handle_task_decomposition(message, conversation)
+                response = self._handle_task_decomposition(message, conversation, stream_callback)
             elif intent == "meta":
-                response = self._handle_meta_query(message, conversation)
+                response = self._handle_meta_query(message, conversation, stream_callback)
             elif intent == "simple_query":
-                response = self._handle_simple_query(message, conversation)
+                response = self._handle_simple_query(message, conversation, stream_callback)
             else:
-                response = self._generate_direct_response(message, conversation)
+                response = self._generate_direct_response(message, conversation, stream_callback)
             
             # Add assistant response to conversation
             conversation.add_message("assistant", response.get('text', ''), response.get('sources', []))
             
+            # Fold older turns into the running summary in the background
+            get_conversation_summarizer_instance().maybe_summarize(conversation)
+            
             # Update final status
             self._update_status("completed", 100, "Message processed successfully")
             
@@ -128,55 +190,254 @@ class Concierge(BaseAssistant):
             logger.error(f"Error in Concierge.handle_message: {str(e)}")
             return self.report_failure(f"Error processing message: {str(e)}")
     
-    def _classify_intent(self, message: str, conversation) -> str:
-        """Classify user message intent using LLM."""
+    async def handle_message_async(self, message: str, session_id: Optional[str] = None,
+                                   stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Asyncio variant of handle_message for the ASGI entry point.
+        LLM calls are awaited on the async Gemini client and blocking storage and
+        retrieval calls run in worker threads, so the event loop is never blocked.
+        """
+        with status_session(session_id), llm_priority(PRIORITY_INTERACTIVE):
+            return await self._handle_message_async(message, session_id, stream_callback)
+    
+    async def _handle_message_async(self, message: str, session_id: Optional[str],
+                                    stream_callback: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        try:
+            is_valid, validation_message = self._validate_input(message)
+            if not is_valid:
+                return self.report_failure(validation_message)
+            
+            if not session_id:
+                session_id = str(uuid.uuid4())
+            
+            conversation = await asyncio.to_thread(self.conversation_store.get_conversation, session_id)
+            
+            # Onboarding turns don't call the LLM; the synchronous path handles them
+            if conversation.conversation_state == "awaiting_username" or len(conversation.messages) == 0:
+                return await asyncio.to_thread(self._handle_message, message, session_id, stream_callback)
+            
+            self._update_status("running", 10, "Processing message...")
+            await asyncio.to_thread(conversation.add_message, "user", message)
+            
+            self._update_status("running", 30, "Analyzing message intent...")
+            intent = await self._classify_intent_async(message, conversation)
+            
+            self._update_status("running", 50, f"Processing {intent} request...")
+            
+            if intent == "document_search":
+                response = await self._handle_document_search_async(message, conversation, stream_callback)
+            elif intent == "task_request":
+                # Task decomposition runs its steps on the TaskAssistant's own pool
+                response = await asyncio.to_thread(self._handle_task_decomposition, message, conversation, stream_callback)
+            elif intent == "meta":
+                response = await self._handle_meta_query_async(message, conversation, stream_callback)
+            elif intent == "simple_query":
+                response = await self._handle_simple_query_async(message, conversation, stream_callback)
+            else:
+                response = await self._generate_direct_response_async(message, conversation, stream_callback)
+            
+            await asyncio.to_thread(conversation.add_message, "assistant", response.get('text', ''), response.get('sources', []))
+            
+            get_conversation_summarizer_instance().maybe_summarize(conversation)
+            
+            self._update_status("completed", 100, "Message processed successfully")
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error in Concierge.handle_message_async: {str(e)}")
+            return self.report_failure(f"Error processing message: {str(e)}")
+    
+    async def _classify_intent_async(self, message: str, conversation) -> str:
+        """Asyncio variant of _classify_intent."""
         try:
-            # Get conversation context for better classification
+            intent = self._classify_intent_locally(message)
+            if intent:
+                return intent
+            
+            intent = await LLMFactory.generate_response_async(
+                prompt=build_intent_prompt(message, conversation),
+                system_prompt=INTENT_SYSTEM_PROMPT,
+                temperature=0.1,
+                task='classification'
+            )
+            
+            # Learning the intent appends to the intent log; keep that file write off the loop
+            return await asyncio.to_thread(self._accept_llm_intent, message, intent)
+            
+        except Exception as e:
+            logger.error(f"Error classifying intent: {str(e)}")
+            return 'simple_query'
+    
+    async def _handle_document_search_async(self, message: str, conversation,
+                                            stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _handle_document_search."""
+        try:
+            self._update_status("running", 60, "Searching documents...")
+            
+            results = (await self.rag_manager.query_documents_async(
+                message,
+                workflow_type="adaptive",
+                stream_callback=stream_callback
+            )).get('rag_response', {})
+            
+            if results.get('error'):
+                return self.report_failure("Error searching documents")
+            
+            return self.report_success(
+                text=results.get('text', 'No relevant documents found.'),
+                additional_data={
+                    'sources': results.get('sources', []),
+                    'workflow': results.get('workflow', 'basic'),
+                    'context_used': results.get('context_used', False)
+                }
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in document search: {str(e)}")
+            return self.report_failure("Error searching documents")
+    
+    async def _handle_meta_query_async(self, message: str, conversation,
+                                       stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _handle_meta_query."""
+        try:
+            response_text = await LLMFactory.generate_response_async(
+                prompt=message,
+                system_prompt=META_SYSTEM_PROMPT,
+                temperature=0.3,
+                task=self.config['task'],
+                stream_callback=stream_callback
+            )
+            
+            return self.report_success(text=response_text)
+            
+        except Exception as e:
+            logger.error(f"Error handling meta query: {str(e)}")
+            return self.report_failure("Error processing system query")
+    
+    async def _handle_simple_query_async(self, message: str, conversation,
+                                         stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _handle_simple_query."""
+        try:
+            direct_response = self._check_direct_functions(message)
+            if direct_response:
+                return self.report_success(text=direct_response)
+            
+            collection_stats = await get_async_retrieval_instance().run(self.rag_manager.get_collection_stats)
+            
+            if collection_stats.get('documents_count', 0) > 0:
+                results = (await self.rag_manager.query_documents_async(
+                    message,
+                    n_results=2,
+                    workflow_type="basic",
+                    stream_callback=stream_callback
+                )).get('rag_response', {})
+                
+                if results.get('sources') and not results.get('error'):
+                    return self.report_success(
+                        text=results.get('text', ''),
+                        additional_data={
+                            'sources': results.get('sources', []),
+                            'context_used': True
+                        }
+                    )
+            
             context = conversation.get_context_string(500)
             
-            system_prompt = """
-            Classify the user's message into one of these categories based on the message and conversation context:
+            prompt = f"Conversation context:\n{context}\n\nQuestion: {message}" if context else message
             
-            - simple_query: Direct question that can be answered with general knowledge, system functions (time, stats), or brief response
-            - document_search: Request to find specific information in documents or knowledge base
-            - task_request: Complex multi-step task that requires decomposition and planning
-            - clarification: User asking for clarification or followup on previous response
-            - feedback: User providing feedback on previous response
-            - meta: Question about the system itself, capabilities, or how it works
+            response_text = await LLMFactory.generate_response_async(
+                prompt=prompt,
+                system_prompt=SIMPLE_QUERY_SYSTEM_PROMPT,
+                temperature=0.4,
+                task=self.config['task'],
+                stream_callback=stream_callback
+            )
             
-            Note: System function requests like "show stats", "what time is it", "help" should be classified as simple_query.
+            return self.report_success(text=response_text)
             
-            Consider the conversation context and respond with only the category name.
-            """
+        except Exception as e:
+            logger.error(f"Error handling simple query: {str(e)}")
+            return self.report_failure("Error processing query")
+    
+    async def _generate_direct_response_async(self, message: str, conversation,
+                                              stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _generate_direct_response."""
+        try:
+            context = conversation.get_context_string(Config.CONVERSATION_CONTEXT_MAX_CHARS)
             
-            prompt = f"Conversation context:\n{context}\n\nCurrent message: {message}"
+            prompt = f"Conversation context:\n{context}\n\nUser: {message}" if context else message
             
-            intent = LLMFactory.generate_response(
+            response_text = await LLMFactory.generate_response_async(
                 prompt=prompt,
-                system_prompt=system_prompt,
+                system_prompt=self.config['system_prompt'],
+                temperature=self.config['temperature'],
+                task=self.config['task'],
+                stream_callback=stream_callback
+            )
+            
+            return self.report_success(text=response_text)
+            
+        except Exception as e:
+            logger.error(f"Error generating direct response: {str(e)}")
+            return self.report_failure("Error generating response")
+    
+    def _classify_intent(self, message: str, conversation) -> str:
+        """Classify user message intent locally, falling back to the LLM when unsure."""
+        try:
+            intent = self._classify_intent_locally(message)
+            if intent:
+                return intent
+            
+            # Include conversation context for better classification
+            intent = LLMFactory.generate_response(
+                prompt=build_intent_prompt(message, conversation),
+                system_prompt=INTENT_SYSTEM_PROMPT,
                 temperature=0.1,
                 task='classification'
-            ).strip().lower()
-            
-            # Validate intent
-            valid_intents = ['simple_query', 'document_search', 'task_request', 'clarification', 'feedback', 'meta']
-            if intent not in valid_intents:
-                intent = 'simple_query'  # Default fallback
+            )
             
-            logger.info(f"Classified intent as: {intent}")
-            return intent
+            return self._accept_llm_intent(message, intent)
             
         except Exception as e:
             logger.error(f"Error classifying intent: {str(e)}")
             return 'simple_query'  # Default fallback
     
-    def _handle_document_search(self, message: str, conversation) -> Dict[str, Any]:
+    def _classify_intent_locally(self, message: str) -> Optional[str]:
+        """Return the local classifier's intent when it is confident enough."""
+        if Config.INTENT_CLASSIFIER_ENABLED:
+            intent, confidence = get_intent_classifier_instance().predict(message)
+            if confidence >= Config.INTENT_CLASSIFIER_THRESHOLD:
+                logger.info(f"Classified intent locally as: {intent} ({confidence:.2f})")
+                return intent
+        return None
+    
+    def _accept_llm_intent(self, message: str, intent: str) -> str:
+        """Validate an LLM-classified intent and teach it to the local classifier."""
+        intent = parse_llm_intent(intent)
+        
+        # Validate intent
+        if intent is None:
+            intent = 'simple_query'  # Default fallback
+        elif Config.INTENT_CLASSIFIER_ENABLED:
+            # Learn from the LLM so similar messages are classified locally next time
+            get_intent_classifier_instance().learn(message, intent)
+        
+        logger.info(f"Classified intent as: {intent}")
+        return intent
+    
+    def _handle_document_search(self, message: str, conversation,
+                                stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Handle document search requests using SearchAgent."""
         try:
             self._update_status("running", 60, "Searching documents...")
             
             # Use RAG manager for document search
-            results = self.rag_manager.query_documents(message, workflow_type="adaptive")
+            results = self.rag_manager.query_documents(
+                message,
+                workflow_type="adaptive",
+                stream_callback=stream_callback
+            ).get('rag_response', {})
             
             if results.get('error'):
                 return self.report_failure("Error searching documents")
@@ -194,7 +455,8 @@ class Concierge(BaseAssistant):
             logger.error(f"Error in document search: {str(e)}")
             return self.report_failure("Error searching documents")
     
-    def _handle_task_decomposition(self, message: str, conversation) -> Dict[str, Any]:
+    def _handle_task_decomposition(self, message: str, conversation,
+                                   stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Handle complex task requests that require decomposition using TaskAssistant."""
         try:
             self._update_status("running", 60, "Delegating to TaskAssistant...")
@@ -217,35 +479,25 @@ class Concierge(BaseAssistant):
             if result.get('error'):
                 # Fallback to simple response if TaskAssistant fails
                 logger.warning(f"TaskAssistant failed, falling back to simple response: {result.get('text')}")
-                return self._generate_direct_response(message, conversation)
+                return self._generate_direct_response(message, conversation, stream_callback)
             
             return result
             
         except Exception as e:
             logger.error(f"Error in task decomposition: {str(e)}")
             # Fallback to simple response
-            return self._generate_direct_response(message, conversation)
+            return self._generate_direct_response(message, conversation, stream_callback)
     
-    def _handle_meta_query(self, message: str, conversation) -> Dict[str, Any]:
+    def _handle_meta_query(self, message: str, conversation,
+                           stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Handle questions about the system itself."""
         try:
-            system_prompt = """
-            You are the WhiteLabelRAG Concierge. Answer questions about the system's capabilities,
-            how it works, and what it can do. Be helpful and informative.
-            
-            Key capabilities:
-            - Document search and retrieval using RAG (Retrieval-Augmented Generation)
-            - Conversational AI with context awareness
-            - File upload and processing (PDF, DOCX, TXT, MD, CSV)
-            - Task decomposition and execution
-            - Real-time status updates
-            """
-            
             response_text = LLMFactory.generate_response(
                 prompt=message,
-                system_prompt=system_prompt,
+                system_prompt=META_SYSTEM_PROMPT,
                 temperature=0.3,
-                task=self.config['task']
+                task=self.config['task'],
+                stream_callback=stream_callback
             )
             
             return self.report_success(text=response_text)
@@ -254,7 +506,8 @@ class Concierge(BaseAssistant):
             logger.error(f"Error handling meta query: {str(e)}")
             return self.report_failure("Error processing system query")
     
-    def _handle_simple_query(self, message: str, conversation) -> Dict[str, Any]:
+    def _handle_simple_query(self, message: str, conversation,
+                             stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Handle simple queries that don't require document search."""
         try:
             # Check for direct function calls first
@@ -267,7 +520,12 @@ class Concierge(BaseAssistant):
             
             if collection_stats.get('documents_count', 0) > 0:
                 # Try a quick document search to see if we have relevant information
-                results = self.rag_manager.query_documents(message, n_results=2, workflow_type="basic")
+                results = self.rag_manager.query_documents(
+                    message,
+                    n_results=2,
+                    workflow_type="basic",
+                    stream_callback=stream_callback
+                ).get('rag_response', {})
                 
                 if results.get('sources') and not results.get('error'):
                     # We found relevant documents, use them
@@ -282,19 +540,14 @@ class Concierge(BaseAssistant):
             # No relevant documents or no documents at all, provide general response
             context = conversation.get_context_string(500)
             
-            system_prompt = """
-            You are the WhiteLabelRAG Concierge assistant. Provide a clear, informative response to the user's question.
-            You have access to document search capabilities and can help with various tasks.
-            Be conversational and helpful. If you don't know something, say so honestly.
-            """
-            
             prompt = f"Conversation context:\n{context}\n\nQuestion: {message}" if context else message
             
             response_text = LLMFactory.generate_response(
                 prompt=prompt,
-                system_prompt=system_prompt,
+                system_prompt=SIMPLE_QUERY_SYSTEM_PROMPT,
                 temperature=0.4,
-                task=self.config['task']
+                task=self.config['task'],
+                stream_callback=stream_callback
             )
             
             return self.report_success(text=response_text)
@@ -303,10 +556,11 @@ class Concierge(BaseAssistant):
             logger.error(f"Error handling simple query: {str(e)}")
             return self.report_failure("Error processing query")
     
-    def _generate_direct_response(self, message: str, conversation) -> Dict[str, Any]:
+    def _generate_direct_response(self, message: str, conversation,
+                                  stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Generate a direct conversational response."""
         try:
-            context = conversation.get_context_string(800)
+            context = conversation.get_context_string(Config.CONVERSATION_CONTEXT_MAX_CHARS)
             
             system_prompt = self.config['system_prompt']
             
@@ -316,7 +570,8 @@ class Concierge(BaseAssistant):
                 prompt=prompt,
                 system_prompt=system_prompt,
                 temperature=self.config['temperature'],
-                task=self.config['task']
+                task=self.config['task'],
+                stream_callback=stream_callback
             )
             
             return self.report_success(text=response_text)
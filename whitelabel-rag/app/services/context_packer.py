@@ -0,0 +1,135 @@
+"""
+Token-budgeted context assembly for RAG prompts
+"""
+
+import logging
+from typing import List, Dict, Any, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ContextPacker:
+    """
+    Fits retrieved chunks into a token budget.
+    Adjacent chunks of the same source are merged with their overlapping words removed,
+    and the merged passages are added in relevance order until the budget is used up.
+    """
+
+    def __init__(self, max_tokens: int = 3000, chars_per_token: float = 4.0,
+                 max_overlap_words: int = 200, min_truncated_tokens: int = 50):
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.max_overlap_words = max_overlap_words
+        self.min_truncated_tokens = min_truncated_tokens
+
+    def estimate_tokens(self, text: str) -> int:
+        """Approximate token count without a network round-trip to the model's tokenizer."""
+        return int(len(text) / self.chars_per_token) + 1
+
+    def _overlap(self, previous_words: List[str], next_words: List[str]) -> int:
+        """Length of the longest suffix of previous_words that is a prefix of next_words."""
+        limit = min(len(previous_words), len(next_words), self.max_overlap_words)
+        for size in range(limit, 0, -1):
+            if previous_words[-size:] == next_words[:size]:
+                return size
+        return 0
+
+    def _build_passages(self, results: List[Dict]) -> List[Dict]:
+        """Merge runs of adjacent chunks from the same source into passages."""
+        by_source: Dict[Any, List] = {}
+        standalone = []
+        seen_content = set()
+
+        for rank, result in enumerate(results):
+            content = result.get('content') or ''
+            if not content or content in seen_content:
+                continue
+            seen_content.add(content)
+
+            metadata = result.get('metadata') or {}
+            chunk_id = metadata.get('chunk_id')
+            if isinstance(chunk_id, int) and metadata.get('source'):
+                by_source.setdefault(metadata['source'], []).append((chunk_id, rank, result))
+            else:
+                standalone.append({'rank': rank, 'text': content, 'results': [result]})
+
+        passages = standalone
+        for chunks in by_source.values():
+            chunks.sort(key=lambda item: item[0])
+            current = None
+            for chunk_id, rank, result in chunks:
+                words = result['content'].split()
+                if current and chunk_id == current['last_chunk_id'] + 1:
+                    overlap = self._overlap(current['words'], words)
+                    current['words'].extend(words[overlap:])
+                    current['rank'] = min(current['rank'], rank)
+                    current['results'].append(result)
+                    current['last_chunk_id'] = chunk_id
+                    continue
+
+                if current:
+                    passages.append(current)
+                current = {'rank': rank, 'words': words, 'results': [result], 'last_chunk_id': chunk_id}
+            if current:
+                passages.append(current)
+
+        for passage in passages:
+            if 'words' in passage:
+                passage['text'] = ' '.join(passage.pop('words'))
+                passage.pop('last_chunk_id', None)
+
+        passages.sort(key=lambda passage: passage['rank'])
+        return passages
+
+    def pack(self, results: List[Dict], max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Assemble prompt context from results given in relevance order.
+        Returns the context text, the results it draws on and its estimated token count.
+        """
+        budget = max_tokens or self.max_tokens
+        passages = self._build_passages(results)
+
+        parts = []
+        used_results = []
+        used_tokens = 0
+        separator_tokens = self.estimate_tokens("\n\n")
+
+        for passage in passages:
+            remaining = budget - used_tokens - (separator_tokens if parts else 0)
+            tokens = self.estimate_tokens(passage['text'])
+
+            if tokens <= remaining:
+                text = passage['text']
+            elif remaining >= self.min_truncated_tokens:
+                # Cut the passage at a word boundary to fill the rest of the budget
+                text = passage['text'][:int(remaining * self.chars_per_token)].rsplit(' ', 1)[0]
+                tokens = self.estimate_tokens(text)
+            else:
+                break
+
+            parts.append(text)
+            used_results.extend(passage['results'])
+            used_tokens += tokens + (separator_tokens if len(parts) > 1 else 0)
+
+        if len(passages) > len(parts):
+            logger.info(f"Context budget of {budget} tokens used {len(parts)} of {len(passages)} passages")
+
+        return {
+            'context': "\n\n".join(parts),
+            'results': used_results,
+            'tokens': used_tokens
+        }
+
+# Singleton instance
+_context_packer_instance = None
+
+def get_context_packer_instance() -> ContextPacker:
+    """Get the singleton ContextPacker instance."""
+    global _context_packer_instance
+    if _context_packer_instance is None:
+        _context_packer_instance = ContextPacker(
+            max_tokens=Config.CONTEXT_MAX_TOKENS,
+            chars_per_token=Config.CONTEXT_CHARS_PER_TOKEN
+        )
+    return _context_packer_instance
@@ -2,66 +2,156 @@
 Conversation store for managing user sessions and conversation history
 """
 
+import time
+import heapq
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import json
 
+from app.config import Config
+
 logger = logging.getLogger(__name__)
 
+class Message:
+    """
+    Compact conversation message record.
+    Supports dict-style reads (message['role'], message.get('sources')) for existing callers.
+    """
+    
+    __slots__ = ('role', 'content', 'created', 'sources')
+    
+    # Approximate per-message overhead beyond the text, for memory accounting
+    OVERHEAD_BYTES = 120
+    
+    def __init__(self, role: str, content: str, created: Optional[float] = None,
+                 sources: Optional[List[str]] = None):
+        self.role = role
+        self.content = content
+        self.created = created if created is not None else time.time()
+        self.sources = tuple(sources) if sources else ()
+    
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    def __getitem__(self, key: str):
+        if key == 'sources':
+            return list(self.sources)
+        if key in ('role', 'content', 'timestamp'):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def size_bytes(self) -> int:
+        return len(self.content) + sum(len(source) for source in self.sources) + self.OVERHEAD_BYTES
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "sources": list(self.sources)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Message':
+        created = None
+        if data.get('timestamp'):
+            created = datetime.fromisoformat(data['timestamp']).timestamp()
+        return cls(data['role'], data['content'], created, data.get('sources'))
+
 class Conversation:
     """Represents a conversation session."""
     
     def __init__(self, session_id: str):
         self.session_id = session_id
-        self.messages: List[Dict[str, Any]] = []
+        self.messages: List[Message] = []
         self.user_info: Dict[str, Any] = {}
         self.conversation_state = "information_gathering"
         self.created_at = datetime.now()
         self.last_activity = datetime.now()
         self.max_messages = 20  # Keep last 20 messages
+        # Running summary of older turns, covering messages created up to summary_until
+        self.summary = ""
+        self.summary_until = 0.0
+        # Store notified of changes, for persistence and memory accounting
+        self._listener = None
     
     def add_message(self, role: str, content: str, sources: List[str] = None):
         """Add a message to the conversation."""
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "sources": sources or []
-        }
+        message = Message(role, content, sources=sources)
         
         self.messages.append(message)
         self.last_activity = datetime.now()
         
         # Keep only the last max_messages
         if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
+            del self.messages[:-self.max_messages]
+        
+        if self._listener:
+            self._listener.message_added(self, message)
         
         logger.debug(f"Added {role} message to conversation {self.session_id}")
     
-    def get_recent_messages(self, count: int = 10) -> List[Dict[str, Any]]:
+    def get_recent_messages(self, count: int = 10) -> List[Message]:
         """Get recent messages from the conversation."""
         return self.messages[-count:] if self.messages else []
     
+    def get_unsummarized_messages(self) -> List[Message]:
+        """Messages not yet folded into the running summary."""
+        summary_until = self.summary_until
+        return [message for message in self.messages if message.created > summary_until]
+    
+    def update_summary(self, summary: str, summary_until: float):
+        """Replace the running summary with one covering messages up to summary_until."""
+        self.summary = summary
+        self.summary_until = summary_until
+        
+        if self._listener:
+            self._listener.conversation_changed(self)
+    
     def get_context_string(self, max_length: int = 2000) -> str:
-        """Get conversation context as a string."""
+        """Get conversation context as the running summary plus the most recent turns."""
+        summary = self.summary
+        if summary:
+            # The summary may use at most half of the budget
+            summary = summary[:max_length // 2]
+            summary_text = f"Summary of earlier conversation: {summary}"
+        else:
+            summary_text = ""
+        
         context_parts = []
-        total_length = 0
+        total_length = len(summary_text)
         
         # Start from most recent messages and work backwards
-        for message in reversed(self.messages):
+        for message in reversed(self.get_unsummarized_messages()):
             message_text = f"{message['role']}: {message['content']}"
             if total_length + len(message_text) > max_length:
                 break
-            context_parts.insert(0, message_text)
+            context_parts.append(message_text)
             total_length += len(message_text)
         
+        if summary_text:
+            context_parts.append(summary_text)
+        context_parts.reverse()
+        
         return "\n".join(context_parts)
     
     def set_state(self, state: str):
         """Set conversation state."""
         self.conversation_state = state
         self.last_activity = datetime.now()
+        
+        if self._listener:
+            self._listener.conversation_changed(self)
     
     def is_expired(self, timeout_hours: int = 24) -> bool:
         """Check if conversation has expired."""
@@ -71,53 +161,165 @@ class Conversation:
         """Convert conversation to dictionary."""
         return {
             "session_id": self.session_id,
-            "messages": self.messages,
+            "messages": [message.to_dict() for message in self.messages],
             "user_info": self.user_info,
             "conversation_state": self.conversation_state,
+            "summary": self.summary,
+            "summary_until": self.summary_until,
             "created_at": self.created_at.isoformat(),
             "last_activity": self.last_activity.isoformat()
         }
 
 class ConversationStore:
-    """Store for managing conversation sessions."""
+    """
+    In-process store for conversation sessions with bounded memory.
+    Sessions are kept in LRU order and evicted once max_sessions or max_bytes is exceeded;
+    idle sessions are expired from a min-heap of expiry times by a background timer.
+    """
+    
+    def __init__(self, max_sessions: int = 10000, max_bytes: int = 256 * 1024 * 1024,
+                 timeout_hours: float = 24, cleanup_interval_seconds: float = 300):
+        self.conversations: OrderedDict = OrderedDict()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.timeout_hours = timeout_hours
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.evictions = 0
+        
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        # (expires_at, session_id); entries are re-checked against last_activity when popped,
+        # and entries of removed sessions are dropped by _compact_expiry_heap
+        self._expiry_heap: List[tuple] = []
+        self._lock = threading.RLock()
+        self._timer_started = False
+    
+    def start_expiry_timer(self):
+        """Expire idle conversations in the background every cleanup_interval_seconds."""
+        with self._lock:
+            if self._timer_started:
+                return
+            self._timer_started = True
+        
+        def run():
+            while True:
+                time.sleep(self.cleanup_interval_seconds)
+                try:
+                    self.cleanup_expired_conversations()
+                except Exception as e:
+                    logger.error(f"Error expiring conversations: {str(e)}")
+        
+        threading.Thread(target=run, name="conversation-expiry", daemon=True).start()
     
-    def __init__(self):
-        self.conversations: Dict[str, Conversation] = {}
-        self.cleanup_interval_hours = 24
+    def _conversation_size(self, conversation: Conversation) -> int:
+        return (
+            Message.OVERHEAD_BYTES
+            + len(conversation.summary)
+            + sum(message.size_bytes() for message in conversation.messages)
+        )
+    
+    def _update_size(self, conversation: Conversation):
+        size = self._conversation_size(conversation)
+        self._total_bytes += size - self._sizes.get(conversation.session_id, 0)
+        self._sizes[conversation.session_id] = size
+    
+    def _remove(self, session_id: str) -> bool:
+        conversation = self.conversations.pop(session_id, None)
+        if conversation is None:
+            return False
+        conversation._listener = None
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+        
+        # Removed sessions leave their entries behind; rebuild once they outnumber live ones
+        if len(self._expiry_heap) > 2 * len(self.conversations):
+            self._compact_expiry_heap()
+        return True
+    
+    def _compact_expiry_heap(self):
+        """Rebuild the expiry heap with one entry per live session."""
+        timeout_seconds = self.timeout_hours * 3600
+        self._expiry_heap = [
+            (conversation.last_activity.timestamp() + timeout_seconds, session_id)
+            for session_id, conversation in self.conversations.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+    
+    def _evict(self):
+        """Drop least recently used sessions until within limits, keeping the most recent one."""
+        while len(self.conversations) > 1 and (
+            len(self.conversations) > self.max_sessions or self._total_bytes > self.max_bytes
+        ):
+            session_id = next(iter(self.conversations))
+            self._remove(session_id)
+            self.evictions += 1
+            logger.debug(f"Evicted conversation {session_id}")
     
     def get_conversation(self, session_id: str) -> Conversation:
         """Get or create a conversation for the session."""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = Conversation(session_id)
-            logger.info(f"Created new conversation for session {session_id}")
-        else:
-            # Update last activity
-            self.conversations[session_id].last_activity = datetime.now()
-        
-        return self.conversations[session_id]
+        with self._lock:
+            conversation = self.conversations.get(session_id)
+            if conversation is None:
+                conversation = Conversation(session_id)
+                conversation._listener = self
+                self.conversations[session_id] = conversation
+                self._update_size(conversation)
+                heapq.heappush(self._expiry_heap, (time.time() + self.timeout_hours * 3600, session_id))
+                self._evict()
+                logger.info(f"Created new conversation for session {session_id}")
+            else:
+                # Update last activity
+                conversation.last_activity = datetime.now()
+                self.conversations.move_to_end(session_id)
+            
+            return conversation
+    
+    def message_added(self, conversation: Conversation, message: Message):
+        """Account for a new message and mark the session as most recently used."""
+        with self._lock:
+            if self.conversations.get(conversation.session_id) is not conversation:
+                return
+            self.conversations.move_to_end(conversation.session_id)
+            self._update_size(conversation)
+            self._evict()
+    
+    def conversation_changed(self, conversation: Conversation):
+        """Account for summary changes; state changes need no persistence in process."""
+        with self._lock:
+            if self.conversations.get(conversation.session_id) is conversation:
+                self._update_size(conversation)
     
     def delete_conversation(self, session_id: str) -> bool:
         """Delete a conversation."""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-            logger.info(f"Deleted conversation for session {session_id}")
-            return True
+        with self._lock:
+            if self._remove(session_id):
+                logger.info(f"Deleted conversation for session {session_id}")
+                return True
         return False
     
-    def cleanup_expired_conversations(self, timeout_hours: int = 24):
-        """Remove expired conversations."""
-        expired_sessions = []
-        
-        for session_id, conversation in self.conversations.items():
-            if conversation.is_expired(timeout_hours):
-                expired_sessions.append(session_id)
+    def cleanup_expired_conversations(self, timeout_hours: Optional[float] = None):
+        """Remove expired conversations, touching only heap entries that are due."""
+        timeout_seconds = (timeout_hours if timeout_hours is not None else self.timeout_hours) * 3600
+        now = time.time()
+        expired_count = 0
         
-        for session_id in expired_sessions:
-            del self.conversations[session_id]
-            logger.info(f"Cleaned up expired conversation {session_id}")
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, session_id = heapq.heappop(self._expiry_heap)
+                conversation = self.conversations.get(session_id)
+                if conversation is None:
+                    continue
+                
+                expires_at = conversation.last_activity.timestamp() + timeout_seconds
+                if expires_at <= now:
+                    self._remove(session_id)
+                    expired_count += 1
+                    logger.info(f"Cleaned up expired conversation {session_id}")
+                else:
+                    # Active since it was scheduled; check again when it could next expire
+                    heapq.heappush(self._expiry_heap, (expires_at, session_id))
         
-        if expired_sessions:
-            logger.info(f"Cleaned up {len(expired_sessions)} expired conversations")
+        if expired_count:
+            logger.info(f"Cleaned up {expired_count} expired conversations")
     
     def get_active_conversations_count(self) -> int:
         """Get count of active conversations."""
@@ -125,8 +327,10 @@ class ConversationStore:
     
     def get_conversation_stats(self) -> Dict[str, Any]:
         """Get statistics about conversations."""
-        total_conversations = len(self.conversations)
-        total_messages = sum(len(conv.messages) for conv in self.conversations.values())
+        with self._lock:
+            total_conversations = len(self.conversations)
+            total_messages = sum(len(conv.messages) for conv in self.conversations.values())
+            total_bytes = self._total_bytes
         
         if total_conversations > 0:
             avg_messages_per_conversation = total_messages / total_conversations
@@ -136,13 +340,16 @@ class ConversationStore:
         return {
             "total_conversations": total_conversations,
             "total_messages": total_messages,
-            "avg_messages_per_conversation": round(avg_messages_per_conversation, 2)
+            "avg_messages_per_conversation": round(avg_messages_per_conversation, 2),
+            "memory_bytes": total_bytes,
+            "evictions": self.evictions
         }
     
     def export_conversation(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Export a conversation as JSON."""
-        if session_id in self.conversations:
-            return self.conversations[session_id].to_dict()
+        conversation = self.conversations.get(session_id)
+        if conversation is not None:
+            return conversation.to_dict()
         return None
     
     def import_conversation(self, conversation_data: Dict[str, Any]) -> bool:
@@ -151,9 +358,13 @@ class ConversationStore:
             session_id = conversation_data["session_id"]
             conversation = Conversation(session_id)
             
-            conversation.messages = conversation_data.get("messages", [])
+            conversation.messages = [
+                Message.from_dict(m) for m in conversation_data.get("messages", [])[-conversation.max_messages:]
+            ]
             conversation.user_info = conversation_data.get("user_info", {})
             conversation.conversation_state = conversation_data.get("conversation_state", "information_gathering")
+            conversation.summary = conversation_data.get("summary", "")
+            conversation.summary_until = float(conversation_data.get("summary_until", 0.0))
             
             # Parse timestamps
             if "created_at" in conversation_data:
@@ -161,7 +372,285 @@ class ConversationStore:
             if "last_activity" in conversation_data:
                 conversation.last_activity = datetime.fromisoformat(conversation_data["last_activity"])
             
-            self.conversations[session_id] = conversation
+            with self._lock:
+                self._remove(session_id)
+                conversation._listener = self
+                self.conversations[session_id] = conversation
+                self._update_size(conversation)
+                heapq.heappush(
+                    self._expiry_heap,
+                    (conversation.last_activity.timestamp() + self.timeout_hours * 3600, session_id)
+                )
+                self._evict()
+            
+            logger.info(f"Imported conversation for session {session_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error importing conversation: {str(e)}")
+            return False
+
+class RedisConversationStore:
+    """
+    Conversation store shared by all worker processes through Redis.
+    Each session is a metadata hash plus a capped list of compactly serialized messages;
+    both keys expire after the session's idle timeout. Recently used conversations are
+    kept in process and revalidated against a version counter in a single round trip.
+    """
+    
+    def __init__(self, client, ttl_hours: int = 24, key_prefix: str = "conv",
+                 local_cache_size: int = 1000):
+        self.client = client
+        self.ttl_seconds = int(ttl_hours * 3600)
+        self.key_prefix = key_prefix
+        self.local_cache_size = local_cache_size
+        
+        # session_id -> (version, Conversation)
+        self._local: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}:meta"
+    
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}:msgs"
+    
+    @staticmethod
+    def _encode_message(message: Message) -> str:
+        """Serialize a message with short keys, omitting empty sources."""
+        compact = {'r': message.role, 'c': message.content, 't': round(message.created, 3)}
+        if message.sources:
+            compact['s'] = list(message.sources)
+        return json.dumps(compact, separators=(',', ':'))
+    
+    @staticmethod
+    def _decode_message(raw) -> Message:
+        compact = json.loads(raw)
+        created = compact['t']
+        if isinstance(created, str):
+            created = datetime.fromisoformat(created).timestamp()
+        return Message(compact['r'], compact['c'], created, compact.get('s'))
+    
+    def _encode_meta(self, conversation: Conversation) -> Dict[str, str]:
+        return {
+            'user_info': json.dumps(conversation.user_info, separators=(',', ':')),
+            'state': conversation.conversation_state,
+            'summary': conversation.summary,
+            'summary_until': repr(conversation.summary_until),
+            'created_at': conversation.created_at.isoformat(),
+            'last_activity': conversation.last_activity.isoformat()
+        }
+    
+    def _cache_local(self, session_id: str, version: int, conversation: Conversation):
+        with self._lock:
+            self._local[session_id] = (version, conversation)
+            self._local.move_to_end(session_id)
+            while len(self._local) > self.local_cache_size:
+                self._local.popitem(last=False)
+    
+    def _drop_local(self, session_id: str):
+        with self._lock:
+            self._local.pop(session_id, None)
+    
+    def _after_write(self, session_id: str, conversation: Conversation, new_version: int, expected_version: int):
+        """Keep the local copy only if no other process wrote in between."""
+        if new_version == expected_version:
+            self._cache_local(session_id, new_version, conversation)
+        else:
+            self._drop_local(session_id)
+    
+    def _load(self, session_id: str) -> Optional[tuple]:
+        """Fetch a conversation and its version from Redis."""
+        pipe = self.client.pipeline()
+        pipe.hgetall(self._meta_key(session_id))
+        pipe.lrange(self._messages_key(session_id), 0, -1)
+        meta, raw_messages = pipe.execute()
+        
+        if not meta:
+            return None
+        
+        meta = {self._as_str(k): self._as_str(v) for k, v in meta.items()}
+        conversation = Conversation(session_id)
+        conversation.messages = [self._decode_message(raw) for raw in raw_messages]
+        conversation.user_info = json.loads(meta.get('user_info', '{}'))
+        conversation.conversation_state = meta.get('state', conversation.conversation_state)
+        conversation.summary = meta.get('summary', '')
+        conversation.summary_until = float(meta.get('summary_until', 0.0))
+        if meta.get('created_at'):
+            conversation.created_at = datetime.fromisoformat(meta['created_at'])
+        if meta.get('last_activity'):
+            conversation.last_activity = datetime.fromisoformat(meta['last_activity'])
+        conversation._listener = self
+        return int(meta.get('version', 0)), conversation
+    
+    @staticmethod
+    def _as_str(value) -> str:
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+    
+    def _save(self, conversation: Conversation, include_messages: bool = False) -> int:
+        """Write conversation metadata (and optionally all messages); returns the new version."""
+        session_id = conversation.session_id
+        meta_key = self._meta_key(session_id)
+        messages_key = self._messages_key(session_id)
+        
+        pipe = self.client.pipeline()
+        pipe.hset(meta_key, mapping=self._encode_meta(conversation))
+        pipe.hincrby(meta_key, 'version', 1)
+        if include_messages:
+            pipe.delete(messages_key)
+            if conversation.messages:
+                pipe.rpush(messages_key, *[self._encode_message(m) for m in conversation.messages])
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.expire(messages_key, self.ttl_seconds)
+        results = pipe.execute()
+        return results[1]
+    
+    def get_conversation(self, session_id: str) -> Conversation:
+        """Get or create a conversation for the session."""
+        meta_key = self._meta_key(session_id)
+        now = datetime.now()
+        
+        # Refresh activity and expiry while reading the current version
+        pipe = self.client.pipeline()
+        pipe.hget(meta_key, 'version')
+        pipe.hset(meta_key, 'last_activity', now.isoformat())
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.expire(self._messages_key(session_id), self.ttl_seconds)
+        version, _, _, _ = pipe.execute()
+        
+        if version is None:
+            # No stored session: the hset above created a bare hash, so initialize it
+            conversation = Conversation(session_id)
+            conversation._listener = self
+            self._cache_local(session_id, self._save(conversation, include_messages=True), conversation)
+            logger.info(f"Created new conversation for session {session_id}")
+            return conversation
+        
+        version = int(version)
+        with self._lock:
+            cached = self._local.get(session_id)
+            if cached and cached[0] == version:
+                self._local.move_to_end(session_id)
+                cached[1].last_activity = now
+                return cached[1]
+        
+        loaded = self._load(session_id)
+        if loaded is None:
+            conversation = Conversation(session_id)
+            conversation._listener = self
+            self._cache_local(session_id, self._save(conversation, include_messages=True), conversation)
+            return conversation
+        
+        version, conversation = loaded
+        conversation.last_activity = now
+        self._cache_local(session_id, version, conversation)
+        return conversation
+    
+    def message_added(self, conversation: Conversation, message: Dict[str, Any]):
+        """Append a message to the stored conversation."""
+        session_id = conversation.session_id
+        meta_key = self._meta_key(session_id)
+        messages_key = self._messages_key(session_id)
+        
+        with self._lock:
+            cached = self._local.get(session_id)
+        expected_version = cached[0] + 1 if cached and cached[1] is conversation else None
+        
+        try:
+            pipe = self.client.pipeline()
+            pipe.rpush(messages_key, self._encode_message(message))
+            pipe.ltrim(messages_key, -conversation.max_messages, -1)
+            pipe.hset(meta_key, 'last_activity', conversation.last_activity.isoformat())
+            pipe.hincrby(meta_key, 'version', 1)
+            pipe.expire(meta_key, self.ttl_seconds)
+            pipe.expire(messages_key, self.ttl_seconds)
+            results = pipe.execute()
+            self._after_write(session_id, conversation, results[3], expected_version)
+        except Exception as e:
+            logger.error(f"Error saving message for session {session_id}: {str(e)}")
+            self._drop_local(session_id)
+    
+    def conversation_changed(self, conversation: Conversation):
+        """Persist conversation state and user info."""
+        session_id = conversation.session_id
+        with self._lock:
+            cached = self._local.get(session_id)
+        expected_version = cached[0] + 1 if cached and cached[1] is conversation else None
+        
+        try:
+            self._after_write(session_id, conversation, self._save(conversation), expected_version)
+        except Exception as e:
+            logger.error(f"Error saving conversation {session_id}: {str(e)}")
+            self._drop_local(session_id)
+    
+    def delete_conversation(self, session_id: str) -> bool:
+        """Delete a conversation."""
+        self._drop_local(session_id)
+        deleted = self.client.delete(self._meta_key(session_id), self._messages_key(session_id))
+        if deleted:
+            logger.info(f"Deleted conversation for session {session_id}")
+        return deleted > 0
+    
+    def cleanup_expired_conversations(self, timeout_hours: int = 24):
+        """Expired sessions are removed by Redis key TTLs; only the local cache is pruned."""
+        with self._lock:
+            expired = [sid for sid, (_, conv) in self._local.items() if conv.is_expired(timeout_hours)]
+            for session_id in expired:
+                del self._local[session_id]
+    
+    def _iter_session_ids(self):
+        suffix = ":meta"
+        for key in self.client.scan_iter(match=f"{self.key_prefix}:*{suffix}", count=1000):
+            key = self._as_str(key)
+            yield key[len(self.key_prefix) + 1:-len(suffix)]
+    
+    def get_active_conversations_count(self) -> int:
+        """Get count of active conversations."""
+        return sum(1 for _ in self._iter_session_ids())
+    
+    def get_conversation_stats(self) -> Dict[str, Any]:
+        """Get statistics about conversations."""
+        session_ids = list(self._iter_session_ids())
+        
+        pipe = self.client.pipeline()
+        for session_id in session_ids:
+            pipe.llen(self._messages_key(session_id))
+        total_messages = sum(pipe.execute()) if session_ids else 0
+        total_conversations = len(session_ids)
+        
+        return {
+            "total_conversations": total_conversations,
+            "total_messages": total_messages,
+            "avg_messages_per_conversation": round(total_messages / total_conversations, 2) if total_conversations else 0
+        }
+    
+    def export_conversation(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Export a conversation as JSON."""
+        loaded = self._load(session_id)
+        return loaded[1].to_dict() if loaded else None
+    
+    def import_conversation(self, conversation_data: Dict[str, Any]) -> bool:
+        """Import a conversation from JSON data."""
+        try:
+            session_id = conversation_data["session_id"]
+            conversation = Conversation(session_id)
+            
+            conversation.messages = [
+                Message.from_dict(m) for m in conversation_data.get("messages", [])[-conversation.max_messages:]
+            ]
+            conversation.user_info = conversation_data.get("user_info", {})
+            conversation.conversation_state = conversation_data.get("conversation_state", "information_gathering")
+            conversation.summary = conversation_data.get("summary", "")
+            conversation.summary_until = float(conversation_data.get("summary_until", 0.0))
+            
+            if "created_at" in conversation_data:
+                conversation.created_at = datetime.fromisoformat(conversation_data["created_at"])
+            if "last_activity" in conversation_data:
+                conversation.last_activity = datetime.fromisoformat(conversation_data["last_activity"])
+            
+            conversation._listener = self
+            self._drop_local(session_id)
+            self._save(conversation, include_messages=True)
             logger.info(f"Imported conversation for session {session_id}")
             return True
             
@@ -172,9 +661,29 @@ class ConversationStore:
 # Singleton instance
 _conversation_store_instance = None
 
-def get_conversation_store() -> ConversationStore:
-    """Get the singleton ConversationStore instance."""
+def get_conversation_store():
+    """Get the singleton conversation store for the configured CONVERSATION_STORE backend."""
     global _conversation_store_instance
     if _conversation_store_instance is None:
-        _conversation_store_instance = ConversationStore()
-    return _conversation_store_instance
\ No newline at end of file
+        if Config.CONVERSATION_STORE == 'redis':
+            try:
+                import redis
+                client = redis.Redis.from_url(Config.REDIS_URL)
+                client.ping()
+                _conversation_store_instance = RedisConversationStore(
+                    client,
+                    ttl_hours=Config.CONVERSATION_TTL_HOURS
+                )
+                logger.info(f"Using Redis conversation store at {Config.REDIS_URL}")
+            except Exception as e:
+                logger.warning(f"Redis unavailable, falling back to in-process conversation store: {str(e)}")
+        
+        if _conversation_store_instance is None:
+            _conversation_store_instance = ConversationStore(
+                max_sessions=Config.CONVERSATION_MAX_SESSIONS,
+                max_bytes=Config.CONVERSATION_MAX_MB * 1024 * 1024,
+                timeout_hours=Config.CONVERSATION_TTL_HOURS,
+                cleanup_interval_seconds=Config.CONVERSATION_CLEANUP_INTERVAL_SECONDS
+            )
+            _conversation_store_instance.start_expiry_timer()
+    return _conversation_store_instance
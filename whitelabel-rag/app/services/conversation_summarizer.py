@@ -0,0 +1,96 @@
+"""
+Background summarization of older conversation turns
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.services.llm_factory import LLMFactory
+from app.services.llm_limiter import llm_priority, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+class ConversationSummarizer:
+    """
+    Folds older turns into a conversation's running summary once its unsummarized
+    history grows past a threshold, keeping the most recent turns verbatim.
+    Summaries are generated off the request path, at most one per session at a time.
+    """
+
+    def __init__(self, threshold: int = 12, keep_recent: int = 6, max_workers: int = 2,
+                 max_summary_tokens: int = 256):
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.max_summary_tokens = max_summary_tokens
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="conversation-summary")
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def maybe_summarize(self, conversation):
+        """Schedule a summary refresh if the conversation has outgrown the threshold."""
+        if len(conversation.get_unsummarized_messages()) <= self.threshold:
+            return
+
+        with self._lock:
+            if conversation.session_id in self._in_flight:
+                return
+            self._in_flight.add(conversation.session_id)
+
+        self.executor.submit(self._summarize, conversation)
+
+    def _summarize(self, conversation):
+        try:
+            pending = conversation.get_unsummarized_messages()
+            to_fold = pending[:-self.keep_recent] if self.keep_recent else pending
+            if not to_fold:
+                return
+
+            transcript = "\n".join(f"{message.role}: {message.content}" for message in to_fold)
+            prompt = (
+                f"Current summary:\n{conversation.summary or '(none)'}\n\n"
+                f"New conversation turns:\n{transcript}"
+            )
+            system_prompt = """
+            Update the running summary of a conversation between a user and an assistant.
+            Merge the new turns into the current summary. Keep names, facts, decisions, open
+            questions and user preferences; drop pleasantries. Return only the updated summary.
+            """
+
+            # Yield the model's rate limit to interactive requests
+            with llm_priority(PRIORITY_BACKGROUND):
+                summary = LLMFactory.generate_response(
+                    prompt,
+                    system_prompt,
+                    temperature=0.1,
+                    max_tokens=self.max_summary_tokens,
+                    task='fast'
+                ).strip()
+
+            if not summary or summary.startswith("Error generating response"):
+                logger.warning(f"Could not summarize conversation {conversation.session_id}")
+                return
+
+            conversation.update_summary(summary, to_fold[-1].created)
+            logger.info(f"Folded {len(to_fold)} messages into summary for {conversation.session_id}")
+
+        except Exception as e:
+            logger.error(f"Error summarizing conversation {conversation.session_id}: {str(e)}")
+
+        finally:
+            with self._lock:
+                self._in_flight.discard(conversation.session_id)
+
+# Singleton instance
+_conversation_summarizer_instance = None
+
+def get_conversation_summarizer_instance() -> ConversationSummarizer:
+    """Get the singleton ConversationSummarizer instance."""
+    global _conversation_summarizer_instance
+    if _conversation_summarizer_instance is None:
+        _conversation_summarizer_instance = ConversationSummarizer(
+            threshold=Config.CONVERSATION_SUMMARY_THRESHOLD,
+            keep_recent=Config.CONVERSATION_RECENT_TURNS
+        )
+    return _conversation_summarizer_instance
@@ -0,0 +1,106 @@
+"""
+Document manifest tracking per-file and per-chunk content hashes
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class DocumentManifest:
+    """SQLite-backed record of which chunks are stored for each ingested source file."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                source TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        # Single-row counter shared by every process using this manifest
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS corpus_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("INSERT OR IGNORE INTO corpus_version (id, version) VALUES (1, 0)")
+        self._conn.commit()
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry for a source file."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_hash, chunk_ids, updated_at FROM documents WHERE source = ?",
+                (source,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'source': source,
+            'file_hash': row[0],
+            'chunk_ids': json.loads(row[1]),
+            'updated_at': row[2]
+        }
+
+    def put(self, source: str, file_hash: str, chunk_ids: List[str]):
+        """Record the file hash and ordered chunk IDs stored for a source file."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (source, file_hash, chunk_ids, updated_at) VALUES (?, ?, ?, ?)",
+                (source, file_hash, json.dumps(chunk_ids), datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def delete(self, source: str) -> bool:
+        """Remove the manifest entry for a source file."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def clear(self):
+        """Remove all manifest entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents")
+            self._conn.commit()
+
+    def get_corpus_version(self) -> int:
+        """Current corpus version; it increases whenever stored chunks change."""
+        with self._lock:
+            return self._conn.execute("SELECT version FROM corpus_version WHERE id = 1").fetchone()[0]
+
+    def bump_corpus_version(self) -> int:
+        """Record a change to the stored chunks and return the new corpus version."""
+        with self._lock:
+            self._conn.execute("UPDATE corpus_version SET version = version + 1 WHERE id = 1")
+            self._conn.commit()
+            return self._conn.execute("SELECT version FROM corpus_version WHERE id = 1").fetchone()[0]
+
+# Singleton instance
+_document_manifest_instance = None
+
+def get_document_manifest_instance(db_path: Optional[str] = None) -> DocumentManifest:
+    """Get the singleton DocumentManifest instance."""
+    global _document_manifest_instance
+    if _document_manifest_instance is None:
+        if db_path is None:
+            chroma_path = os.environ.get('CHROMA_DB_PATH', './chromadb_data')
+            db_path = os.environ.get('DOCUMENT_MANIFEST_PATH', os.path.join(chroma_path, 'document_manifest.sqlite3'))
+        _document_manifest_instance = DocumentManifest(db_path)
+    return _document_manifest_instance
@@ -29,32 +29,36 @@ class DocumentProcessor:
                 logger.warning(f"No text extracted from {file_path}")
                 return []
             
-            # Create chunks
-            chunks = self._create_chunks(text)
-            
-            # Add metadata to chunks
-            filename = os.path.basename(file_path)
-            processed_chunks = []
-            
-            for i, chunk in enumerate(chunks):
-                processed_chunks.append({
-                    'content': chunk,
-                    'metadata': {
-                        'source': filename,
-                        'chunk_id': i,
-                        'total_chunks': len(chunks),
-                        'file_path': file_path,
-                        'file_type': self._get_file_type(file_path)
-                    }
-                })
-            
-            logger.info(f"Processed {filename} into {len(processed_chunks)} chunks")
-            return processed_chunks
+            return self.build_chunks(file_path, text)
             
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {str(e)}")
             return []
     
+    def build_chunks(self, file_path: str, text: str) -> List[Dict[str, Any]]:
+        """Split extracted text into chunks with source metadata."""
+        # Create chunks
+        chunks = self._create_chunks(text)
+        
+        # Add metadata to chunks
+        filename = os.path.basename(file_path)
+        processed_chunks = []
+        
+        for i, chunk in enumerate(chunks):
+            processed_chunks.append({
+                'content': chunk,
+                'metadata': {
+                    'source': filename,
+                    'chunk_id': i,
+                    'total_chunks': len(chunks),
+                    'file_path': file_path,
+                    'file_type': self._get_file_type(file_path)
+                }
+            })
+        
+        logger.info(f"Processed {filename} into {len(processed_chunks)} chunks")
+        return processed_chunks
+    
     def _extract_text(self, file_path: str) -> str:
         """Extract text from file based on extension."""
         file_ext = os.path.splitext(file_path)[1].lower()
@@ -80,16 +84,11 @@ class DocumentProcessor:
     
     def _extract_pdf_text(self, file_path: str) -> str:
         """Extract text from PDF file."""
-        text = ""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            return extract_pdf_pages(file_path, 0, get_pdf_page_count(file_path)).strip()
         except Exception as e:
             logger.error(f"Error reading PDF {file_path}: {str(e)}")
-        
-        return text.strip()
+            return ""
     
     def _extract_docx_text(self, file_path: str) -> str:
         """Extract text from DOCX file."""
@@ -197,3 +196,21 @@ class DocumentProcessor:
         """Check if file format is supported."""
         file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
         return file_ext in self.get_supported_formats()
+
+def get_pdf_page_count(file_path: str) -> int:
+    """Get the number of pages in a PDF file."""
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> str:
+    """Extract text from PDF pages in the range [start, end)."""
+    parts = []
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages[start:end]:
+            parts.append((page.extract_text() or "") + "\n")
+    return "".join(parts)
+
+def extract_document_text(file_path: str) -> str:
+    """Extract text from a document; module-level so it can run in a worker process."""
+    return DocumentProcessor()._extract_text(file_path)
@@ -0,0 +1,212 @@
+"""
+Persistent embedding cache backed by SQLite
+"""
+
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from typing import List, Dict, Any, Optional, Sequence
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """On-disk cache of embedding vectors keyed by model name and text hash."""
+
+    # Hits only refresh last_access in memory; they are written back in one
+    # transaction at most this often, or before an eviction pass needs them
+    ACCESS_FLUSH_SECONDS = 30.0
+
+    def __init__(self, db_path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending_access: Dict[tuple, float] = {}
+        self._last_access_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._total_bytes = row[0]
+
+        logger.info(f"Embedding cache opened at {db_path} ({self._total_bytes} bytes)")
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Hash text content for use as a cache key."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """Return cached embeddings for the given texts, keyed by text."""
+        hashes = {self.hash_text(text): text for text in texts}
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            hash_list = list(hashes.keys())
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(hash_list), 500):
+                batch = hash_list[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[hashes[text_hash]] = array('f', blob).tolist()
+
+            if found:
+                now = time.time()
+                for text in found:
+                    self._pending_access[(model, self.hash_text(text))] = now
+                if time.monotonic() - self._last_access_flush >= self.ACCESS_FLUSH_SECONDS:
+                    self._flush_access()
+
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+
+        return found
+
+    def put_many(self, model: str, texts: Sequence[str], embeddings: Sequence[Sequence[float]]):
+        """Store embeddings for the given texts and evict old entries if over budget."""
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            rows.append((model, self.hash_text(text), array('f', embedding).tobytes(), now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            # Existing rows already hold the same vector; only new rows add bytes
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (model, text_hash) DO NOTHING",
+                    row
+                )
+                if cursor.rowcount > 0:
+                    self._total_bytes += len(row[2])
+            self._conn.commit()
+
+            if self._total_bytes > self.max_bytes:
+                self._flush_access()
+                self._evict()
+
+    def _flush_access(self):
+        """Write buffered last_access updates in one transaction."""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, text_hash) for (model, text_hash), now in self._pending_access.items()]
+            )
+            self._conn.commit()
+            self._pending_access.clear()
+        self._last_access_flush = time.monotonic()
+
+    def _evict(self):
+        """Evict least recently used entries until the cache is under 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute(
+            "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_access ASC"
+        )
+
+        to_delete = []
+        while self._total_bytes > target:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for model, text_hash, size in rows:
+                if self._total_bytes <= target:
+                    break
+                to_delete.append((model, text_hash))
+                self._total_bytes -= size
+        cursor.close()
+
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND text_hash = ?",
+            to_delete
+        )
+        self._conn.commit()
+        self.evictions += len(to_delete)
+        logger.info(f"Evicted {len(to_delete)} embeddings from cache")
+
+    def clear(self):
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._pending_access.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters and size."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """Embedding function wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, embedding_function, model_name: str, cache: EmbeddingCache):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        cached = self.cache.get_many(self.model_name, texts)
+
+        # Embed each distinct uncached text once
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            new_embeddings = self.embedding_function(missing)
+            new_embeddings = [list(embedding) for embedding in new_embeddings]
+            self.cache.put_many(self.model_name, missing, new_embeddings)
+            cached.update(zip(missing, new_embeddings))
+
+        return [cached[text] for text in texts]
+
+# Singleton instance
+_embedding_cache_instance = None
+
+def get_embedding_cache_instance(db_path: Optional[str] = None) -> EmbeddingCache:
+    """Get the singleton EmbeddingCache instance."""
+    global _embedding_cache_instance
+    if _embedding_cache_instance is None:
+        if db_path is None:
+            chroma_path = os.environ.get('CHROMA_DB_PATH', './chromadb_data')
+            db_path = os.environ.get('EMBEDDING_CACHE_PATH', os.path.join(chroma_path, 'embedding_cache.sqlite3'))
+        max_mb = int(os.environ.get('EMBEDDING_CACHE_MAX_MB', 512))
+        _embedding_cache_instance = EmbeddingCache(db_path, max_bytes=max_mb * 1024 * 1024)
+    return _embedding_cache_instance
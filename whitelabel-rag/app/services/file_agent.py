@@ -181,43 +181,41 @@ class FileAgent(BaseAssistant):
             if not self.document_processor.is_supported_format(file_path):
                 return self.report_failure(f"File format not supported for {filename}")
             
-            # Process the document
-            self._update_status("running", 40, f"Extracting text from {filename}...")
-            chunks = self.document_processor.process_document(file_path)
+            # Process the document, skipping unchanged content
+            self._update_status("running", 40, f"Extracting and storing chunks from {filename}...")
+            
+            try:
+                ingest_result = self.rag_manager.ingest_document(
+                    file_path,
+                    self.document_processor,
+                    extra_metadata={
+                        'processed_at': datetime.now().isoformat(),
+                        'file_size': os.path.getsize(file_path)
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error storing chunks: {str(e)}")
+                return self.report_failure(f"Failed to store any chunks from {filename}")
             
-            if not chunks:
+            total_chunks = ingest_result['chunks_total']
+            if total_chunks == 0:
                 return self.report_failure(f"No content could be extracted from {filename}")
             
-            # Store chunks in vector database
-            self._update_status("running", 70, f"Storing {len(chunks)} chunks in vector database...")
-            
-            stored_chunks = 0
-            for chunk in chunks:
-                try:
-                    chunk_id = self.rag_manager.store_document_chunk(
-                        content=chunk['content'],
-                        metadata={
-                            **chunk['metadata'],
-                            'processed_at': datetime.now().isoformat(),
-                            'file_size': os.path.getsize(file_path)
-                        }
-                    )
-                    stored_chunks += 1
-                except Exception as e:
-                    logger.error(f"Error storing chunk: {str(e)}")
-            
-            if stored_chunks == 0:
-                return self.report_failure(f"Failed to store any chunks from {filename}")
-            
             # Generate summary
-            summary_text = self._generate_processing_summary(filename, stored_chunks, len(chunks))
+            if ingest_result['unchanged']:
+                summary_text = f"✅ **{filename}** is unchanged since it was last processed ({total_chunks} chunks). Nothing to update."
+            else:
+                summary_text = self._generate_processing_summary(filename, total_chunks, total_chunks)
             
             return self.report_success(
                 text=summary_text,
                 additional_data={
                     'filename': filename,
-                    'chunks_created': len(chunks),
-                    'chunks_stored': stored_chunks,
+                    'chunks_created': total_chunks,
+                    'chunks_stored': total_chunks,
+                    'chunks_added': ingest_result['chunks_added'],
+                    'chunks_removed': ingest_result['chunks_removed'],
+                    'unchanged': ingest_result['unchanged'],
                     'file_processed': True
                 }
             )
@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, Any
 from app.services.llm_factory import LLMFactory
+from app.services.llm_limiter import llm_priority, PRIORITY_BACKGROUND
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +30,14 @@ class FileManager:
 
             prompt = f"Please summarize the following document:\n\n{document_text}"
 
-            summary = LLMFactory.generate_response(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                temperature=0.3,
-                task='summarization'
-            )
+            # Yield the model's rate limit to interactive requests
+            with llm_priority(PRIORITY_BACKGROUND):
+                summary = LLMFactory.generate_response(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    temperature=0.3,
+                    task='summarization'
+                )
 
             return {
                 'success': True,
@@ -0,0 +1,135 @@
+"""
+Process pool for eventlet-patched servers
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+def _worker_main(conn):
+    """Run calls received over conn until told to stop; runs in the worker process."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        func, args, kwargs = task
+        try:
+            reply = (True, func(*args, **kwargs))
+        except Exception as e:
+            reply = (False, e)
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((False, RuntimeError(f"Could not return result from worker process: {str(e)}")))
+
+class GreenProcessPool(Executor):
+    """
+    Runs functions in spawned worker processes from an eventlet-patched server.
+    ProcessPoolExecutor manages its workers with native semaphores and helper
+    threads that monkey-patching turns green, which deadlocks the hub. Here each
+    call is a greenthread that hands the function to an idle worker process over a
+    pipe and yields to the hub until the reply is readable, so CPU-bound work runs
+    in parallel processes and green threads keep being served meanwhile.
+    """
+
+    def __init__(self, max_workers: int):
+        from eventlet.semaphore import Semaphore
+
+        self.max_workers = max_workers
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: List[Dict[str, Any]] = []
+        self._workers: List[Dict[str, Any]] = []
+        self._slots = Semaphore(max_workers)
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        import eventlet
+
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future = Future()
+        eventlet.spawn_n(self._complete, future, fn, args, kwargs)
+        return future
+
+    def _complete(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self._call(fn, args, kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _call(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """Run fn in an idle worker process, yielding to the hub while it works."""
+        from eventlet.hubs import trampoline
+
+        with self._slots:
+            worker = self._checkout()
+            conn = worker['conn']
+            try:
+                conn.send((fn, args, kwargs))
+                # Sleep until the worker replies; the read itself then completes promptly
+                trampoline(conn.fileno(), read=True)
+                ok, value = conn.recv()
+            except (EOFError, OSError) as e:
+                self._discard(worker)
+                raise RuntimeError(f"Worker process exited unexpectedly: {str(e)}")
+            self._checkin(worker)
+
+        if ok:
+            return value
+        raise value
+
+    def _checkout(self) -> Dict[str, Any]:
+        if self._idle:
+            return self._idle.pop()
+
+        parent_conn, child_conn = self._context.Pipe()
+        # Green sockets are non-blocking, and the child inherits the flag
+        os.set_blocking(parent_conn.fileno(), True)
+        os.set_blocking(child_conn.fileno(), True)
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+
+        worker = {'process': process, 'conn': parent_conn}
+        self._workers.append(worker)
+        return worker
+
+    def _checkin(self, worker: Dict[str, Any]):
+        if self._shutdown:
+            self._stop(worker)
+        else:
+            self._idle.append(worker)
+
+    def _discard(self, worker: Dict[str, Any]):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker['conn'].close()
+        worker['process'].join(timeout=1)
+
+    def _stop(self, worker: Dict[str, Any]):
+        try:
+            worker['conn'].send(None)
+        except (EOFError, OSError):
+            pass
+        self._discard(worker)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Stop idle workers now; busy ones stop when their call returns."""
+        self._shutdown = True
+        idle, self._idle = self._idle, []
+        for worker in idle:
+            self._stop(worker)
@@ -0,0 +1,312 @@
+"""
+Persistent background job queue for document ingestion
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from app.config import Config
+from app.services.document_processor import DocumentProcessor
+from app.services.rag_manager import get_rag_manager
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobQueue:
+    """
+    SQLite-backed ingestion job queue.
+    Jobs outlive the process that accepted them: any worker whose heartbeat goes
+    stale has its job put back on the queue for another worker to pick up.
+    """
+
+    def __init__(self, db_path: str, num_workers: int = 1, poll_interval: float = 2.0,
+                 heartbeat_interval: float = 10.0, stale_after: float = 60.0):
+        self.db_path = db_path
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running_jobs = set()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                file_paths TEXT NOT NULL,
+                options TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                details TEXT,
+                result TEXT,
+                error TEXT,
+                worker_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                heartbeat_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def start(self):
+        """Start the worker and heartbeat threads."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"ingestion-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="ingestion-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+        logger.info(f"Ingestion job queue started with {self.num_workers} workers ({self.worker_id})")
+
+    def submit(self, file_paths: List[str], options: Optional[Dict[str, Any]] = None) -> str:
+        """Queue files for ingestion and return the job ID."""
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, file_paths, options, progress, details, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, 0, 'Queued for ingestion', ?, ?)",
+                (job_id, json.dumps(file_paths), json.dumps(options or {}), now, now)
+            )
+            self._conn.commit()
+
+        logger.info(f"Queued ingestion job {job_id} for {len(file_paths)} files")
+        self._emit_progress(self.get_job(job_id))
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_jobs(self, session_id: str, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List a session's most recent jobs, optionally filtered by status."""
+        query = "SELECT * FROM jobs WHERE json_extract(options, '$.session_id') = ?"
+        params: List[Any] = [session_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+        """A job as shown to clients: file names instead of server paths, and no session ID."""
+        view = {name: value for name, value in job.items() if name not in ('session_id', 'options')}
+        view['file_paths'] = [os.path.basename(path) for path in job['file_paths']]
+        return view
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a job row to a JSON-serializable dictionary."""
+        options = json.loads(row['options'])
+        return {
+            'job_id': row['job_id'],
+            'status': row['status'],
+            'file_paths': json.loads(row['file_paths']),
+            'session_id': options.get('session_id'),
+            'progress': row['progress'],
+            'details': row['details'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def _requeue_stale_jobs(self):
+        """Put running jobs whose worker stopped heartbeating back on the queue."""
+        cutoff = time.time() - self.stale_after
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, details = 'Requeued after worker restart', "
+                "updated_at = ? WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (datetime.now().isoformat(), cutoff)
+            )
+            self._conn.commit()
+        if cursor.rowcount:
+            logger.warning(f"Requeued {cursor.rowcount} stale ingestion jobs")
+
+    def _claim_next_job(self) -> Optional[Dict[str, Any]]:
+        """Atomically claim the oldest queued job."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (self.worker_id, time.time(), datetime.now().isoformat(), row['job_id'])
+            )
+            self._conn.commit()
+
+            # Another process claimed it first
+            if cursor.rowcount == 0:
+                return None
+
+            self._running_jobs.add(row['job_id'])
+            job = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row['job_id'],)).fetchone()
+
+        return {**self._row_to_dict(job), 'options': json.loads(job['options'])}
+
+    def _update_job(self, job_id: str, **fields):
+        """Update job fields and push the new state to clients."""
+        fields['updated_at'] = datetime.now().isoformat()
+        if 'result' in fields and fields['result'] is not None:
+            fields['result'] = json.dumps(fields['result'])
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                [*fields.values(), job_id]
+            )
+            self._conn.commit()
+
+        self._emit_progress(self.get_job(job_id))
+
+    def _worker_loop(self):
+        """Claim and run queued jobs until the process exits."""
+        while True:
+            try:
+                self._requeue_stale_jobs()
+                job = self._claim_next_job()
+                if job:
+                    self._run_job(job)
+                    continue
+            except Exception as e:
+                logger.error(f"Ingestion job worker error: {str(e)}", exc_info=True)
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _heartbeat_loop(self):
+        """Periodically mark this process's running jobs as alive."""
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self._lock:
+                    job_ids = list(self._running_jobs)
+                    if job_ids:
+                        self._conn.executemany(
+                            "UPDATE jobs SET heartbeat_at = ? WHERE job_id = ? AND worker_id = ?",
+                            [(time.time(), job_id, self.worker_id) for job_id in job_ids]
+                        )
+                        self._conn.commit()
+            except Exception as e:
+                logger.error(f"Ingestion job heartbeat error: {str(e)}")
+
+    def _run_job(self, job: Dict[str, Any]):
+        """Ingest the files of a claimed job, reporting progress as each file completes."""
+        job_id = job['job_id']
+        options = job['options']
+        file_paths = job['file_paths']
+        total = len(file_paths)
+
+        try:
+            self._update_job(job_id, progress=10, details=f"Ingesting {total} file(s)...")
+
+            processor = DocumentProcessor(**options.get('processor', {}))
+
+            def on_progress(completed, total_files, result):
+                self._update_job(
+                    job_id,
+                    progress=10 + int(89 * completed / total_files),
+                    details=f"Processed {result.get('source')} ({completed}/{total_files})"
+                )
+
+            results = get_rag_manager().ingest_documents(
+                file_paths,
+                processor,
+                extra_metadata=options.get('extra_metadata'),
+                progress_callback=on_progress
+            )
+
+            failed = [r for r in results if r.get('error')]
+            if failed and len(failed) == len(results):
+                self._update_job(
+                    job_id,
+                    status='failed',
+                    progress=100,
+                    details='Ingestion failed',
+                    result=results,
+                    error=failed[0]['error']
+                )
+            else:
+                self._update_job(
+                    job_id,
+                    status='completed',
+                    progress=100,
+                    details=f"Ingested {total - len(failed)} of {total} file(s)",
+                    result=results
+                )
+
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}", exc_info=True)
+            self._update_job(job_id, status='failed', progress=100, details='Ingestion failed', error=str(e))
+
+        finally:
+            with self._lock:
+                self._running_jobs.discard(job_id)
+
+    def _emit_progress(self, job: Optional[Dict[str, Any]]):
+        """Push job progress to the submitting session's room over Socket.IO."""
+        if not job or not job.get('session_id'):
+            # Jobs without a session are only visible through the jobs API
+            return
+
+        payload = self.public_view(job)
+
+        try:
+            # Lazy import to avoid circular dependency
+            import sys
+            if 'app' in sys.modules:
+                from app import socketio
+                socketio.emit('ingestion_progress', payload, room=job['session_id'])
+        except Exception as e:
+            logger.debug(f"WebSocket not available for ingestion progress: {str(e)}")
+
+# Singleton instance
+_ingestion_job_queue_instance = None
+
+def get_ingestion_job_queue_instance() -> IngestionJobQueue:
+    """Get the singleton IngestionJobQueue instance."""
+    global _ingestion_job_queue_instance
+    if _ingestion_job_queue_instance is None:
+        _ingestion_job_queue_instance = IngestionJobQueue(
+            Config.INGESTION_JOBS_DB_PATH,
+            num_workers=Config.INGESTION_JOB_WORKERS
+        )
+    return _ingestion_job_queue_instance
@@ -0,0 +1,300 @@
+"""
+Parallel document ingestion pipeline
+"""
+
+import os
+import sys
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+
+from app.config import Config
+from app.services.chroma_service import get_chroma_service_instance
+from app.services.document_processor import (
+    extract_document_text,
+    extract_pdf_pages,
+    get_pdf_page_count
+)
+from app.utils.file_utils import compute_file_hash
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the work stream between pipeline stages
+_END = object()
+
+def _eventlet_patched() -> bool:
+    """Whether eventlet has monkey-patched threading in this process."""
+    if 'eventlet' not in sys.modules:
+        return False
+    try:
+        from eventlet import patcher
+        return patcher.is_monkey_patched('thread')
+    except Exception:
+        return False
+
+class IngestionPipeline:
+    """
+    Ingests documents through extract → chunk → embed → store stages.
+    Extraction runs in a process pool (PDFs are split into page ranges), also under
+    eventlet; the stages are connected by bounded queues so memory stays flat
+    regardless of batch size.
+    """
+
+    def __init__(self, chroma_service, max_workers: Optional[int] = None, queue_size: int = 8,
+                 embed_batch_size: int = 64, pdf_pages_per_task: int = 20):
+        self.chroma_service = chroma_service
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.embed_batch_size = embed_batch_size
+        self.pdf_pages_per_task = pdf_pages_per_task
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """Create the extraction pool on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                if _eventlet_patched():
+                    # ProcessPoolExecutor deadlocks once its threads and locks are
+                    # green; this pool drives its worker processes from greenthreads
+                    from app.services.green_process_pool import GreenProcessPool
+                    self._executor = GreenProcessPool(max_workers=self.max_workers)
+                    logger.info(f"Started ingestion process pool with {self.max_workers} workers (eventlet)")
+                else:
+                    # Spawn rather than fork so workers don't inherit gRPC or Chroma threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    logger.info(f"Started ingestion process pool with {self.max_workers} workers")
+            return self._executor
+
+    def shutdown(self):
+        """Shut down the extraction process pool."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def fingerprint(self, file_path: str, document_processor) -> str:
+        """Fingerprint a file's contents together with the chunking settings."""
+        return (
+            f"{compute_file_hash(file_path)}:"
+            f"{document_processor.chunk_size}:{document_processor.chunk_overlap}"
+        )
+
+    def ingest_files(self, file_paths: List[str], document_processor,
+                     extra_metadata: Optional[Dict[str, Any]] = None,
+                     progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                     ) -> List[Dict[str, Any]]:
+        """
+        Ingest many files concurrently.
+        Returns one result per input path, in order. Unchanged files are skipped.
+        """
+        total = len(file_paths)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        if not file_paths:
+            return []
+
+        extract_queue = queue.Queue(maxsize=self.queue_size)
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        store_queue = queue.Queue(maxsize=self.queue_size)
+
+        stages = [
+            threading.Thread(
+                target=self._extract_stage,
+                args=(file_paths, document_processor, extract_queue),
+                name="ingest-extract",
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._chunk_stage,
+                args=(document_processor, extra_metadata, extract_queue, embed_queue),
+                name="ingest-chunk",
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._embed_stage,
+                args=(embed_queue, store_queue),
+                name="ingest-embed",
+                daemon=True
+            )
+        ]
+        for stage in stages:
+            stage.start()
+
+        # Store stage runs on the calling thread
+        completed = 0
+        while True:
+            item = store_queue.get()
+            if item is _END:
+                break
+
+            result = self._store_item(item)
+            results[item['index']] = result
+            completed += 1
+
+            if progress_callback:
+                try:
+                    progress_callback(completed, total, result)
+                except Exception as e:
+                    logger.warning(f"Ingestion progress callback failed: {str(e)}")
+
+        for stage in stages:
+            stage.join()
+
+        return results
+
+    def _extract_stage(self, file_paths: List[str], document_processor, out_queue: queue.Queue):
+        """Fingerprint each file and submit its text extraction to the process pool."""
+        try:
+            for index, file_path in enumerate(file_paths):
+                item = {
+                    'index': index,
+                    'file_path': file_path,
+                    'source': os.path.basename(file_path)
+                }
+
+                try:
+                    item['file_hash'] = self.fingerprint(file_path, document_processor)
+
+                    if self.chroma_service.is_document_current(item['source'], item['file_hash']):
+                        item['unchanged'] = True
+                    else:
+                        item['futures'] = self._submit_extraction(file_path)
+                except Exception as e:
+                    logger.error(f"Error scheduling extraction for {file_path}: {str(e)}")
+                    item['error'] = str(e)
+
+                # Blocks while downstream stages are saturated
+                out_queue.put(item)
+        finally:
+            out_queue.put(_END)
+
+    def _submit_extraction(self, file_path: str) -> list:
+        """Submit extraction tasks for a file, one per PDF page range."""
+        executor = self._get_executor()
+
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            page_count = get_pdf_page_count(file_path)
+            return [
+                executor.submit(extract_pdf_pages, file_path, start, min(start + self.pdf_pages_per_task, page_count))
+                for start in range(0, page_count, self.pdf_pages_per_task)
+            ]
+
+        return [executor.submit(extract_document_text, file_path)]
+
+    def _chunk_stage(self, document_processor, extra_metadata: Optional[Dict[str, Any]],
+                     in_queue: queue.Queue, out_queue: queue.Queue):
+        """Collect extracted text, chunk it and plan which chunks need storing."""
+        try:
+            while True:
+                item = in_queue.get()
+                if item is _END:
+                    break
+
+                if 'futures' in item:
+                    try:
+                        text = "".join(future.result() for future in item.pop('futures')).strip()
+
+                        if not text:
+                            logger.warning(f"No text extracted from {item['file_path']}")
+                        else:
+                            chunks = document_processor.build_chunks(item['file_path'], text)
+                            item['plan'] = self.chroma_service.plan_document_sync(
+                                item['source'],
+                                [chunk['content'] for chunk in chunks],
+                                [{**chunk['metadata'], **(extra_metadata or {})} for chunk in chunks]
+                            )
+                    except Exception as e:
+                        logger.error(f"Error chunking {item['file_path']}: {str(e)}")
+                        item['error'] = str(e)
+
+                out_queue.put(item)
+        finally:
+            out_queue.put(_END)
+
+    def _embed_stage(self, in_queue: queue.Queue, out_queue: queue.Queue):
+        """Embed new chunks in batches."""
+        try:
+            while True:
+                item = in_queue.get()
+                if item is _END:
+                    break
+
+                plan = item.get('plan')
+                if plan and not item.get('error'):
+                    try:
+                        documents = plan['new_documents']
+                        embeddings = []
+                        for start in range(0, len(documents), self.embed_batch_size):
+                            embeddings.extend(
+                                self.chroma_service.embed_documents(documents[start:start + self.embed_batch_size])
+                            )
+                        item['embeddings'] = embeddings
+                    except Exception as e:
+                        logger.error(f"Error embedding {item['file_path']}: {str(e)}")
+                        item['error'] = str(e)
+
+                out_queue.put(item)
+        finally:
+            out_queue.put(_END)
+
+    def _store_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Write a processed file to the vector database and build its result."""
+        source = item['source']
+
+        if item.get('error'):
+            return {'source': source, 'error': item['error']}
+
+        if item.get('unchanged'):
+            entry = self.chroma_service.get_document_manifest(source)
+            chunk_count = len(entry['chunk_ids']) if entry else 0
+            logger.info(f"Skipping ingestion of unchanged document {source}")
+            return {
+                'source': source,
+                'unchanged': True,
+                'chunks_total': chunk_count,
+                'chunks_added': 0,
+                'chunks_unchanged': chunk_count,
+                'chunks_removed': 0
+            }
+
+        if not item.get('plan'):
+            return {
+                'source': source,
+                'unchanged': False,
+                'chunks_total': 0,
+                'chunks_added': 0,
+                'chunks_unchanged': 0,
+                'chunks_removed': 0
+            }
+
+        try:
+            result = self.chroma_service.apply_document_sync(item['plan'], item['file_hash'], item.get('embeddings'))
+            result.pop('ids', None)
+            return {'source': source, 'unchanged': False, **result}
+        except Exception as e:
+            logger.error(f"Error storing {source}: {str(e)}")
+            return {'source': source, 'error': str(e)}
+
+# Singleton instance
+_ingestion_pipeline_instance = None
+
+def get_ingestion_pipeline_instance(chroma_service=None) -> IngestionPipeline:
+    """Get the singleton IngestionPipeline instance."""
+    global _ingestion_pipeline_instance
+    if _ingestion_pipeline_instance is None:
+        if chroma_service is None:
+            chroma_service = get_chroma_service_instance()
+        _ingestion_pipeline_instance = IngestionPipeline(
+            chroma_service,
+            max_workers=Config.INGESTION_WORKERS,
+            queue_size=Config.INGESTION_QUEUE_SIZE,
+            embed_batch_size=Config.INGESTION_EMBED_BATCH_SIZE,
+            pdf_pages_per_task=Config.PDF_PAGES_PER_TASK
+        )
+    return _ingestion_pipeline_instance
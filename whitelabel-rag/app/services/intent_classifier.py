@@ -0,0 +1,137 @@
+"""
+Local intent classifier used ahead of the LLM classification call
+"""
+
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+VALID_INTENTS = ['simple_query', 'document_search', 'task_request', 'clarification', 'feedback', 'meta']
+
+SEED_EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources', 'intent_examples.jsonl')
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+def _features(text: str) -> List[str]:
+    """Lowercased word unigrams and bigrams."""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def load_examples(path: str) -> List[Dict[str, str]]:
+    """Load labelled examples from a JSON Lines file of {"text", "intent"} records."""
+    examples = []
+    if not os.path.exists(path):
+        return examples
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('intent') in VALID_INTENTS and record.get('text'):
+                examples.append({'text': record['text'], 'intent': record['intent']})
+    return examples
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams.
+    Trained on bundled seed examples plus classifications logged from the LLM path,
+    and updated online as new LLM classifications arrive.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, max_logged_examples: int = 5000):
+        self.log_path = log_path
+        self.max_logged_examples = max_logged_examples
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._doc_counts: Dict[str, int] = defaultdict(int)
+        self._feature_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._feature_totals: Dict[str, int] = defaultdict(int)
+        self._vocabulary = set()
+        self._total_docs = 0
+
+    def train(self, examples: List[Dict[str, str]]):
+        """Retrain from scratch on the given examples."""
+        with self._lock:
+            self._reset()
+            for example in examples:
+                self._add(example['text'], example['intent'])
+        logger.info(f"Intent classifier trained on {len(examples)} examples")
+
+    def _add(self, text: str, intent: str):
+        self._doc_counts[intent] += 1
+        self._total_docs += 1
+        for feature in _features(text):
+            self._feature_counts[intent][feature] += 1
+            self._feature_totals[intent] += 1
+            self._vocabulary.add(feature)
+
+    def learn(self, text: str, intent: str):
+        """Add a labelled example to the model and the training log."""
+        if intent not in VALID_INTENTS:
+            return
+
+        with self._lock:
+            self._add(text, intent)
+
+            if self.log_path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps({'text': text, 'intent': intent}) + "\n")
+                except Exception as e:
+                    logger.warning(f"Could not log intent classification: {str(e)}")
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return the most likely intent and its posterior probability."""
+        with self._lock:
+            if not self._total_docs:
+                return 'simple_query', 0.0
+
+            features = [f for f in _features(text) if f in self._vocabulary]
+            if not features:
+                return 'simple_query', 0.0
+
+            vocab_size = len(self._vocabulary)
+            scores = {}
+            for intent, doc_count in self._doc_counts.items():
+                counts = self._feature_counts[intent]
+                denominator = self._feature_totals[intent] + vocab_size
+                score = math.log(doc_count / self._total_docs)
+                for feature in features:
+                    score += math.log((counts.get(feature, 0) + 1) / denominator)
+                scores[intent] = score
+
+        best_intent = max(scores, key=scores.get)
+        best_score = scores[best_intent]
+        normalizer = sum(math.exp(score - best_score) for score in scores.values())
+        return best_intent, 1.0 / normalizer
+
+# Singleton instance
+_intent_classifier_instance = None
+
+def get_intent_classifier_instance() -> IntentClassifier:
+    """Get the singleton IntentClassifier instance, trained on seed and logged examples."""
+    global _intent_classifier_instance
+    if _intent_classifier_instance is None:
+        classifier = IntentClassifier(log_path=Config.INTENT_LOG_PATH)
+        examples = load_examples(SEED_EXAMPLES_PATH)
+        examples.extend(load_examples(Config.INTENT_LOG_PATH)[-classifier.max_logged_examples:])
+        classifier.train(examples)
+        _intent_classifier_instance = classifier
+    return _intent_classifier_instance
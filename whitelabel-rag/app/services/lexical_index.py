@@ -0,0 +1,161 @@
+"""
+BM25 lexical index over document chunks, backed by SQLite FTS5
+"""
+
+import os
+import re
+import json
+import logging
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Very common words match most chunks and only slow down the OR query
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from had has have how i in is it its me my of on or
+our so that the their them there these this to was we were what when where which who why will
+with you your
+""".split())
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 ranking for exact-term retrieval (identifiers, error codes,
+    part numbers) that embeddings tend to miss. Kept in step with the documents collection.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+        """)
+        # External-content FTS table: the text is stored once, in chunks
+        self._conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content,
+                content='chunks',
+                content_rowid='rowid',
+                tokenize="unicode61 tokenchars '_'"
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def build_match_query(query: str) -> Optional[str]:
+        """Turn free text into an FTS5 OR query of quoted terms."""
+        tokens = list(dict.fromkeys(token.lower() for token in _TOKEN_PATTERN.findall(query)))
+        terms = [token for token in tokens if token not in _STOPWORDS] or tokens
+        if not terms:
+            return None
+        return " OR ".join(f'"{term}"' for term in terms)
+
+    def add(self, ids: List[str], contents: List[str], metadatas: List[Dict[str, Any]]):
+        """Index chunks; chunks already present only have their metadata refreshed."""
+        with self._lock:
+            for doc_id, content, metadata in zip(ids, contents, metadatas):
+                metadata_json = json.dumps(metadata or {})
+                row = self._conn.execute("SELECT rowid FROM chunks WHERE doc_id = ?", (doc_id,)).fetchone()
+                if row:
+                    # Chunk IDs are content-addressed, so the text is unchanged
+                    self._conn.execute("UPDATE chunks SET metadata = ? WHERE rowid = ?", (metadata_json, row[0]))
+                    continue
+
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (doc_id, content, metadata) VALUES (?, ?, ?)",
+                    (doc_id, content, metadata_json)
+                )
+                self._conn.execute(
+                    "INSERT INTO chunks_fts (rowid, content) VALUES (?, ?)",
+                    (cursor.lastrowid, content)
+                )
+            self._conn.commit()
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Replace the stored metadata of indexed chunks."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE doc_id = ?",
+                [(json.dumps(metadata or {}), doc_id) for doc_id, metadata in zip(ids, metadatas)]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List[str]):
+        """Remove chunks from the index."""
+        with self._lock:
+            for doc_id in ids:
+                row = self._conn.execute(
+                    "SELECT rowid, content FROM chunks WHERE doc_id = ?",
+                    (doc_id,)
+                ).fetchone()
+                if not row:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', ?, ?)",
+                    (row[0], row[1])
+                )
+                self._conn.execute("DELETE FROM chunks WHERE rowid = ?", (row[0],))
+            self._conn.commit()
+
+    def search(self, query: str, n_results: int = 3) -> Dict[str, Any]:
+        """
+        Return the best BM25 matches, shaped like a Chroma query result.
+        'distances' holds FTS5 BM25 ranks, which are negative; lower is better.
+        """
+        results = {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        match_query = self.build_match_query(query)
+        if not match_query:
+            return results
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.doc_id, c.content, c.metadata, chunks_fts.rank "
+                "FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY chunks_fts.rank LIMIT ?",
+                (match_query, n_results)
+            ).fetchall()
+
+        for doc_id, content, metadata_json, rank in rows:
+            results['ids'][0].append(doc_id)
+            results['documents'][0].append(content)
+            results['metadatas'][0].append(json.loads(metadata_json))
+            results['distances'][0].append(rank)
+        return results
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def clear(self):
+        """Remove all indexed chunks."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('delete-all')")
+            self._conn.commit()
+
+# Singleton instance
+_lexical_index_instance = None
+
+def get_lexical_index_instance(db_path: Optional[str] = None) -> LexicalIndex:
+    """Get the singleton LexicalIndex instance."""
+    global _lexical_index_instance
+    if _lexical_index_instance is None:
+        if db_path is None:
+            chroma_path = os.environ.get('CHROMA_DB_PATH', './chromadb_data')
+            db_path = os.environ.get('LEXICAL_INDEX_PATH', os.path.join(chroma_path, 'lexical_index.sqlite3'))
+        _lexical_index_instance = LexicalIndex(db_path)
+    return _lexical_index_instance
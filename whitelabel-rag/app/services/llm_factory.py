@@ -3,12 +3,29 @@ LLM Factory for creating and managing language model instances
 """
 
 import os
+import time
+import random
+import asyncio
 import logging
+import threading
 import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+
+from app.config import Config
+from app.services.response_cache import get_response_cache_instance
+from app.services.single_flight import get_single_flight_instance
+from app.services.llm_limiter import (
+    LLMBusyError,
+    get_llm_priority,
+    get_llm_rate_limiter_instance,
+    is_rate_limit_error
+)
 
 logger = logging.getLogger(__name__)
 
+# Returned instead of an API error when the rate limiter refuses a request
+BUSY_RESPONSE = "Error generating response: the assistant is busy right now, please try again in a moment."
+
 class LLMFactory:
     """Factory class for creating and managing LLM instances."""
     
@@ -16,6 +33,8 @@ class LLMFactory:
     _llm = None
     _available_models = None
     _model_assignments = {}
+    _models = {}
+    _models_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -40,7 +59,9 @@ class LLMFactory:
             raise ValueError(error_msg)
         
         try:
-            genai.configure(api_key=api_key)
+            # One client (and connection) is shared by every GenerativeModel created afterwards
+            genai.configure(api_key=api_key, transport=Config.GEMINI_TRANSPORT)
+            self._configure_connection_pool()
             
             # Get available models
             self._available_models = self._get_available_models()
@@ -50,7 +71,7 @@ class LLMFactory:
             
             # Set default LLM
             default_model = self._get_best_model_for_task('general')
-            self._llm = genai.GenerativeModel(default_model)
+            self._llm = self._get_model(default_model)
             logger.info(f"✅ Gemini API configured successfully with model: {default_model}")
             
         except Exception as e:
@@ -58,6 +79,33 @@ class LLMFactory:
             logger.error(error_msg)
             raise ValueError(error_msg)
     
+    def _configure_connection_pool(self):
+        """Size the HTTP connection pool and keep-alive of the shared Gemini client."""
+        if Config.GEMINI_TRANSPORT != 'rest':
+            # gRPC multiplexes all requests over one persistent HTTP/2 channel
+            return
+        
+        try:
+            import requests
+            from google.generativeai import client as genai_client
+            
+            session = getattr(getattr(genai_client.get_default_generative_client(), '_transport', None), '_session', None)
+            if session is None:
+                logger.debug("Gemini REST session not accessible; using default connection pool")
+                return
+            
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=Config.LLM_POOL_SIZE,
+                pool_maxsize=Config.LLM_POOL_SIZE
+            )
+            session.mount('https://', adapter)
+            session.headers['Connection'] = 'keep-alive'
+            session.headers['Keep-Alive'] = f"timeout={Config.LLM_KEEPALIVE_SECONDS}"
+            logger.info(f"Gemini REST connection pool configured with {Config.LLM_POOL_SIZE} connections")
+            
+        except Exception as e:
+            logger.warning(f"Could not configure Gemini connection pool: {str(e)}")
+    
     def _get_available_models(self) -> List[str]:
         """Fetch available Gemini models from the API."""
         try:
@@ -117,13 +165,25 @@ class LLMFactory:
         """Get the best available model for a specific task."""
         return self._model_assignments.get(task, self._available_models[0] if self._available_models else 'models/gemini-pro')
     
+    @classmethod
+    def _get_model(cls, model_name: str):
+        """Get the shared GenerativeModel for a model name, creating it on first use."""
+        model = cls._models.get(model_name)
+        if model is None:
+            with cls._models_lock:
+                model = cls._models.get(model_name)
+                if model is None:
+                    model = genai.GenerativeModel(model_name)
+                    cls._models[model_name] = model
+                    logger.info(f"Created GenerativeModel for {model_name}")
+        return model
+    
     @classmethod
     def get_llm(cls, task: str = 'general'):
         """Get the LLM instance for a specific task."""
         instance = cls()
         if task != 'general':
-            model_name = instance._get_best_model_for_task(task)
-            return genai.GenerativeModel(model_name)
+            return cls._get_model(instance._get_best_model_for_task(task))
         return instance._llm
     
     @classmethod
@@ -138,19 +198,148 @@ class LLMFactory:
         instance = cls()
         return instance._model_assignments.copy()
     
+    @staticmethod
+    def _build_prompt(prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Combine system prompt and user prompt if system prompt is provided."""
+        if system_prompt:
+            return f"System: {system_prompt}\n\nUser: {prompt}"
+        return prompt
+    
     @classmethod
     def generate_response(cls, prompt: str, system_prompt: Optional[str] = None, 
                          temperature: float = 0.2, max_tokens: int = 1024, 
-                         task: str = 'general') -> str:
-        """Generate response using the appropriate LLM for the task."""
+                         task: str = 'general',
+                         stream_callback: Optional[Callable[[str], None]] = None,
+                         use_cache: Optional[bool] = None,
+                         cache_key_text: Optional[str] = None) -> str:
+        """
+        Generate response using the appropriate LLM for the task.
+        If stream_callback is given, the response is streamed and each text chunk
+        is passed to the callback as it arrives; the full text is still returned.
+        Low-temperature requests are served from the response cache unless use_cache is False.
+        cache_key_text names the user's question inside the prompt; only calls that
+        give it can be answered by the cache's semantic tier.
+        """
+        cache, model_name = cls._get_cache(temperature, task, use_cache)
+        if cache is not None:
+            try:
+                cached = cache.get(prompt, system_prompt, temperature, max_tokens, model_name, cache_key_text)
+                if cached is not None:
+                    if stream_callback:
+                        stream_callback(cached)
+                    return cached
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed: {str(e)}")
+                cache = None
+        
+        def generate() -> str:
+            response_text, completed = cls._generate_uncached(prompt, system_prompt, temperature, max_tokens, task, stream_callback)
+            
+            if cache is not None and completed and response_text:
+                cache.put(prompt, system_prompt, temperature, max_tokens, model_name, response_text, cache_key_text)
+            
+            return response_text
+        
+        # Streamed responses are delivered chunk by chunk to one caller, so they are never shared
+        if stream_callback or not Config.LLM_COALESCE_ENABLED:
+            return generate()
+        return get_single_flight_instance('llm').do(
+            cls._coalesce_key(prompt, system_prompt, temperature, max_tokens, task),
+            generate
+        )
+    
+    @classmethod
+    async def generate_response_async(cls, prompt: str, system_prompt: Optional[str] = None,
+                                      temperature: float = 0.2, max_tokens: int = 1024,
+                                      task: str = 'general',
+                                      stream_callback: Optional[Callable[[str], None]] = None,
+                                      use_cache: Optional[bool] = None,
+                                      cache_key_text: Optional[str] = None) -> str:
+        """
+        Asyncio variant of generate_response using the Gemini async client.
+        The event loop is free while the request is in flight, so one thread can
+        serve many concurrent generations.
+        """
+        cache, model_name = cls._get_cache(temperature, task, use_cache)
+        if cache is not None:
+            try:
+                if cache.semantic_enabled and cache_key_text:
+                    # The semantic tier embeds the question over the network
+                    cached = await asyncio.to_thread(cache.get, prompt, system_prompt, temperature, max_tokens, model_name, cache_key_text)
+                else:
+                    cached = cache.get(prompt, system_prompt, temperature, max_tokens, model_name)
+                if cached is not None:
+                    if stream_callback:
+                        stream_callback(cached)
+                    return cached
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed: {str(e)}")
+                cache = None
+        
+        async def generate() -> str:
+            response_text, completed = await cls._generate_uncached_async(prompt, system_prompt, temperature, max_tokens, task, stream_callback)
+            
+            if cache is not None and completed and response_text:
+                if cache.semantic_enabled and cache_key_text:
+                    await asyncio.to_thread(cache.put, prompt, system_prompt, temperature, max_tokens, model_name, response_text, cache_key_text)
+                else:
+                    cache.put(prompt, system_prompt, temperature, max_tokens, model_name, response_text)
+            
+            return response_text
+        
+        if stream_callback or not Config.LLM_COALESCE_ENABLED:
+            return await generate()
+        return await get_single_flight_instance('llm').do_async(
+            cls._coalesce_key(prompt, system_prompt, temperature, max_tokens, task),
+            generate
+        )
+    
+    @classmethod
+    def _coalesce_key(cls, prompt: str, system_prompt: Optional[str], temperature: float,
+                      max_tokens: int, task: str) -> tuple:
+        """Key under which identical in-flight generations are shared."""
+        return (cls()._get_best_model_for_task(task), prompt, system_prompt, temperature, max_tokens)
+    
+    @classmethod
+    def _get_cache(cls, temperature: float, task: str, use_cache: Optional[bool]):
+        """Return the response cache and the model name used in its keys, or (None, None)."""
+        if use_cache is None:
+            use_cache = Config.RESPONSE_CACHE_ENABLED and temperature <= Config.RESPONSE_CACHE_MAX_TEMPERATURE
+        if not use_cache:
+            return None, None
+        
+        try:
+            return get_response_cache_instance(), cls()._get_best_model_for_task(task)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {str(e)}")
+            return None, None
+    
+    @classmethod
+    def _generate_uncached(cls, prompt: str, system_prompt: Optional[str], temperature: float,
+                           max_tokens: int, task: str,
+                           stream_callback: Optional[Callable[[str], None]]) -> Tuple[str, bool]:
+        """
+        Call the model for a response, streaming it if a callback is given.
+        Returns the text and whether the call completed; failed calls return error text.
+        """
+        if stream_callback:
+            parts = []
+            try:
+                for text in cls._stream_chunks(prompt, system_prompt, temperature, max_tokens, task):
+                    parts.append(text)
+                    stream_callback(text)
+                return "".join(parts), True
+            except Exception as e:
+                # Partial text plus the error is shown, but must never be cached
+                error_text = cls._error_text(e)
+                parts.append(error_text)
+                stream_callback(error_text)
+                return "".join(parts), False
+        
         try:
             llm = cls.get_llm(task)
             
-            # Combine system prompt and user prompt if system prompt is provided
-            if system_prompt:
-                full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-            else:
-                full_prompt = prompt
+            full_prompt = cls._build_prompt(prompt, system_prompt)
             
             # Configure generation parameters
             generation_config = genai.types.GenerationConfig(
@@ -158,16 +347,183 @@ class LLMFactory:
                 max_output_tokens=max_tokens,
             )
             
-            response = llm.generate_content(
+            response = cls._send(task, lambda: llm.generate_content(
                 full_prompt,
                 generation_config=generation_config
+            ))
+            
+            return response.text, True
+            
+        except Exception as e:
+            return cls._error_text(e), False
+    
+    @staticmethod
+    def _error_text(error: Exception) -> str:
+        """Log a failed model call and return the text shown in its place."""
+        # Quota errors can also surface mid-stream, outside the retrying send
+        if isinstance(error, LLMBusyError) or is_rate_limit_error(error):
+            logger.warning(f"LLM request refused: {str(error)}")
+            return BUSY_RESPONSE
+        logger.error(f"Error generating response: {str(error)}")
+        return f"Error generating response: {str(error)}"
+    
+    @classmethod
+    async def _generate_uncached_async(cls, prompt: str, system_prompt: Optional[str], temperature: float,
+                                       max_tokens: int, task: str,
+                                       stream_callback: Optional[Callable[[str], None]]) -> Tuple[str, bool]:
+        """Asyncio variant of _generate_uncached."""
+        try:
+            llm = cls.get_llm(task)
+            
+            full_prompt = cls._build_prompt(prompt, system_prompt)
+            
+            generation_config = genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
             )
             
-            return response.text
+            if not stream_callback:
+                response = await cls._send_async(task, lambda: llm.generate_content_async(
+                    full_prompt,
+                    generation_config=generation_config
+                ))
+                return response.text, True
             
+            parts = []
+            response = await cls._send_async(task, lambda: llm.generate_content_async(
+                full_prompt,
+                generation_config=generation_config,
+                stream=True
+            ))
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. safety metadata) raise on .text
+                    continue
+                if text:
+                    parts.append(text)
+                    stream_callback(text)
+            return "".join(parts), True
+            
+        except Exception as e:
+            error_text = cls._error_text(e)
+            if stream_callback:
+                stream_callback(error_text)
+            return error_text, False
+    
+    @classmethod
+    def _get_limiter(cls, task: str):
+        """Rate limiter for the task's model, or None when rate limiting is disabled."""
+        if not Config.LLM_RATE_LIMIT_ENABLED:
+            return None
+        return get_llm_rate_limiter_instance().for_model(cls()._get_best_model_for_task(task))
+    
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        """Exponential backoff with jitter so refused callers don't retry in lockstep."""
+        delay = min(Config.LLM_RETRY_MAX_SECONDS, Config.LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+    
+    @classmethod
+    def _send(cls, task: str, request: Callable[[], Any]) -> Any:
+        """
+        Send a model request once the rate limiter admits it, retrying with backoff
+        when the API reports a rate limit. A refusal pauses the model's limiter, so
+        every queued caller backs off rather than only this one.
+        """
+        limiter = cls._get_limiter(task)
+        priority = get_llm_priority()
+        
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            if limiter is not None:
+                limiter.acquire(priority)
+            try:
+                return request()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                if attempt >= Config.LLM_MAX_RETRIES:
+                    raise LLMBusyError(f"Gemini rate limit persisted after {Config.LLM_MAX_RETRIES} retries: {str(e)}") from e
+                delay = cls._backoff_delay(attempt)
+                logger.warning(f"Gemini rate limit hit, retrying in {delay:.1f}s (attempt {attempt + 1}): {str(e)}")
+                if limiter is not None:
+                    limiter.on_rate_limited(delay)
+                    limiter.on_retry()
+                else:
+                    time.sleep(delay)
+    
+    @classmethod
+    async def _send_async(cls, task: str, request: Callable[[], Any]) -> Any:
+        """Asyncio variant of _send; request returns an awaitable."""
+        limiter = cls._get_limiter(task)
+        priority = get_llm_priority()
+        
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            if limiter is not None:
+                await limiter.acquire_async(priority)
+            try:
+                return await request()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                if attempt >= Config.LLM_MAX_RETRIES:
+                    raise LLMBusyError(f"Gemini rate limit persisted after {Config.LLM_MAX_RETRIES} retries: {str(e)}") from e
+                delay = cls._backoff_delay(attempt)
+                logger.warning(f"Gemini rate limit hit, retrying in {delay:.1f}s (attempt {attempt + 1}): {str(e)}")
+                if limiter is not None:
+                    limiter.on_rate_limited(delay)
+                    limiter.on_retry()
+                else:
+                    await asyncio.sleep(delay)
+    
+    @classmethod
+    def get_rate_limiter_stats(cls) -> Dict[str, Any]:
+        """Get LLM rate limiter queue and wait statistics."""
+        return get_llm_rate_limiter_instance().get_stats()
+    
+    @classmethod
+    def get_response_cache_stats(cls) -> Dict[str, Any]:
+        """Get LLM response cache statistics."""
+        return get_response_cache_instance().get_stats()
+    
+    @classmethod
+    def generate_stream(cls, prompt: str, system_prompt: Optional[str] = None,
+                        temperature: float = 0.2, max_tokens: int = 1024,
+                        task: str = 'general') -> Iterator[str]:
+        """Generate a response incrementally, yielding partial text as it arrives."""
+        try:
+            yield from cls._stream_chunks(prompt, system_prompt, temperature, max_tokens, task)
         except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            return f"Error generating response: {str(e)}"
+            yield cls._error_text(e)
+    
+    @classmethod
+    def _stream_chunks(cls, prompt: str, system_prompt: Optional[str], temperature: float,
+                       max_tokens: int, task: str) -> Iterator[str]:
+        """Yield response text chunks; raises if the call fails, even partway through."""
+        llm = cls.get_llm(task)
+        
+        full_prompt = cls._build_prompt(prompt, system_prompt)
+        
+        generation_config = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+        
+        response = cls._send(task, lambda: llm.generate_content(
+            full_prompt,
+            generation_config=generation_config,
+            stream=True
+        ))
+        
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata) raise on .text
+                continue
+            if text:
+                yield text
     
     @classmethod
     def generate_structured_response(cls, prompt: str, context: str = "", 
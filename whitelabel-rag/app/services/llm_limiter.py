@@ -0,0 +1,347 @@
+"""
+Per-model rate limiting and backpressure for Gemini calls
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+# Priority of LLM calls made on this thread of execution
+_current_priority: contextvars.ContextVar = contextvars.ContextVar('llm_priority', default=PRIORITY_NORMAL)
+
+# How often queued asyncio callers re-check their place in line
+_ASYNC_POLL_SECONDS = 0.02
+# Queue wait samples kept per model for percentiles
+_WAIT_SAMPLES = 1000
+
+def get_llm_priority() -> int:
+    """Priority class of LLM calls made here."""
+    return _current_priority.get()
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run LLM calls made inside the block at the given priority class."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+class LLMBusyError(RuntimeError):
+    """Raised when a call cannot get a rate-limit slot within the queue bounds."""
+
+class LocalTokenBucket:
+    """Token bucket shared by the threads of this process."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """Grant no tokens for the given time and restart from an empty bucket."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+class RedisTokenBucket:
+    """Token bucket kept in Redis so every app process shares one budget per model."""
+
+    TAKE_SCRIPT = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'paused_until')
+    local paused_until = tonumber(state[3]) or 0
+    if now < paused_until then
+        return tostring(paused_until - now)
+    end
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+    return tostring(wait)
+    """
+
+    PAUSE_SCRIPT = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local paused_until = math.max(tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0, now + tonumber(ARGV[1]))
+    redis.call('HSET', KEYS[1], 'tokens', '0', 'updated', tostring(now), 'paused_until', tostring(paused_until))
+    redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[1])) + 60)
+    return 1
+    """
+
+    def __init__(self, client, key: str, rate_per_second: float, burst: int):
+        self.key = key
+        self.rate = rate_per_second
+        self.burst = burst
+        self._take = client.register_script(self.TAKE_SCRIPT)
+        self._pause = client.register_script(self.PAUSE_SCRIPT)
+
+    def take(self) -> float:
+        return float(self._take(keys=[self.key], args=[self.rate, self.burst]))
+
+    def pause(self, seconds: float):
+        self._pause(keys=[self.key], args=[seconds])
+
+class ModelRateLimiter:
+    """
+    Hands out a model's request budget to callers in priority order.
+    Callers queue in (priority, arrival) order and only the head of the queue may
+    take a token, so interactive calls overtake queued background ones. The queue
+    is bounded in length and wait time; callers beyond either bound are refused.
+    """
+
+    def __init__(self, model_name: str, bucket, max_queue: int = 100, max_wait_seconds: float = 30):
+        self.model_name = model_name
+        self.bucket = bucket
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self.acquired = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self._wait_ms: Dict[int, List[float]] = {priority: [] for priority in PRIORITY_NAMES}
+
+        # Heap of (priority, sequence) for callers waiting for a token
+        self._waiters: List = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _enqueue(self, priority: int):
+        with self._condition:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise LLMBusyError(f"LLM queue for {self.model_name} is full ({self.max_queue} waiting)")
+            waiter = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, waiter)
+            return waiter
+
+    def _try_take(self, waiter) -> float:
+        """Take a token if the waiter is first in line; must hold the condition."""
+        if self._waiters[0] != waiter:
+            return -1.0
+        try:
+            wait = self.bucket.take()
+        except Exception as e:
+            # A shared budget that cannot be reached must not stop all LLM traffic
+            logger.warning(f"Rate limit bucket for {self.model_name} unavailable: {str(e)}")
+            wait = 0.0
+        if wait <= 0:
+            heapq.heappop(self._waiters)
+            self._condition.notify_all()
+        return wait
+
+    def _leave(self, waiter, rejected: bool = True):
+        """Drop a waiter that gave up; must hold the condition."""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            self._condition.notify_all()
+        if rejected:
+            self.rejected += 1
+
+    def _record_wait(self, priority: int, started: float) -> float:
+        waited = (time.monotonic() - started) * 1000
+        samples = self._wait_ms[priority]
+        samples.append(waited)
+        if len(samples) > _WAIT_SAMPLES:
+            del samples[:len(samples) - _WAIT_SAMPLES]
+        self.acquired += 1
+        return waited
+
+    def acquire(self, priority: int = PRIORITY_NORMAL) -> float:
+        """Block until a request may be sent; returns the queue wait in milliseconds."""
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+        waiter = self._enqueue(priority)
+
+        with self._condition:
+            while True:
+                wait = self._try_take(waiter)
+                if wait == 0:
+                    return self._record_wait(priority, started)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._leave(waiter)
+                    raise LLMBusyError(f"Timed out after {self.max_wait_seconds}s waiting for {self.model_name} capacity")
+                # Not first in line: sleep until the head changes
+                self._condition.wait(min(wait, remaining) if wait > 0 else remaining)
+
+    async def acquire_async(self, priority: int = PRIORITY_NORMAL) -> float:
+        """Asyncio variant of acquire that never blocks the event loop."""
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+        waiter = self._enqueue(priority)
+
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(waiter)
+                    if wait == 0:
+                        return self._record_wait(priority, started)
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._leave(waiter)
+                        raise LLMBusyError(f"Timed out after {self.max_wait_seconds}s waiting for {self.model_name} capacity")
+                await asyncio.sleep(min(wait, remaining) if wait > 0 else min(_ASYNC_POLL_SECONDS, remaining))
+        except asyncio.CancelledError:
+            # A cancelled caller must not hold its place at the head of the queue
+            with self._condition:
+                self._leave(waiter, rejected=False)
+            raise
+
+    def on_rate_limited(self, backoff_seconds: float):
+        """Back every caller of this model off after the API refused a request."""
+        with self._condition:
+            self.rate_limited += 1
+            try:
+                self.bucket.pause(backoff_seconds)
+            except Exception as e:
+                logger.warning(f"Could not pause rate limit bucket for {self.model_name}: {str(e)}")
+
+    def on_retry(self):
+        with self._condition:
+            self.retries += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            queue_wait_ms = {}
+            for priority, samples in self._wait_ms.items():
+                ordered = sorted(samples)
+                queue_wait_ms[PRIORITY_NAMES[priority]] = {
+                    'count': len(ordered),
+                    'p50': round(ordered[len(ordered) // 2], 1) if ordered else 0.0,
+                    'p95': round(ordered[int(len(ordered) * 0.95)], 1) if ordered else 0.0,
+                    'max': round(ordered[-1], 1) if ordered else 0.0
+                }
+            return {
+                'requests_per_minute': round(self.bucket.rate * 60, 1),
+                'burst': self.bucket.burst,
+                'queued': len(self._waiters),
+                'acquired': self.acquired,
+                'rejected': self.rejected,
+                'rate_limited': self.rate_limited,
+                'retries': self.retries,
+                'queue_wait_ms': queue_wait_ms
+            }
+
+class LLMRateLimiter:
+    """Creates and holds one ModelRateLimiter per Gemini model."""
+
+    def __init__(self, requests_per_minute: float = 60, burst: int = 10, max_queue: int = 100,
+                 max_wait_seconds: float = 30, redis_client=None):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.redis_client = redis_client
+
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model_name: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model_name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(model_name)
+                if limiter is None:
+                    rate = self.requests_per_minute / 60
+                    if self.redis_client is not None:
+                        bucket = RedisTokenBucket(self.redis_client, f"llm_rate_limit:{model_name}", rate, self.burst)
+                    else:
+                        bucket = LocalTokenBucket(rate, self.burst)
+                    limiter = ModelRateLimiter(model_name, bucket, self.max_queue, self.max_wait_seconds)
+                    self._limiters[model_name] = limiter
+        return limiter
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            'backend': 'redis' if self.redis_client is not None else 'local',
+            'models': {name: limiter.get_stats() for name, limiter in limiters.items()}
+        }
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an API error means the model's quota or rate limit was hit."""
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'resource exhausted' in message or 'rate limit' in message or 'quota' in message
+
+# Singleton instance
+_llm_rate_limiter_instance = None
+_llm_rate_limiter_lock = threading.Lock()
+
+def get_llm_rate_limiter_instance() -> LLMRateLimiter:
+    """Get the singleton LLMRateLimiter for the configured LLM_RATE_LIMIT_BACKEND."""
+    global _llm_rate_limiter_instance
+    if _llm_rate_limiter_instance is None:
+        with _llm_rate_limiter_lock:
+            if _llm_rate_limiter_instance is None:
+                redis_client = None
+                if Config.LLM_RATE_LIMIT_BACKEND == 'redis':
+                    try:
+                        import redis
+                        redis_client = redis.Redis.from_url(Config.REDIS_URL)
+                        redis_client.ping()
+                        logger.info(f"Using Redis LLM rate limiter at {Config.REDIS_URL}")
+                    except Exception as e:
+                        logger.warning(f"Redis unavailable, falling back to in-process LLM rate limiter: {str(e)}")
+                        redis_client = None
+
+                _llm_rate_limiter_instance = LLMRateLimiter(
+                    requests_per_minute=Config.LLM_REQUESTS_PER_MINUTE,
+                    burst=Config.LLM_BURST,
+                    max_queue=Config.LLM_MAX_QUEUE,
+                    max_wait_seconds=Config.LLM_MAX_QUEUE_WAIT_SECONDS,
+                    redis_client=redis_client
+                )
+    return _llm_rate_limiter_instance
@@ -2,14 +2,51 @@
 RAG Manager for orchestrating retrieval-augmented generation workflows
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+from app.config import Config
 from app.services.chroma_service import get_chroma_service_instance
 from app.services.llm_factory import LLMFactory
 from app.services.internet_search_agent import get_internet_search_agent_instance
+from app.services.ingestion_pipeline import get_ingestion_pipeline_instance
+from app.services.reranker import get_reranker_instance
+from app.services.context_packer import get_context_packer_instance
+from app.services.async_retrieval import get_async_retrieval_instance
 
 logger = logging.getLogger(__name__)
 
+# System prompts shared by the synchronous and asyncio workflows
+BASIC_ANSWER_SYSTEM_PROMPT = """
+            You are a helpful assistant that answers questions based on the provided context.
+            Use only the information from the context to answer the question.
+            If the context doesn't contain enough information, say so clearly.
+            Always cite your sources when possible.
+            """
+
+ADVANCED_ANSWER_SYSTEM_PROMPT = """
+            You are an expert assistant that provides comprehensive answers based on provided context.
+            Analyze the context carefully and provide a detailed, well-structured response.
+            Include relevant details and cite sources when appropriate.
+            """
+
+QUERY_EXPANSION_SYSTEM_PROMPT = """
+            Expand the following query to include related terms and synonyms that would help find relevant documents.
+            Keep the expansion concise and focused. Return only the expanded query.
+            """
+
+STRUCTURED_ANSWER_SYSTEM_PROMPT = """
+            Generate a comprehensive, well-structured response using the provided contexts.
+            Organize the information logically and provide a complete answer to the question.
+            """
+
+REFINE_SYSTEM_PROMPT = """
+            The following response may need improvement. Please refine it to be more comprehensive and helpful.
+            Maintain accuracy and add more detail if possible.
+            """
+
 class RAGManager:
     """Manager for RAG workflows and document processing."""
     
@@ -26,6 +63,11 @@ class RAGManager:
             self.chroma_service = None
             self.llm = LLMFactory.get_llm()
             self.internet_search_agent = None
+            # Shared pool for concurrent LLM and retrieval calls within a workflow
+            self.executor = ThreadPoolExecutor(
+                max_workers=Config.RETRIEVAL_WORKERS,
+                thread_name_prefix="rag-retrieval"
+            )
             # Ensure logger is available
             global logger
             if logger is None: # Should be already configured if module level
@@ -61,9 +103,54 @@ class RAGManager:
             
         return self.chroma_service.store_document(content, metadata)
     
+    def store_document_chunks(self, contents: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """Store a batch of document chunks in the vector database."""
+        if not self.chroma_service:
+            logger.info("RAGManager.store_document_chunks: chroma_service not initialized. Attempting to initialize.")
+            self.initialize_services()
+        
+        if not self.chroma_service:
+            logger.error("RAGManager.store_document_chunks: ChromaDB service is not available after initialization attempt.")
+            raise RuntimeError("ChromaDB service not available for storing document chunks.")
+            
+        return self.chroma_service.store_documents(contents, metadatas)
+    
+    def ingest_document(self, file_path: str, document_processor,
+                        extra_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Extract, chunk and store a file in the vector database.
+        Unchanged files are skipped entirely; changed files only embed new chunks.
+        """
+        return self.ingest_documents([file_path], document_processor, extra_metadata)[0]
+    
+    def ingest_documents(self, file_paths: List[str], document_processor,
+                         extra_metadata: Optional[Dict[str, Any]] = None,
+                         progress_callback=None) -> List[Dict[str, Any]]:
+        """Ingest many files through the parallel ingestion pipeline."""
+        if not self.chroma_service:
+            logger.info("RAGManager.ingest_documents: chroma_service not initialized. Attempting to initialize.")
+            self.initialize_services()
+        
+        if not self.chroma_service:
+            logger.error("RAGManager.ingest_documents: ChromaDB service is not available after initialization attempt.")
+            raise RuntimeError("ChromaDB service not available for ingesting documents.")
+        
+        pipeline = get_ingestion_pipeline_instance(self.chroma_service)
+        results = pipeline.ingest_files(file_paths, document_processor, extra_metadata, progress_callback)
+        
+        # Preserve the single-file contract of raising on failure
+        if len(results) == 1 and results[0].get('error'):
+            raise RuntimeError(results[0]['error'])
+        
+        return results
+    
     def query_documents(self, query: str, n_results: int = 3, 
-                       workflow_type: str = "basic", force_internet_search: bool = False) -> Dict[str, Any]:
-        """Query documents using specified RAG workflow."""
+                       workflow_type: str = "basic", force_internet_search: bool = False,
+                       stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Query documents using specified RAG workflow.
+        If stream_callback is given, the answer text is passed to it incrementally as it is generated.
+        """
         
         self.initialize_services() 
         
@@ -96,28 +183,18 @@ class RAGManager:
             }
         
         if workflow_type == "basic":
-            rag_response = self._basic_rag_workflow(query, n_results)
+            rag_response = self._basic_rag_workflow(query, n_results, stream_callback)
         elif workflow_type == "advanced":
-            rag_response = self._advanced_rag_workflow(query, n_results)
+            rag_response = self._advanced_rag_workflow(query, n_results, stream_callback)
         elif workflow_type == "recursive":
-            rag_response = self._recursive_rag_workflow(query, n_results)
+            rag_response = self._recursive_rag_workflow(query, n_results, stream_callback)
         elif workflow_type == "adaptive":
-            rag_response = self._adaptive_rag_workflow(query, n_results)
+            rag_response = self._adaptive_rag_workflow(query, n_results, stream_callback)
         else:
-            rag_response = self._basic_rag_workflow(query, n_results) # Default to basic
+            rag_response = self._basic_rag_workflow(query, n_results, stream_callback) # Default to basic
         
         # Determine if internet search fallback is needed
-        need_internet_search = force_internet_search
-        
-        if not force_internet_search: # Only evaluate if not already forced
-            if rag_response.get('error'):
-                need_internet_search = True
-            # Check if RAG response indicates no useful local results
-            elif not rag_response.get('context_used', False) and not rag_response.get('sources'):
-                need_internet_search = True
-            elif rag_response.get('text', '').strip().startswith("I couldn't find any relevant documents") or \
-                 rag_response.get('text', '').strip().startswith("Error processing query"):
-                need_internet_search = True
+        need_internet_search = self._needs_internet_search(rag_response, force_internet_search)
         
         internet_search_response = None
         if need_internet_search:
@@ -133,7 +210,52 @@ class RAGManager:
             'internet_search_response': internet_search_response
         }
     
-    def _basic_rag_workflow(self, query: str, top_k: int = 3) -> Dict[str, Any]:
+    @staticmethod
+    def _needs_internet_search(rag_response: Dict[str, Any], force_internet_search: bool) -> bool:
+        """Whether the RAG answer is missing or unusable, so an internet search should back it up."""
+        if force_internet_search:
+            return True
+        if rag_response.get('error'):
+            return True
+        # Check if RAG response indicates no useful local results
+        if not rag_response.get('context_used', False) and not rag_response.get('sources'):
+            return True
+        text = rag_response.get('text', '').strip()
+        return text.startswith("I couldn't find any relevant documents") or text.startswith("Error processing query")
+    
+    @staticmethod
+    def _results_from_query(retrieved_docs: Dict[str, Any]) -> List[Dict]:
+        """Flatten a single-query Chroma result into result dicts."""
+        return [
+            {'content': doc, 'metadata': meta, 'distance': dist}
+            for doc, meta, dist in zip(
+                retrieved_docs['documents'][0],
+                retrieved_docs['metadatas'][0],
+                retrieved_docs['distances'][0]
+            )
+        ]
+    
+    @staticmethod
+    def _no_documents_response(workflow: str) -> Dict[str, Any]:
+        return {
+            'text': "I couldn't find any relevant documents to answer your question.",
+            'sources': [],
+            'workflow': workflow,
+            'results': []
+        }
+    
+    @staticmethod
+    def _workflow_error_response(workflow: str, error: Exception) -> Dict[str, Any]:
+        return {
+            'text': f"Error processing query: {str(error)}",
+            'sources': [],
+            'workflow': workflow,
+            'results': [],
+            'error': True
+        }
+    
+    def _basic_rag_workflow(self, query: str, top_k: int = 3,
+                            stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Single-Stage RAG (Basic)
         Workflow: Query -> Retrieve -> Generate
@@ -141,68 +263,60 @@ class RAGManager:
         try:
             logger.info(f"Executing basic RAG workflow for query: {query}")
             
-            # Retrieve relevant documents
-            retrieved_docs = self.chroma_service.query_documents(query, top_k)
+            # Retrieve relevant documents, over-fetching when a reranker will pick the best
+            reranker = get_reranker_instance()
+            n_candidates = max(top_k, Config.RERANK_CANDIDATES) if reranker.scores_content else top_k
+            retrieved_docs = self.chroma_service.query_documents(query, n_candidates)
             
             if not retrieved_docs['documents'][0]:
-                return {
-                    'text': "I couldn't find any relevant documents to answer your question.",
-                    'sources': [],
-                    'workflow': 'basic',
-                    'results': []
-                }
+                return self._no_documents_response('basic')
             
-            # Format context from retrieved documents
-            documents = retrieved_docs['documents'][0]
-            metadatas = retrieved_docs['metadatas'][0]
-            distances = retrieved_docs['distances'][0]
+            top_results = self._results_from_query(retrieved_docs)
+            if reranker.scores_content:
+                top_results = self._rerank_results(top_results, query, top_k)
             
-            context = "\n\n".join(documents)
-            sources = [meta.get('source', 'Unknown') for meta in metadatas]
+            # Format context from retrieved documents within the token budget
+            packed = get_context_packer_instance().pack(top_results)
             
             # Generate response using LLM with context
-            system_prompt = """
-            You are a helpful assistant that answers questions based on the provided context.
-            Use only the information from the context to answer the question.
-            If the context doesn't contain enough information, say so clearly.
-            Always cite your sources when possible.
-            """
-            
             response_text = LLMFactory.generate_response(
-                prompt=f"Context:\n{context}\n\nQuestion: {query}",
-                system_prompt=system_prompt,
-                temperature=0.2
+                prompt=f"Context:\n{packed['context']}\n\nQuestion: {query}",
+                system_prompt=BASIC_ANSWER_SYSTEM_PROMPT,
+                temperature=0.2,
+                stream_callback=stream_callback,
+                cache_key_text=query
             )
             
-            # Format results for return
-            results = []
-            for i, (doc, meta, dist) in enumerate(zip(documents, metadatas, distances)):
-                results.append({
-                    'content': doc,
-                    'metadata': meta,
-                    'distance': dist,
-                    'rank': i + 1
-                })
-            
-            return {
-                'text': response_text,
-                'sources': list(set(sources)),  # Remove duplicates
-                'workflow': 'basic',
-                'results': results,
-                'context_used': True
-            }
+            return self._basic_response(response_text, packed)
             
         except Exception as e:
             logger.error(f"Error in basic RAG workflow: {str(e)}", exc_info=True)
-            return {
-                'text': f"Error processing query: {str(e)}",
-                'sources': [],
-                'workflow': 'basic',
-                'results': [],
-                'error': True
-            }
+            return self._workflow_error_response('basic', e)
     
-    def _advanced_rag_workflow(self, query: str, top_k: int = 5) -> Dict[str, Any]:
+    @staticmethod
+    def _basic_response(response_text: str, packed: Dict[str, Any]) -> Dict[str, Any]:
+        """Format a basic workflow answer with its ranked results."""
+        sources = [result['metadata'].get('source', 'Unknown') for result in packed['results']]
+        
+        results = []
+        for i, result in enumerate(packed['results']):
+            results.append({
+                'content': result['content'],
+                'metadata': result['metadata'],
+                'distance': result['distance'],
+                'rank': i + 1
+            })
+        
+        return {
+            'text': response_text,
+            'sources': list(set(sources)),  # Remove duplicates
+            'workflow': 'basic',
+            'results': results,
+            'context_used': True
+        }
+    
+    def _advanced_rag_workflow(self, query: str, top_k: int = 5,
+                               stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Multi-Stage RAG (Advanced)
         Workflow: Query → Query Processing → Retrieval → Filtering → Generation → Post-processing
@@ -210,67 +324,66 @@ class RAGManager:
         try:
             logger.info(f"Executing advanced RAG workflow for query: {query}")
             
-            # Query processing - expand query for better recall
-            expanded_query = self._expand_query(query)
-            
-            # Multi-strategy retrieval
-            semantic_results = self.chroma_service.query_documents(expanded_query, top_k)
-            keyword_results = self.chroma_service.query_documents(query, top_k)
+            # Query processing - expand query for better recall while the original
+            # query's vector and lexical retrieval run speculatively, all three at once
+            # Copy the context so pool work keeps the caller's status session and LLM priority
+            expansion_future = self.executor.submit(contextvars.copy_context().run, self._expand_query, query)
+            keyword_future = self.executor.submit(
+                contextvars.copy_context().run, self.chroma_service.lexical_search, query, top_k
+            )
+            result_sets = {'semantic': self.chroma_service.query_documents(query, top_k)}
+            result_sets['keyword'] = keyword_future.result()
+            expanded_query = expansion_future.result()
             
-            # Merge and rerank results
-            merged_results = self._merge_search_results(semantic_results, keyword_results)
-            reranked_results = self._rerank_results(merged_results, query)
+            if expanded_query and expanded_query != query:
+                result_sets['expanded'] = self.chroma_service.query_documents(expanded_query, top_k)
             
-            # Take top results after reranking
-            top_results = reranked_results[:3]
+            # Fuse results and keep the best few after reranking
+            merged_results = self._merge_search_results(result_sets)
+            top_results = self._rerank_results(merged_results, query, Config.RERANK_TOP_N)
             
             if not top_results:
-                return {
-                    'text': "I couldn't find any relevant documents to answer your question.",
-                    'sources': [],
-                    'workflow': 'advanced',
-                    'results': []
-                }
+                return self._no_documents_response('advanced')
             
-            # Format context from top results
-            context = "\n\n".join([result['content'] for result in top_results])
-            sources = [result['metadata'].get('source', 'Unknown') for result in top_results]
+            # Format context from top results within the token budget
+            packed = get_context_packer_instance().pack(top_results)
             
             # Generate response
-            system_prompt = """
-            You are an expert assistant that provides comprehensive answers based on provided context.
-            Analyze the context carefully and provide a detailed, well-structured response.
-            Include relevant details and cite sources when appropriate.
-            """
-            
             response_text = LLMFactory.generate_response(
-                prompt=f"Context:\n{context}\n\nQuestion: {query}",
-                system_prompt=system_prompt,
-                temperature=0.1
+                prompt=f"Context:\n{packed['context']}\n\nQuestion: {query}",
+                system_prompt=ADVANCED_ANSWER_SYSTEM_PROMPT,
+                temperature=0.1,
+                stream_callback=stream_callback,
+                cache_key_text=query
             )
             
-            # Post-process with citations
-            response_with_citations = self._add_citations(response_text, top_results)
-            
-            return {
-                'text': response_with_citations,
-                'sources': list(set(sources)),
-                'workflow': 'advanced',
-                'results': top_results,
-                'context_used': True
-            }
+            return self._advanced_response(response_text, packed, stream_callback)
             
         except Exception as e:
             logger.error(f"Error in advanced RAG workflow: {str(e)}", exc_info=True)
-            return {
-                'text': f"Error processing query: {str(e)}",
-                'sources': [],
-                'workflow': 'advanced',
-                'results': [],
-                'error': True
-            }
+            return self._workflow_error_response('advanced', e)
     
-    def _recursive_rag_workflow(self, query: str, top_k: int = 3) -> Dict[str, Any]:
+    def _advanced_response(self, response_text: str, packed: Dict[str, Any],
+                           stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Add citations to an advanced workflow answer, streaming the citation suffix."""
+        top_results = packed['results']
+        sources = [result['metadata'].get('source', 'Unknown') for result in top_results]
+        
+        # Post-process with citations
+        response_with_citations = self._add_citations(response_text, top_results)
+        if stream_callback and len(response_with_citations) > len(response_text):
+            stream_callback(response_with_citations[len(response_text):])
+        
+        return {
+            'text': response_with_citations,
+            'sources': list(set(sources)),
+            'workflow': 'advanced',
+            'results': top_results,
+            'context_used': True
+        }
+    
+    def _recursive_rag_workflow(self, query: str, top_k: int = 3,
+                                stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Recursive RAG
         Workflow: Query → Initial Retrieval → Response Planning → Targeted Retrieval → Generation
@@ -282,59 +395,59 @@ class RAGManager:
             initial_docs = self.chroma_service.query_documents(query, top_k)
             
             if not initial_docs['documents'][0]:
-                return self._basic_rag_workflow(query, top_k)
+                return self._basic_rag_workflow(query, top_k, stream_callback)
             
             # Plan response components
             initial_context = "\n\n".join(initial_docs['documents'][0])
             response_plan = self._plan_response(query, initial_context)
             
             # Targeted retrieval for each component
-            component_contexts = {}
-            all_results = []
+            components = response_plan.get('components', [])
+            batch_results = self.chroma_service.query_documents_batch(
+                [component.get('search_query', query) for component in components],
+                2
+            )
             
-            for component in response_plan.get('components', []):
-                sub_query = component.get('search_query', query)
-                component_docs = self.chroma_service.query_documents(sub_query, 2)
-                
-                if component_docs['documents'][0]:
-                    component_context = "\n\n".join(component_docs['documents'][0])
-                    component_contexts[component['id']] = component_context
-                    
-                    # Add to all results
-                    for i, (doc, meta, dist) in enumerate(zip(
-                        component_docs['documents'][0],
-                        component_docs['metadatas'][0],
-                        component_docs['distances'][0]
-                    )):
-                        all_results.append({
-                            'content': doc,
-                            'metadata': meta,
-                            'distance': dist,
-                            'component': component['id']
-                        })
+            # Pack component results, in plan order, within the token budget
+            packed = get_context_packer_instance().pack(self._component_results(components, batch_results))
             
             # Generate comprehensive response
-            final_response = self._generate_structured_response(query, response_plan, component_contexts)
-            
-            # Extract sources
-            sources = [result['metadata'].get('source', 'Unknown') for result in all_results]
+            final_response = self._generate_structured_response(query, response_plan, packed['context'], stream_callback)
             
-            return {
-                'text': final_response,
-                'sources': list(set(sources)),
-                'workflow': 'recursive',
-                'results': all_results,
-                'context_used': True
-            }
+            return self._recursive_response(final_response, packed)
             
         except Exception as e:
             logger.error(f"Error in recursive RAG workflow: {str(e)}", exc_info=True)
-            return self._basic_rag_workflow(query, top_k) # Fallback or error
+            return self._basic_rag_workflow(query, top_k, stream_callback) # Fallback or error
     
-    def _adaptive_rag_workflow(self, query: str, top_k: int = 3) -> Dict[str, Any]:
+    def _component_results(self, components: List[Dict], batch_results: List[Dict[str, Any]]) -> List[Dict]:
+        """Tag each plan component's retrieved chunks with the component ID."""
+        all_results = []
+        for component, component_docs in zip(components, batch_results):
+            for result in self._results_from_query(component_docs):
+                result['component'] = component['id']
+                all_results.append(result)
+        return all_results
+    
+    @staticmethod
+    def _recursive_response(final_response: str, packed: Dict[str, Any]) -> Dict[str, Any]:
+        all_results = packed['results']
+        sources = [result['metadata'].get('source', 'Unknown') for result in all_results]
+        
+        return {
+            'text': final_response,
+            'sources': list(set(sources)),
+            'workflow': 'recursive',
+            'results': all_results,
+            'context_used': True
+        }
+    
+    def _adaptive_rag_workflow(self, query: str, top_k: int = 3,
+                               stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Adaptive RAG
         Workflow: Query → Analysis → Strategy Selection → Execution → Evaluation → Refinement
+        The selected workflow is streamed; a refinement replaces it in the final response only.
         """
         try:
             logger.info(f"Executing adaptive RAG workflow for query: {query}")
@@ -344,11 +457,11 @@ class RAGManager:
             
             # Select appropriate workflow
             if query_analysis.get('is_simple_factual', False):
-                initial_response = self._basic_rag_workflow(query, top_k)
+                initial_response = self._basic_rag_workflow(query, top_k, stream_callback)
             elif query_analysis.get('is_multi_part', False):
-                initial_response = self._recursive_rag_workflow(query, top_k)
+                initial_response = self._recursive_rag_workflow(query, top_k, stream_callback)
             else:
-                initial_response = self._advanced_rag_workflow(query, top_k)
+                initial_response = self._advanced_rag_workflow(query, top_k, stream_callback)
             
             # Evaluate response quality
             quality_score = self._evaluate_response_quality(query, initial_response)
@@ -364,17 +477,244 @@ class RAGManager:
             
         except Exception as e:
             logger.error(f"Error in adaptive RAG workflow: {str(e)}", exc_info=True)
-            return self._basic_rag_workflow(query, top_k) # Fallback or error
+            return self._basic_rag_workflow(query, top_k, stream_callback) # Fallback or error
+    
+    async def query_documents_async(self, query: str, n_results: int = 3,
+                                    workflow_type: str = "basic", force_internet_search: bool = False,
+                                    stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Asyncio variant of query_documents with the same result shape.
+        Gemini calls use the async client and blocking retrieval runs on the async
+        retrieval pool, so many queries can be in flight on one event loop.
+        """
+        retrieval = get_async_retrieval_instance()
+        if not self.chroma_service or not self.internet_search_agent:
+            await retrieval.run(self.initialize_services)
+        
+        if not self.chroma_service:
+            # Degraded path (internet search only) is rare; reuse the synchronous one
+            return await retrieval.run(self.query_documents, query, n_results, workflow_type, force_internet_search)
+        
+        workflows = {
+            'basic': self._basic_rag_workflow_async,
+            'advanced': self._advanced_rag_workflow_async,
+            'recursive': self._recursive_rag_workflow_async,
+            'adaptive': self._adaptive_rag_workflow_async
+        }
+        workflow = workflows.get(workflow_type, self._basic_rag_workflow_async)
+        rag_response = await workflow(query, n_results, stream_callback)
+        
+        internet_search_response = None
+        if self._needs_internet_search(rag_response, force_internet_search):
+            if self.internet_search_agent:
+                logger.info(f"Performing internet search for query: {query}")
+                internet_search_response = await retrieval.run(self.internet_search_agent.search, query, n_results)
+            else:
+                logger.warning("Internet search agent not initialized. Skipping internet search.")
+                internet_search_response = {"error": "Internet search agent not available.", "text": "", "sources": [], "results": []}
+        
+        return {
+            'rag_response': rag_response,
+            'internet_search_response': internet_search_response
+        }
+    
+    async def _basic_rag_workflow_async(self, query: str, top_k: int = 3,
+                                        stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _basic_rag_workflow."""
+        try:
+            logger.info(f"Executing async basic RAG workflow for query: {query}")
+            retrieval = get_async_retrieval_instance()
+            
+            reranker = get_reranker_instance()
+            n_candidates = max(top_k, Config.RERANK_CANDIDATES) if reranker.scores_content else top_k
+            retrieved_docs = await retrieval.query_documents(query, n_candidates)
+            
+            if not retrieved_docs['documents'][0]:
+                return self._no_documents_response('basic')
+            
+            top_results = self._results_from_query(retrieved_docs)
+            if reranker.scores_content:
+                # Cross-encoder scoring is CPU-bound
+                top_results = await retrieval.run(self._rerank_results, top_results, query, top_k)
+            
+            packed = get_context_packer_instance().pack(top_results)
+            
+            response_text = await LLMFactory.generate_response_async(
+                prompt=f"Context:\n{packed['context']}\n\nQuestion: {query}",
+                system_prompt=BASIC_ANSWER_SYSTEM_PROMPT,
+                temperature=0.2,
+                stream_callback=stream_callback,
+                cache_key_text=query
+            )
+            
+            return self._basic_response(response_text, packed)
+            
+        except Exception as e:
+            logger.error(f"Error in async basic RAG workflow: {str(e)}", exc_info=True)
+            return self._workflow_error_response('basic', e)
+    
+    async def _advanced_rag_workflow_async(self, query: str, top_k: int = 5,
+                                           stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _advanced_rag_workflow."""
+        try:
+            logger.info(f"Executing async advanced RAG workflow for query: {query}")
+            retrieval = get_async_retrieval_instance()
+            
+            # Expand the query while the original query's retrieval runs
+            expansion = asyncio.ensure_future(self._expand_query_async(query))
+            semantic, keyword = await asyncio.gather(
+                retrieval.query_documents(query, top_k),
+                retrieval.lexical_search(query, top_k)
+            )
+            result_sets = {'semantic': semantic, 'keyword': keyword}
+            expanded_query = await expansion
+            
+            if expanded_query and expanded_query != query:
+                result_sets['expanded'] = await retrieval.query_documents(expanded_query, top_k)
+            
+            merged_results = self._merge_search_results(result_sets)
+            top_results = await retrieval.run(self._rerank_results, merged_results, query, Config.RERANK_TOP_N)
+            
+            if not top_results:
+                return self._no_documents_response('advanced')
+            
+            packed = get_context_packer_instance().pack(top_results)
+            
+            response_text = await LLMFactory.generate_response_async(
+                prompt=f"Context:\n{packed['context']}\n\nQuestion: {query}",
+                system_prompt=ADVANCED_ANSWER_SYSTEM_PROMPT,
+                temperature=0.1,
+                stream_callback=stream_callback,
+                cache_key_text=query
+            )
+            
+            return self._advanced_response(response_text, packed, stream_callback)
+            
+        except Exception as e:
+            logger.error(f"Error in async advanced RAG workflow: {str(e)}", exc_info=True)
+            return self._workflow_error_response('advanced', e)
+    
+    async def _recursive_rag_workflow_async(self, query: str, top_k: int = 3,
+                                            stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _recursive_rag_workflow."""
+        try:
+            logger.info(f"Executing async recursive RAG workflow for query: {query}")
+            retrieval = get_async_retrieval_instance()
+            
+            initial_docs = await retrieval.query_documents(query, top_k)
+            
+            if not initial_docs['documents'][0]:
+                return await self._basic_rag_workflow_async(query, top_k, stream_callback)
+            
+            initial_context = "\n\n".join(initial_docs['documents'][0])
+            response_plan = self._plan_response(query, initial_context)
+            
+            components = response_plan.get('components', [])
+            batch_results = await retrieval.query_documents_batch(
+                [component.get('search_query', query) for component in components],
+                2
+            )
+            
+            packed = get_context_packer_instance().pack(self._component_results(components, batch_results))
+            
+            final_response = await self._generate_structured_response_async(query, response_plan, packed['context'], stream_callback)
+            
+            return self._recursive_response(final_response, packed)
+            
+        except Exception as e:
+            logger.error(f"Error in async recursive RAG workflow: {str(e)}", exc_info=True)
+            return await self._basic_rag_workflow_async(query, top_k, stream_callback)
+    
+    async def _adaptive_rag_workflow_async(self, query: str, top_k: int = 3,
+                                           stream_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Asyncio variant of _adaptive_rag_workflow."""
+        try:
+            logger.info(f"Executing async adaptive RAG workflow for query: {query}")
+            
+            query_analysis = self._analyze_query(query)
+            
+            if query_analysis.get('is_simple_factual', False):
+                initial_response = await self._basic_rag_workflow_async(query, top_k, stream_callback)
+            elif query_analysis.get('is_multi_part', False):
+                initial_response = await self._recursive_rag_workflow_async(query, top_k, stream_callback)
+            else:
+                initial_response = await self._advanced_rag_workflow_async(query, top_k, stream_callback)
+            
+            quality_score = self._evaluate_response_quality(query, initial_response)
+            
+            if quality_score < 0.8 and not initial_response.get('error'):
+                refined_response = await self._refine_response_async(query, initial_response)
+                refined_response['workflow'] = 'adaptive'
+                return refined_response
+            
+            initial_response['workflow'] = 'adaptive'
+            return initial_response
+            
+        except Exception as e:
+            logger.error(f"Error in async adaptive RAG workflow: {str(e)}", exc_info=True)
+            return await self._basic_rag_workflow_async(query, top_k, stream_callback)
+    
+    async def _expand_query_async(self, query: str) -> str:
+        """Asyncio variant of _expand_query."""
+        try:
+            expanded = await LLMFactory.generate_response_async(
+                query,
+                QUERY_EXPANSION_SYSTEM_PROMPT,
+                temperature=0.1,
+                max_tokens=128,
+                task='fast'
+            )
+            return expanded.strip()
+            
+        except Exception as e:
+            logger.error(f"Error expanding query: {str(e)}", exc_info=True)
+            return query
+    
+    async def _generate_structured_response_async(self, query: str, plan: Dict, combined_context: str,
+                                                  stream_callback: Optional[Callable[[str], None]] = None) -> str:
+        """Asyncio variant of _generate_structured_response."""
+        try:
+            return await LLMFactory.generate_response_async(
+                prompt=f"Context:\n{combined_context}\n\nQuestion: {query}",
+                system_prompt=STRUCTURED_ANSWER_SYSTEM_PROMPT,
+                temperature=0.2,
+                stream_callback=stream_callback,
+                cache_key_text=query
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating structured response: {str(e)}", exc_info=True)
+            return "Error generating response."
+    
+    async def _refine_response_async(self, query: str, initial_response: Dict) -> Dict:
+        """Asyncio variant of _refine_response."""
+        try:
+            original_text = initial_response.get('text', '')
+            refined_text = await LLMFactory.generate_response_async(
+                prompt=f"Original query: {query}\nOriginal response: {original_text}",
+                system_prompt=REFINE_SYSTEM_PROMPT,
+                temperature=0.3
+            )
+            
+            refined_response = initial_response.copy()
+            refined_response['text'] = refined_text
+            refined_response['refined'] = True
+            
+            return refined_response
+            
+        except Exception as e:
+            logger.error(f"Error refining response: {str(e)}", exc_info=True)
+            return initial_response
     
     def _expand_query(self, query: str) -> str:
         """Expand query for better recall."""
         try:
-            system_prompt = """
-            Expand the following query to include related terms and synonyms that would help find relevant documents.
-            Keep the expansion concise and focused. Return only the expanded query.
-            """
-            
             expanded = LLMFactory.generate_response(
+                query,
+                QUERY_EXPANSION_SYSTEM_PROMPT,
+                temperature=0.1,
+                max_tokens=128,
+                task='fast'
             )
             
             return expanded.strip()
@@ -383,49 +723,55 @@ class RAGManager:
             logger.error(f"Error expanding query: {str(e)}", exc_info=True)
             return query
     
-    def _merge_search_results(self, semantic_results: Dict, keyword_results: Dict) -> List[Dict]:
-        """Merge results from different search strategies."""
-        merged = []
-        seen_content = set()
-        
-        # Add semantic results
-        if semantic_results['documents'][0]:
-            for doc, meta, dist in zip(
-                semantic_results['documents'][0],
-                semantic_results['metadatas'][0],
-                semantic_results['distances'][0]
-            ):
-                if doc not in seen_content:
-                    merged.append({
-                        'content': doc,
-                        'metadata': meta,
-                        'distance': dist,
-                        'source_type': 'semantic'
-                    })
-                    seen_content.add(doc)
+    def _merge_search_results(self, result_sets: Dict[str, Dict]) -> List[Dict]:
+        """
+        Merge ranked result lists from different search strategies with reciprocal-rank fusion.
+        Each result's rrf_score is the sum of 1 / (k + rank) over the lists it appears in.
+        """
+        k = Config.RRF_K
+        merged: Dict[str, Dict] = {}
         
-        # Add keyword results
-        if keyword_results['documents'][0]:
-            for doc, meta, dist in zip(
-                keyword_results['documents'][0],
-                keyword_results['metadatas'][0],
-                keyword_results['distances'][0]
-            ):
-                if doc not in seen_content:
-                    merged.append({
+        for source_type, results in result_sets.items():
+            if not results['documents'][0]:
+                continue
+            
+            ids = results.get('ids', [[]])[0] or [None] * len(results['documents'][0])
+            for rank, (doc_id, doc, meta, dist) in enumerate(zip(
+                ids,
+                results['documents'][0],
+                results['metadatas'][0],
+                results['distances'][0]
+            )):
+                key = doc_id or doc
+                entry = merged.get(key)
+                if entry is None:
+                    entry = {
                         'content': doc,
                         'metadata': meta,
                         'distance': dist,
-                        'source_type': 'keyword'
-                    })
-                    seen_content.add(doc)
+                        'source_type': source_type,
+                        'matched_by': [],
+                        'rrf_score': 0.0
+                    }
+                    merged[key] = entry
+                elif source_type != 'keyword' and (entry['source_type'] == 'keyword' or dist < entry['distance']):
+                    # Keep the best vector distance; BM25 ranks are on a different scale
+                    entry['distance'] = dist
+                    entry['source_type'] = source_type
+                
+                entry['matched_by'].append(source_type)
+                entry['rrf_score'] += 1.0 / (k + rank + 1)
         
-        return merged
+        return list(merged.values())
     
-    def _rerank_results(self, results: List[Dict], query: str) -> List[Dict]:
-        """Rerank results for relevance."""
-        # Simple reranking based on distance (lower is better)
-        return sorted(results, key=lambda x: x['distance'])
+    def _rerank_results(self, results: List[Dict], query: str, top_n: Optional[int] = None) -> List[Dict]:
+        """Rerank results for relevance with the configured reranker."""
+        try:
+            return get_reranker_instance().rerank(query, results, top_n)
+        except Exception as e:
+            logger.error(f"Error reranking results: {str(e)}", exc_info=True)
+            ordered = sorted(results, key=lambda x: x.get('rrf_score', 0), reverse=True)
+            return ordered[:top_n] if top_n else ordered
     
     def _add_citations(self, response: str, results: List[Dict]) -> str:
         """Add citations to response."""
@@ -464,20 +810,16 @@ class RAGManager:
             logger.error(f"Error planning response: {str(e)}", exc_info=True)
             return {'components': [{'id': 'main', 'search_query': query}]}
     
-    def _generate_structured_response(self, query: str, plan: Dict, contexts: Dict) -> str:
-        """Generate structured response using plan and contexts."""
+    def _generate_structured_response(self, query: str, plan: Dict, combined_context: str,
+                                      stream_callback: Optional[Callable[[str], None]] = None) -> str:
+        """Generate structured response using plan and packed component context."""
         try:
-            combined_context = "\n\n".join(contexts.values())
-            
-            system_prompt = """
-            Generate a comprehensive, well-structured response using the provided contexts.
-            Organize the information logically and provide a complete answer to the question.
-            """
-            
             return LLMFactory.generate_response(
                 prompt=f"Context:\n{combined_context}\n\nQuestion: {query}",
-                system_prompt=system_prompt,
-                temperature=0.2
+                system_prompt=STRUCTURED_ANSWER_SYSTEM_PROMPT,
+                temperature=0.2,
+                stream_callback=stream_callback,
+                cache_key_text=query
             )
             
         except Exception as e:
@@ -523,15 +865,10 @@ class RAGManager:
     def _refine_response(self, query: str, initial_response: Dict) -> Dict:
         """Refine response if quality is low."""
         try:
-            system_prompt = """
-            The following response may need improvement. Please refine it to be more comprehensive and helpful.
-            Maintain accuracy and add more detail if possible.
-            """
-            
             original_text = initial_response.get('text', '')
             refined_text = LLMFactory.generate_response(
                 prompt=f"Original query: {query}\nOriginal response: {original_text}",
-                system_prompt=system_prompt,
+                system_prompt=REFINE_SYSTEM_PROMPT,
                 temperature=0.3
             )
             
@@ -0,0 +1,177 @@
+"""
+Reranking stage for retrieved document chunks
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Type
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class Reranker:
+    """
+    Base reranker: orders fused results by RRF score, other results by vector distance.
+    Subclasses that score query/chunk relevance set scores_content so workflows know
+    it is worth over-fetching candidates for them.
+    """
+
+    scores_content = False
+
+    def rerank(self, query: str, results: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        """Return results ordered by relevance, truncated to top_n if given."""
+        if results and 'rrf_score' in results[0]:
+            ordered = sorted(results, key=lambda x: x['rrf_score'], reverse=True)
+        else:
+            ordered = sorted(results, key=lambda x: x['distance'])
+        return ordered[:top_n] if top_n else ordered
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'reranker': type(self).__name__}
+
+class CrossEncoderReranker(Reranker):
+    """
+    Scores (query, chunk) pairs with a local sentence-transformers cross-encoder on CPU.
+    Candidates are scored in batches in their retrieval order until the latency budget
+    is spent; unscored candidates follow the scored ones. Scores are cached per pair.
+    """
+
+    scores_content = True
+
+    def __init__(self, model_name: str, batch_size: int = 16, budget_ms: float = 150,
+                 cache_size: int = 10000):
+        # Optional dependency; ImportError lets the factory fall back
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self.model = CrossEncoder(model_name, device='cpu')
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.budget_exceeded = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+
+        logger.info(f"Loaded cross-encoder reranker {model_name}")
+
+    def _cache_key(self, query: str, content: str) -> str:
+        return hashlib.sha256(f"{query}\x00{content}".encode('utf-8')).hexdigest()
+
+    def _get_cached(self, keys: List[str]) -> Dict[str, float]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            self.cache_hits += len(found)
+            self.cache_misses += len(keys) - len(found)
+        return found
+
+    def _put_cached(self, scores: Dict[str, float]):
+        with self._lock:
+            for key, score in scores.items():
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, results: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        candidates = super().rerank(query, results)
+        if not candidates:
+            return candidates
+
+        started = time.perf_counter()
+        keys = [self._cache_key(query, result['content']) for result in candidates]
+        scores = self._get_cached(keys)
+
+        pending = [i for i, key in enumerate(keys) if key not in scores]
+        for start in range(0, len(pending), self.batch_size):
+            if (time.perf_counter() - started) * 1000 > self.budget_ms:
+                self.budget_exceeded += 1
+                logger.warning(f"Rerank budget of {self.budget_ms}ms spent; {len(pending) - start} candidates unscored")
+                break
+
+            batch = pending[start:start + self.batch_size]
+            with self._model_lock:
+                batch_scores = self.model.predict(
+                    [(query, candidates[i]['content']) for i in batch],
+                    batch_size=self.batch_size
+                )
+            new_scores = {keys[i]: float(score) for i, score in zip(batch, batch_scores)}
+            self._put_cached(new_scores)
+            scores.update(new_scores)
+
+        scored = []
+        unscored = []
+        for key, result in zip(keys, candidates):
+            if key in scores:
+                scored.append({**result, 'rerank_score': scores[key]})
+            else:
+                unscored.append(result)
+
+        scored.sort(key=lambda x: x['rerank_score'], reverse=True)
+        ordered = scored + unscored
+        return ordered[:top_n] if top_n else ordered
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'reranker': type(self).__name__,
+                'model': self.model_name,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                'cache_entries': len(self._cache),
+                'budget_exceeded': self.budget_exceeded
+            }
+
+# Available rerankers by RERANKER setting; register custom implementations here
+RERANKERS: Dict[str, Type[Reranker]] = {
+    'none': Reranker,
+    'cross-encoder': CrossEncoderReranker
+}
+
+def register_reranker(name: str, reranker_class: Type[Reranker]):
+    """Make a reranker implementation selectable through the RERANKER setting."""
+    RERANKERS[name] = reranker_class
+
+# Singleton instance
+_reranker_instance = None
+_reranker_lock = threading.Lock()
+
+def get_reranker_instance() -> Reranker:
+    """Get the singleton reranker configured by RERANKER."""
+    global _reranker_instance
+    if _reranker_instance is None:
+        with _reranker_lock:
+            if _reranker_instance is None:
+                name = Config.RERANKER
+                reranker_class = RERANKERS.get(name)
+                if reranker_class is None:
+                    logger.warning(f"Unknown reranker '{name}', using distance ordering")
+                    reranker_class = Reranker
+
+                try:
+                    if reranker_class is CrossEncoderReranker:
+                        _reranker_instance = CrossEncoderReranker(
+                            Config.RERANKER_MODEL,
+                            batch_size=Config.RERANK_BATCH_SIZE,
+                            budget_ms=Config.RERANK_BUDGET_MS,
+                            cache_size=Config.RERANK_CACHE_SIZE
+                        )
+                    else:
+                        _reranker_instance = reranker_class()
+                except Exception as e:
+                    logger.warning(f"Could not load reranker '{name}', using distance ordering: {str(e)}")
+                    _reranker_instance = Reranker()
+    return _reranker_instance
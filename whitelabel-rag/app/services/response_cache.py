@@ -0,0 +1,176 @@
+"""
+LLM response cache with exact-match and semantic lookup tiers
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    In-memory TTL/LRU cache of generated responses.
+    The exact tier matches on a hash of (model, system prompt, temperature, max tokens, prompt).
+    The optional semantic tier reuses a response for the same model and system prompt
+    when the embedding of the caller's semantic text (the user's question, not the
+    prompt around it) is within a cosine-similarity threshold. Calls without
+    semantic text only use the exact tier.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600,
+                 semantic_enabled: bool = False, semantic_threshold: float = 0.95,
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_enabled = semantic_enabled and embed_fn is not None
+        self.semantic_threshold = semantic_threshold
+        self.embed_fn = embed_fn
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> {'response', 'expires_at', 'scope', 'embedding'}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(prompt: str, system_prompt: Optional[str], temperature: float,
+                  max_tokens: int, model: str) -> str:
+        """Hash the generation inputs into an exact-match cache key."""
+        raw = "\x00".join([model, system_prompt or "", f"{temperature:.3f}", str(max_tokens), prompt])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _make_scope(system_prompt: Optional[str], temperature: float, max_tokens: int, model: str) -> str:
+        """Semantic matches are only considered between prompts sharing a scope."""
+        raw = "\x00".join([model, system_prompt or "", f"{temperature:.3f}", str(max_tokens)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit vector, so cosine similarity is a dot product."""
+        try:
+            embedding = np.asarray(self.embed_fn([text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Could not embed text for semantic cache: {str(e)}")
+            return None
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else None
+
+    def get(self, prompt: str, system_prompt: Optional[str], temperature: float,
+            max_tokens: int, model: str, semantic_text: Optional[str] = None) -> Optional[str]:
+        """Return a cached response, or None on a miss."""
+        key = self._make_key(prompt, system_prompt, temperature, max_tokens, model)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry['response']
+            if entry:
+                del self._entries[key]
+
+        if self.semantic_enabled and semantic_text:
+            embedding = self._embed(semantic_text)
+            if embedding is not None:
+                scope = self._make_scope(system_prompt, temperature, max_tokens, model)
+
+                # Collect candidates under the lock and score them outside it
+                with self._lock:
+                    candidates = [
+                        (candidate_key, candidate['embedding'])
+                        for candidate_key, candidate in self._entries.items()
+                        if candidate['scope'] == scope and candidate['embedding'] is not None
+                        and candidate['embedding'].shape == embedding.shape
+                        and candidate['expires_at'] > now
+                    ]
+
+                if candidates:
+                    scores = np.stack([candidate for _, candidate in candidates]) @ embedding
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.semantic_threshold:
+                        best_key = candidates[best][0]
+                        with self._lock:
+                            # The entry may have been evicted while scoring
+                            entry = self._entries.get(best_key)
+                            if entry is not None:
+                                self._entries.move_to_end(best_key)
+                                self.semantic_hits += 1
+                                return entry['response']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, system_prompt: Optional[str], temperature: float,
+            max_tokens: int, model: str, response: str, semantic_text: Optional[str] = None):
+        """Store a response, evicting the least recently used entries if full."""
+        key = self._make_key(prompt, system_prompt, temperature, max_tokens, model)
+        embedding = self._embed(semantic_text) if self.semantic_enabled and semantic_text else None
+
+        with self._lock:
+            self._entries[key] = {
+                'response': response,
+                'expires_at': time.time() + self.ttl_seconds,
+                'scope': self._make_scope(system_prompt, temperature, max_tokens, model),
+                'embedding': embedding
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters and size."""
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'semantic_enabled': self.semantic_enabled
+            }
+
+def _embed_queries(texts: List[str]) -> List[List[float]]:
+    """Embed questions with the document store's model, bypassing its persistent embedding cache."""
+    # Lazy import to avoid circular dependency
+    from app.services.chroma_service import get_chroma_service_instance
+    return get_chroma_service_instance().embed_uncached(texts)
+
+# Singleton instance
+_response_cache_instance = None
+
+def get_response_cache_instance() -> ResponseCache:
+    """Get the singleton ResponseCache instance."""
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = ResponseCache(
+            max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+            semantic_enabled=Config.RESPONSE_CACHE_SEMANTIC_ENABLED,
+            semantic_threshold=Config.RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            embed_fn=_embed_queries
+        )
+    return _response_cache_instance
@@ -0,0 +1,94 @@
+"""
+Cache of vector and lexical retrieval results
+"""
+
+import os
+import copy
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RetrievalCache:
+    """
+    In-memory TTL/LRU cache of retrieval results and collection stats.
+    Every entry records the corpus version it was computed against; a lookup with a
+    newer version is a miss, so adds, deletes and resets invalidate without a purge.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        # key -> {'value', 'version', 'expires_at'}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, *parts: Any) -> Tuple:
+        """Build a hashable key; dict parts such as where filters are serialized canonically."""
+        return (kind,) + tuple(
+            json.dumps(part, sort_keys=True) if isinstance(part, (dict, list)) else part
+            for part in parts
+        )
+
+    def get(self, key: Tuple, version: int) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['version'] == version and entry['expires_at'] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry['value']
+            else:
+                if entry:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+        # Callers post-process results in place
+        return copy.deepcopy(value)
+
+    def put(self, key: Tuple, version: int, value: Any):
+        """Cache a value computed against the given corpus version."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = {'value': value, 'version': version, 'expires_at': time.time() + self.ttl_seconds}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+# Singleton instance
+_retrieval_cache_instance = None
+
+def get_retrieval_cache_instance() -> RetrievalCache:
+    """Get the singleton RetrievalCache instance."""
+    global _retrieval_cache_instance
+    if _retrieval_cache_instance is None:
+        _retrieval_cache_instance = RetrievalCache(
+            max_entries=int(os.environ.get('RETRIEVAL_CACHE_MAX_ENTRIES', 2000)),
+            ttl_seconds=float(os.environ.get('RETRIEVAL_CACHE_TTL_SECONDS', 300))
+        )
+    return _retrieval_cache_instance
@@ -53,7 +53,7 @@ class SearchAgent(BaseAssistant):
                 query=message,
                 n_results=n_results,
                 workflow_type=workflow_type
-            )
+            ).get('rag_response', {})
             
             # Format and enhance results
             self._update_status("running", 80, "Formatting search results...")
@@ -0,0 +1,126 @@
+"""
+Coalescing of identical in-flight calls
+"""
+
+import copy
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Hashable, Tuple, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Lets concurrent identical calls share one execution.
+    The first caller for a key (the leader) runs the call; callers arriving with
+    the same key while it is in flight wait for its outcome instead of repeating
+    it. Followers get a copy of the result and see the leader's exception if it
+    fails. Nothing is kept once the call finishes; caching is left to the caches.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self.leaders = 0
+        self.coalesced = 0
+
+        # key -> future of the in-flight call
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Join the in-flight call for key, or start one; returns (future, is_leader)."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+
+            future = Future()
+            # A running future cannot be cancelled by a follower giving up
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            self.leaders += 1
+            return future, True
+
+    def resolve(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        """Publish the leader's outcome and stop accepting followers for it."""
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            # Followers copy from a snapshot the leader's caller cannot modify
+            future.set_result(copy.deepcopy(result))
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run func, or wait for the identical call already in flight."""
+        future, is_leader = self.claim(key)
+        if not is_leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func()
+        except Exception as e:
+            self.resolve(key, future, error=e)
+            raise
+        except BaseException:
+            self.resolve(key, future, error=RuntimeError(f"Coalesced {self.name} call was interrupted"))
+            raise
+
+        self.resolve(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Asyncio variant of do; shares flights with synchronous callers."""
+        future, is_leader = self.claim(key)
+        if not is_leader:
+            # Shielded so a cancelled follower leaves the shared future alone
+            return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+
+        try:
+            result = await func()
+        except Exception as e:
+            self.resolve(key, future, error=e)
+            raise
+        except BaseException:
+            self.resolve(key, future, error=RuntimeError(f"Coalesced {self.name} call was cancelled"))
+            raise
+
+        self.resolve(key, future, result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                'executed': self.leaders,
+                'coalesced': self.coalesced,
+                'coalesced_rate': round(self.coalesced / calls, 4) if calls else 0.0,
+                'in_flight': len(self._flights)
+            }
+
+# Singleton instances, one per kind of call
+_single_flight_instances: Dict[str, SingleFlight] = {}
+_single_flight_lock = threading.Lock()
+
+def get_single_flight_instance(name: str) -> SingleFlight:
+    """Get the singleton SingleFlight group for a kind of call."""
+    instance = _single_flight_instances.get(name)
+    if instance is None:
+        with _single_flight_lock:
+            instance = _single_flight_instances.get(name)
+            if instance is None:
+                instance = SingleFlight(name)
+                _single_flight_instances[name] = instance
+    return instance
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    """Coalescing statistics for every SingleFlight group."""
+    with _single_flight_lock:
+        instances = dict(_single_flight_instances)
+    return {name: instance.get_stats() for name, instance in instances.items()}
@@ -0,0 +1,124 @@
+"""
+Per-session, rate-limited delivery of assistant status events over Socket.IO
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Session whose request is being handled on this thread of execution
+_current_session: contextvars.ContextVar = contextvars.ContextVar('status_session', default=None)
+
+def get_status_session() -> Optional[str]:
+    """Session ID that status updates raised here belong to, if any."""
+    return _current_session.get()
+
+@contextmanager
+def status_session(session_id: Optional[str]):
+    """Attribute status updates raised inside the block to a session."""
+    token = _current_session.set(session_id)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+class StatusEmitter:
+    """
+    Coalesces status events per session room and sends them from a background thread.
+    A session receives at most one event per min_interval; an event that arrives
+    sooner replaces the pending one, so the latest status is always delivered.
+    """
+
+    def __init__(self, min_interval: float = 0.1):
+        self.min_interval = min_interval
+
+        self.published = 0
+        self.emitted = 0
+
+        # (room, event) -> pending payload
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # (room, event) -> monotonic time of the last emit
+        self._last_sent: Dict[Tuple[str, str], float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, room: str, event: str, payload: Dict[str, Any]):
+        """Queue an event for a session room; never blocks on the socket."""
+        with self._condition:
+            self.published += 1
+            self._pending[(room, event)] = payload
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="status-emitter", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+                now = time.monotonic()
+                due = []
+                next_due = None
+                for key in list(self._pending):
+                    ready_at = self._last_sent.get(key, 0.0) + self.min_interval
+                    if ready_at <= now:
+                        due.append((key, self._pending.pop(key)))
+                        self._last_sent[key] = now
+                    elif next_due is None or ready_at < next_due:
+                        next_due = ready_at
+
+                # Forget rooms that have been quiet for a while
+                if len(self._last_sent) > 1000:
+                    cutoff = now - self.min_interval
+                    for key in [k for k, sent in self._last_sent.items() if sent < cutoff and k not in self._pending]:
+                        del self._last_sent[key]
+
+                if not due:
+                    self._condition.wait(max(0.0, next_due - now))
+                    continue
+                self.emitted += len(due)
+
+            for (room, event), payload in due:
+                self._emit(room, event, payload)
+
+    def _emit(self, room: str, event: str, payload: Dict[str, Any]):
+        try:
+            # Lazy import to avoid circular dependency
+            import sys
+            if 'app' in sys.modules:
+                from app import socketio
+                socketio.emit(event, payload, room=room)
+        except Exception as e:
+            logger.debug(f"WebSocket not available for {event}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'published': self.published,
+                'emitted': self.emitted,
+                'coalesced': self.published - self.emitted - len(self._pending),
+                'pending': len(self._pending)
+            }
+
+# Singleton instance
+_status_emitter_instance = None
+_status_emitter_lock = threading.Lock()
+
+def get_status_emitter_instance() -> StatusEmitter:
+    """Get the singleton StatusEmitter instance."""
+    global _status_emitter_instance
+    if _status_emitter_instance is None:
+        with _status_emitter_lock:
+            if _status_emitter_instance is None:
+                _status_emitter_instance = StatusEmitter(
+                    min_interval=int(os.environ.get('STATUS_UPDATE_INTERVAL_MS', 100)) / 1000
+                )
+    return _status_emitter_instance
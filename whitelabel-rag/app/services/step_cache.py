@@ -0,0 +1,103 @@
+"""
+Memoization of task step results across tasks
+"""
+
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+class StepResultCache:
+    """
+    In-memory TTL/LRU cache of successful step results.
+    Entries are keyed by the normalized instruction, the agent type and the corpus
+    version, so ingesting or deleting documents makes every earlier entry unreachable.
+    """
+
+    def __init__(self, agent_types: Iterable[str], max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.agent_types = set(agent_types)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        # key -> {'result', 'expires_at'}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_instruction(instruction: str) -> str:
+        """Case-fold and collapse whitespace and trailing punctuation."""
+        return _WHITESPACE.sub(" ", instruction).strip().rstrip(".!?;:").lower()
+
+    def is_cacheable(self, agent_type: str) -> bool:
+        return agent_type in self.agent_types
+
+    def _make_key(self, instruction: str, agent_type: str, corpus_version: int) -> str:
+        raw = "\x00".join([agent_type, str(corpus_version), self.normalize_instruction(instruction)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, instruction: str, agent_type: str, corpus_version: int) -> Optional[str]:
+        """Return a cached step result, or None on a miss."""
+        key = self._make_key(instruction, agent_type, corpus_version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['result']
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, instruction: str, agent_type: str, corpus_version: int, result: str):
+        """Cache the result of a successful step."""
+        key = self._make_key(instruction, agent_type, corpus_version)
+
+        with self._lock:
+            self._entries[key] = {'result': result, 'expires_at': time.time() + self.ttl_seconds}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'agent_types': sorted(self.agent_types)
+            }
+
+# Singleton instance
+_step_cache_instance = None
+
+def get_step_cache_instance() -> StepResultCache:
+    """Get the singleton StepResultCache instance."""
+    global _step_cache_instance
+    if _step_cache_instance is None:
+        _step_cache_instance = StepResultCache(
+            agent_types=[t.strip() for t in Config.STEP_CACHE_AGENT_TYPES.split(',') if t.strip()],
+            max_entries=Config.STEP_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.STEP_CACHE_TTL_SECONDS
+        )
+    return _step_cache_instance
@@ -3,10 +3,16 @@ TaskAssistant - Dedicated assistant for complex, multi-step task decomposition a
 """
 
 import logging
+import time
 import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.services.base_assistant import BaseAssistant
+from app.services.task_store import get_task_store_instance
+from app.services.step_cache import get_step_cache_instance
 from app.services.llm_factory import LLMFactory
 from app.config import Config
 
@@ -22,7 +28,7 @@ class TaskStep:
         self.suggested_agent_type = suggested_agent_type
         self.dependencies = dependencies or []
         self.metadata = metadata or {}
-        self.status = "pending"  # pending, running, completed, failed
+        self.status = "pending"  # pending, running, completed, failed, cancelled
         self.result = None
         self.error_message = None
         self.created_at = datetime.now()
@@ -77,6 +83,19 @@ class Task:
         
         return ready_steps
     
+    def get_dependents(self, step_number: int) -> List[TaskStep]:
+        """Get all steps that depend on a step, directly or transitively."""
+        dependents = []
+        frontier = {step_number}
+        while frontier:
+            next_frontier = set()
+            for step in self.steps:
+                if step not in dependents and frontier.intersection(step.dependencies):
+                    dependents.append(step)
+                    next_frontier.add(step.step_number)
+            frontier = next_frontier
+        return dependents
+    
     def is_completed(self) -> bool:
         """Check if all steps are completed."""
         return all(step.status in ["completed", "skipped"] for step in self.steps)
@@ -111,26 +130,36 @@ class TaskAssistant(BaseAssistant):
     def __init__(self):
         super().__init__("TaskAssistant")
         self.llm = LLMFactory.get_llm('reasoning')
+        # Tasks running in this process; history lives in the shared task store
         self.active_tasks: Dict[str, Task] = {}
+        self.task_store = get_task_store_instance()
+        self.step_cache = get_step_cache_instance() if Config.STEP_CACHE_ENABLED else None
         self.config = {
             'max_steps': 10,
-            'max_concurrent_steps': 3,
-            'step_timeout': 300,  # 5 minutes
-            'task_timeout': 1800  # 30 minutes
+            'max_concurrent_steps': Config.TASK_MAX_CONCURRENT_STEPS,
+            'step_timeout': Config.TASK_STEP_TIMEOUT,
+            'task_timeout': Config.TASK_TIMEOUT,
+            'max_abandoned_steps': Config.TASK_MAX_ABANDONED_STEPS
         }
+        # Shared by all tasks; each task runs at most max_concurrent_steps at once.
+        # Timed-out attempts can't be interrupted and keep their thread until they
+        # return, so the pool has headroom for up to max_abandoned_steps of them.
+        self.step_executor = ThreadPoolExecutor(
+            max_workers=Config.TASK_STEP_WORKERS + Config.TASK_MAX_ABANDONED_STEPS,
+            thread_name_prefix="task-step"
+        )
+        self._abandoned_steps = set()
+        self._abandoned_total = 0
+        self._abandoned_lock = threading.Lock()
     
     def get_last_tasks(self, count: int = 3) -> List[Dict[str, Any]]:
         """Return the last 'count' tasks sorted by creation time descending."""
-        # Sort tasks by created_at descending
-        sorted_tasks = sorted(
-            self.active_tasks.values(),
-            key=lambda t: t.created_at,
-            reverse=True
-        )
-        # Get the last 'count' tasks
-        last_tasks = sorted_tasks[:count]
-        # Convert to dict
-        return [task.to_dict() for task in last_tasks]
+        return self.task_store.list_tasks(limit=count, include_steps=True)['tasks']
+    
+    def list_tasks(self, limit: int = 20, offset: int = 0, session_id: Optional[str] = None,
+                   status: Optional[str] = None) -> Dict[str, Any]:
+        """Page through task history, newest first."""
+        return self.task_store.list_tasks(limit=limit, offset=offset, session_id=session_id, status=status)
     
     def handle_message(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Handle task decomposition and execution requests."""
@@ -157,10 +186,15 @@ class TaskAssistant(BaseAssistant):
             
             # Store task
             self.active_tasks[task_id] = task
+            self._persist_task(task)
             
             # Execute task
             self._update_status("running", 50, "Executing task steps...")
-            execution_result = self._execute_task(task)
+            try:
+                execution_result = self._execute_task(task)
+            finally:
+                self._persist_task(task)
+                self.active_tasks.pop(task_id, None)
             
             if execution_result['success']:
                 return self.report_success(
@@ -281,38 +315,85 @@ class TaskAssistant(BaseAssistant):
             return {'success': False, 'error': str(e)}
     
     def _execute_task(self, task: Task) -> Dict[str, Any]:
-        """Execute all steps of a task."""
+        """
+        Execute the task's step DAG.
+        Ready steps run concurrently on the step pool; a step that fails permanently or
+        misses its deadline cancels its dependents, while independent branches continue.
+        """
         try:
             task.status = "executing"
             step_results = []
-            
-            while not task.is_completed() and not task.has_failed_steps():
-                # Get ready steps
-                ready_steps = task.get_ready_steps()
+            running = {}  # future -> (step, started), started holds the attempt's start time once it runs
+            task_deadline = time.monotonic() + self.config['task_timeout']
+            step_timeout = self.config['step_timeout']
+            
+            while True:
+                if task.status == "cancelled":
+                    self._cancel_steps(task, [step for _, (step, _) in running.items()], "Task cancelled")
+                    return {'success': False, 'error': 'Task was cancelled'}
                 
-                if not ready_steps:
-                    if task.is_completed():
-                        break
-                    else:
-                        # Check for circular dependencies or other issues
-                        pending_steps = [s for s in task.steps if s.status == "pending"]
-                        if pending_steps:
-                            logger.error(f"Task {task.task_id} has pending steps but none are ready")
-                            return {'success': False, 'error': 'Circular dependencies or unresolvable step dependencies'}
+                # Start ready steps up to the concurrency limit, unless timed-out attempts
+                # already hold all the pool's headroom
+                pool_saturated = self._abandoned_step_count() >= self.config['max_abandoned_steps']
+                for step in ([] if pool_saturated else task.get_ready_steps()):
+                    if len(running) >= self.config['max_concurrent_steps']:
                         break
+                    step.status = "running"
+                    logger.info(f"Executing step {step.step_number}: {step.instruction}")
+                    self._emit_step_event(task, step)
+                    started = []
+                    # Carry the caller's status session into the pool thread
+                    future = self.step_executor.submit(
+                        contextvars.copy_context().run, self._run_step_attempt, started, step, task
+                    )
+                    running[future] = (step, started)
+                
+                if pool_saturated and not running and task.get_ready_steps():
+                    # Wait for abandoned attempts to return before starting more steps
+                    if time.monotonic() >= task_deadline:
+                        self._cancel_steps(task, [s for s in task.steps if s.status == "pending"], "Task timed out")
+                        task.status = "failed"
+                        return {'success': False, 'error': f"Task timed out after {self.config['task_timeout']}s"}
+                    time.sleep(1)
+                    continue
+                
+                if not running:
+                    pending_steps = [s for s in task.steps if s.status == "pending"]
+                    if pending_steps and not task.has_failed_steps():
+                        logger.error(f"Task {task.task_id} has pending steps but none are ready")
+                        return {'success': False, 'error': 'Circular dependencies or unresolvable step dependencies'}
+                    break
                 
-                # Execute ready steps (limit concurrent execution)
-                steps_to_execute = ready_steps[:self.config['max_concurrent_steps']]
+                # A step's deadline starts when it begins running; one still queued for a
+                # thread can't time out before now + step_timeout
+                now = time.monotonic()
+                next_deadline = min(
+                    [started[0] + step_timeout for _, started in running.values() if started]
+                    + [now + step_timeout, task_deadline]
+                )
+                done, _ = wait(list(running), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
                 
-                for step in steps_to_execute:
-                    step_result = self._execute_step(step, task)
+                for future in done:
+                    step, _ = running.pop(future)
+                    step_result = future.result()
                     step_results.append(step_result)
-                    
-                    if not step_result['success'] and step.retry_count >= step.max_retries:
-                        step.status = "failed"
-                        step.error_message = step_result['error']
-                        logger.error(f"Step {step.step_number} failed permanently: {step_result['error']}")
-                        break
+                    self._record_step_result(task, step, step_result)
+                
+                # Enforce deadlines; a timed-out attempt that already started is abandoned
+                now = time.monotonic()
+                for future, (step, started) in list(running.items()):
+                    step_expired = bool(started) and now >= started[0] + step_timeout
+                    if step_expired or now >= task_deadline:
+                        running.pop(future)
+                        if not future.cancel():
+                            self._abandon_step_attempt(future)
+                        reason = "Task timed out" if now >= task_deadline else f"Step timed out after {step_timeout}s"
+                        self._fail_step(task, step, reason)
+                
+                if now >= task_deadline:
+                    self._cancel_steps(task, [s for s in task.steps if s.status == "pending"], "Task timed out")
+                    task.status = "failed"
+                    return {'success': False, 'error': f"Task timed out after {self.config['task_timeout']}s"}
             
             # Compile final result
             if task.has_failed_steps():
@@ -339,11 +420,118 @@ class TaskAssistant(BaseAssistant):
             task.status = "failed"
             return {'success': False, 'error': str(e)}
     
+    def _run_step_attempt(self, started: List[float], step: TaskStep, task: Task) -> Dict[str, Any]:
+        """Record when the attempt gets a thread, then run it."""
+        started.append(time.monotonic())
+        return self._execute_step(step, task)
+    
+    def _abandon_step_attempt(self, future):
+        """Track a timed-out attempt that keeps its pool thread until it returns."""
+        with self._abandoned_lock:
+            self._abandoned_steps.add(future)
+            self._abandoned_total += 1
+            count = len(self._abandoned_steps)
+        future.add_done_callback(self._release_abandoned_step)
+        logger.warning(f"Abandoned a timed-out step attempt; {count} still holding step threads")
+    
+    def _release_abandoned_step(self, future):
+        with self._abandoned_lock:
+            self._abandoned_steps.discard(future)
+    
+    def _abandoned_step_count(self) -> int:
+        with self._abandoned_lock:
+            return len(self._abandoned_steps)
+    
+    def get_step_pool_stats(self) -> Dict[str, Any]:
+        """Step pool size and timed-out attempts still holding threads."""
+        with self._abandoned_lock:
+            return {
+                'workers': Config.TASK_STEP_WORKERS,
+                'max_abandoned_steps': self.config['max_abandoned_steps'],
+                'abandoned_running': len(self._abandoned_steps),
+                'abandoned_total': self._abandoned_total
+            }
+    
+    def _record_step_result(self, task: Task, step: TaskStep, step_result: Dict[str, Any]):
+        """Apply a finished step attempt: complete it, schedule a retry, or fail it."""
+        if step.status != "running":
+            # Cancelled or timed out while the attempt was in flight
+            return
+        
+        if step_result['success']:
+            step.status = "completed"
+            step.completed_at = datetime.now()
+            step.result = step_result['result']
+            if step_result.get('cached'):
+                step.metadata['cached'] = True
+            self._emit_step_event(task, step)
+            return
+        
+        step.retry_count += 1
+        if step.retry_count < step.max_retries:
+            step.status = "pending"  # Retry
+            logger.warning(f"Step {step.step_number} failed, retrying ({step.retry_count}/{step.max_retries})")
+        else:
+            self._fail_step(task, step, step_result['error'])
+    
+    def _fail_step(self, task: Task, step: TaskStep, error_message: str):
+        """Fail a step permanently and cancel everything that depends on it."""
+        step.status = "failed"
+        step.error_message = error_message
+        logger.error(f"Step {step.step_number} failed permanently: {error_message}")
+        self._emit_step_event(task, step)
+        
+        dependents = [s for s in task.get_dependents(step.step_number) if s.status == "pending"]
+        self._cancel_steps(task, dependents, f"Dependency step {step.step_number} failed")
+    
+    def _cancel_steps(self, task: Task, steps: List[TaskStep], reason: str):
+        for step in steps:
+            step.status = "cancelled"
+            step.error_message = reason
+            self._emit_step_event(task, step)
+    
+    def _persist_task(self, task: Task):
+        """Write a task and its steps to the task store."""
+        try:
+            self.task_store.save_task(task.to_dict())
+        except Exception as e:
+            logger.error(f"Error persisting task {task.task_id}: {str(e)}")
+    
+    def _emit_step_event(self, task: Task, step: TaskStep):
+        """Persist a step status change and push it to the task's session over Socket.IO."""
+        try:
+            self.task_store.save_step(task.task_id, step.to_dict())
+        except Exception as e:
+            logger.error(f"Error persisting step {step.step_number} of task {task.task_id}: {str(e)}")
+        
+        finished = len([s for s in task.steps if s.status in ("completed", "failed", "cancelled")])
+        self._update_status("running", 50 + int(40 * finished / max(len(task.steps), 1)),
+                            f"Step {step.step_number} {step.status} ({finished}/{len(task.steps)})")
+        
+        try:
+            # Lazy import to avoid circular dependency
+            import sys
+            if 'app' in sys.modules:
+                from app import socketio
+                # Tasks without a session have no client to notify
+                if task.user_session:
+                    event = {'task_id': task.task_id, 'step': step.to_dict()}
+                    socketio.emit('task_step_update', event, room=task.user_session)
+        except Exception as e:
+            logger.debug(f"WebSocket not available for step update: {str(e)}")
+    
     def _execute_step(self, step: TaskStep, task: Task) -> Dict[str, Any]:
-        """Execute a single step using the appropriate agent."""
+        """Run one attempt of a step with the appropriate agent; runs on the step pool."""
         try:
-            step.status = "running"
-            logger.info(f"Executing step {step.step_number}: {step.instruction}")
+            # Repeated instructions reuse results computed against the same corpus version
+            corpus_version = None
+            if self.step_cache and self.step_cache.is_cacheable(step.suggested_agent_type):
+                corpus_version = self._get_corpus_version()
+                if corpus_version is not None:
+                    cached = self.step_cache.get(step.instruction, step.suggested_agent_type, corpus_version)
+                    if cached is not None:
+                        logger.info(f"Step {step.step_number} served from step cache")
+                        return {'success': True, 'result': cached, 'cached': True}
             
             # Get the appropriate agent
             agent = self._get_agent_for_step(step)
@@ -354,30 +542,24 @@ class TaskAssistant(BaseAssistant):
             result = agent.handle_message(step.instruction)
             
             if result.get('error') or not result.get('success', True):
-                step.retry_count += 1
-                if step.retry_count < step.max_retries:
-                    step.status = "pending"  # Retry
-                    return {'success': False, 'error': result.get('text', 'Step execution failed'), 'retry': True}
-                else:
-                    step.status = "failed"
-                    step.error_message = result.get('text', 'Step execution failed')
-                    return {'success': False, 'error': step.error_message}
-            else:
-                step.status = "completed"
-                step.completed_at = datetime.now()
-                step.result = result.get('text', '')
-                return {'success': True, 'result': step.result}
+                return {'success': False, 'error': result.get('text', 'Step execution failed')}
+            
+            text = result.get('text', '')
+            if corpus_version is not None:
+                self.step_cache.put(step.instruction, step.suggested_agent_type, corpus_version, text)
+            return {'success': True, 'result': text}
             
         except Exception as e:
             logger.error(f"Error executing step {step.step_number}: {str(e)}")
-            step.retry_count += 1
-            if step.retry_count < step.max_retries:
-                step.status = "pending"
-                return {'success': False, 'error': str(e), 'retry': True}
-            else:
-                step.status = "failed"
-                step.error_message = str(e)
-                return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': str(e)}
+    
+    def _get_corpus_version(self) -> Optional[int]:
+        try:
+            from app.services.chroma_service import get_chroma_service_instance
+            return get_chroma_service_instance().get_corpus_version()
+        except Exception as e:
+            logger.warning(f"Could not read corpus version; step cache bypassed: {str(e)}")
+            return None
     
     def _get_agent_for_step(self, step: TaskStep):
         """Get the appropriate agent instance for a step."""
@@ -457,34 +639,26 @@ class TaskAssistant(BaseAssistant):
         """Get status of a specific task."""
         if task_id in self.active_tasks:
             return self.active_tasks[task_id].to_dict()
-        return None
+        return self.task_store.get_task(task_id)
     
     def cancel_task(self, task_id: str) -> bool:
         """Cancel a running task."""
         if task_id in self.active_tasks:
             task = self.active_tasks[task_id]
             task.status = "cancelled"
-            # Mark running steps as cancelled
+            # Mark running and pending steps as cancelled
             for step in task.steps:
-                if step.status == "running":
+                if step.status in ("running", "pending"):
                     step.status = "cancelled"
+            self._persist_task(task)
             return True
         return False
     
     def cleanup_completed_tasks(self, max_age_hours: int = 24):
         """Clean up old completed tasks."""
-        current_time = datetime.now()
-        tasks_to_remove = []
-        
-        for task_id, task in self.active_tasks.items():
-            if task.status in ["completed", "failed", "cancelled"]:
-                age = current_time - task.created_at
-                if age.total_seconds() > max_age_hours * 3600:
-                    tasks_to_remove.append(task_id)
-        
-        for task_id in tasks_to_remove:
-            del self.active_tasks[task_id]
-            logger.info(f"Cleaned up old task: {task_id}")
+        removed = self.task_store.delete_finished_before(datetime.now() - timedelta(hours=max_age_hours))
+        if removed:
+            logger.info(f"Cleaned up {removed} old tasks")
 
 # Singleton instance
 _task_assistant_instance = None
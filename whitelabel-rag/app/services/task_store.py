@@ -0,0 +1,225 @@
+"""
+Persistent store for decomposed tasks and their steps
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+class TaskStore:
+    """
+    SQLite-backed task history shared by every worker process.
+    Tasks are indexed by session and status so history pages and result lookups
+    read only the rows they return.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                user_session TEXT,
+                original_request TEXT NOT NULL,
+                status TEXT NOT NULL,
+                execution_plan TEXT,
+                final_result TEXT,
+                created_at TEXT NOT NULL,
+                completed_at TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS task_steps (
+                task_id TEXT NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+                step_number INTEGER NOT NULL,
+                instruction TEXT NOT NULL,
+                suggested_agent_type TEXT,
+                dependencies TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error_message TEXT,
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT,
+                completed_at TEXT,
+                PRIMARY KEY (task_id, step_number)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_session_created ON tasks (user_session, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at)")
+        self._conn.commit()
+
+    def save_task(self, task: Dict[str, Any]):
+        """Insert or replace a task and all of its steps, as produced by Task.to_dict()."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO tasks (task_id, user_session, original_request, status, execution_plan, "
+                "final_result, created_at, completed_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (task_id) DO UPDATE SET status = excluded.status, "
+                "execution_plan = excluded.execution_plan, final_result = excluded.final_result, "
+                "completed_at = excluded.completed_at, updated_at = excluded.updated_at",
+                (
+                    task['task_id'],
+                    task.get('user_session'),
+                    task['original_request'],
+                    task['status'],
+                    json.dumps(task.get('execution_plan')) if task.get('execution_plan') is not None else None,
+                    task.get('final_result'),
+                    task['created_at'],
+                    task.get('completed_at'),
+                    datetime.now().isoformat()
+                )
+            )
+            self._write_steps(task['task_id'], task.get('steps', []))
+            self._conn.commit()
+
+    def save_step(self, task_id: str, step: Dict[str, Any]):
+        """Insert or replace one step of a stored task, as produced by TaskStep.to_dict()."""
+        with self._lock:
+            self._write_steps(task_id, [step])
+            self._conn.execute(
+                "UPDATE tasks SET updated_at = ? WHERE task_id = ?",
+                (datetime.now().isoformat(), task_id)
+            )
+            self._conn.commit()
+
+    def _write_steps(self, task_id: str, steps: List[Dict[str, Any]]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO task_steps (task_id, step_number, instruction, suggested_agent_type, "
+            "dependencies, metadata, status, result, error_message, retry_count, created_at, completed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    task_id,
+                    step['step_number'],
+                    step['instruction'],
+                    step.get('suggested_agent_type'),
+                    json.dumps(step.get('dependencies') or []),
+                    json.dumps(step.get('metadata') or {}),
+                    step['status'],
+                    step.get('result'),
+                    step.get('error_message'),
+                    step.get('retry_count', 0),
+                    step.get('created_at'),
+                    step.get('completed_at')
+                )
+                for step in steps
+            ]
+        )
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task with its steps by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if not row:
+                return None
+            step_rows = self._conn.execute(
+                "SELECT * FROM task_steps WHERE task_id = ? ORDER BY step_number",
+                (task_id,)
+            ).fetchall()
+        return self._row_to_dict(row, step_rows)
+
+    def list_tasks(self, limit: int = 20, offset: int = 0, session_id: Optional[str] = None,
+                   status: Optional[str] = None, include_steps: bool = False) -> Dict[str, Any]:
+        """
+        Page through tasks, newest first, optionally filtered by session and status.
+        Returns the page of tasks and the total number of matching tasks.
+        """
+        conditions = []
+        params: List[Any] = []
+        if session_id:
+            conditions.append("user_session = ?")
+            params.append(session_id)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM tasks {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM tasks {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset]
+            ).fetchall()
+
+            steps_by_task: Dict[str, List[sqlite3.Row]] = {row['task_id']: [] for row in rows}
+            if include_steps and rows:
+                placeholders = ", ".join("?" for _ in rows)
+                for step_row in self._conn.execute(
+                    f"SELECT * FROM task_steps WHERE task_id IN ({placeholders}) ORDER BY task_id, step_number",
+                    list(steps_by_task)
+                ):
+                    steps_by_task[step_row['task_id']].append(step_row)
+
+        return {
+            'tasks': [self._row_to_dict(row, steps_by_task[row['task_id']]) for row in rows],
+            'total': total
+        }
+
+    def delete_finished_before(self, cutoff: datetime) -> int:
+        """Delete completed, failed and cancelled tasks created before the cutoff."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM tasks WHERE created_at < ? AND status IN ({', '.join('?' for _ in TERMINAL_STATUSES)})",
+                (cutoff.isoformat(), *TERMINAL_STATUSES)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def _row_to_dict(self, row: sqlite3.Row, step_rows: List[sqlite3.Row]) -> Dict[str, Any]:
+        """Convert task and step rows to the Task.to_dict() shape."""
+        return {
+            'task_id': row['task_id'],
+            'original_request': row['original_request'],
+            'user_session': row['user_session'],
+            'steps': [
+                {
+                    'step_number': step['step_number'],
+                    'instruction': step['instruction'],
+                    'suggested_agent_type': step['suggested_agent_type'],
+                    'dependencies': json.loads(step['dependencies']),
+                    'metadata': json.loads(step['metadata']),
+                    'status': step['status'],
+                    'result': step['result'],
+                    'error_message': step['error_message'],
+                    'created_at': step['created_at'],
+                    'completed_at': step['completed_at'],
+                    'retry_count': step['retry_count']
+                }
+                for step in step_rows
+            ],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'completed_at': row['completed_at'],
+            'final_result': row['final_result'],
+            'execution_plan': json.loads(row['execution_plan']) if row['execution_plan'] else None
+        }
+
+# Singleton instance
+_task_store_instance = None
+
+def get_task_store_instance() -> TaskStore:
+    """Get the singleton TaskStore instance."""
+    global _task_store_instance
+    if _task_store_instance is None:
+        _task_store_instance = TaskStore(Config.TASK_STORE_PATH)
+    return _task_store_instance
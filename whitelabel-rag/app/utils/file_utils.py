@@ -3,6 +3,7 @@ File utility functions
 """
 
 import os
+import hashlib
 from werkzeug.utils import secure_filename
 
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx', 'md', 'csv'}
@@ -24,6 +25,14 @@ def secure_filename_with_timestamp(filename):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     return f"{name}_{timestamp}{ext}"
 
+def compute_file_hash(file_path, block_size=1024 * 1024):
+    """Compute the SHA-256 hash of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
 def get_file_size_human(size_bytes):
     """Convert file size to human readable format."""
     if size_bytes == 0:
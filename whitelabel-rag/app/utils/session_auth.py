@@ -0,0 +1,27 @@
+"""
+Signed session tokens
+"""
+
+import hmac
+import hashlib
+from typing import Optional, Mapping
+
+from app.config import Config
+
+def make_session_token(session_id: str) -> str:
+    """Token proving the holder was issued this session ID by the server."""
+    return hmac.new(Config.SECRET_KEY.encode('utf-8'), session_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def verify_session_token(session_id: str, token) -> bool:
+    return isinstance(token, str) and hmac.compare_digest(make_session_token(session_id), token)
+
+def get_verified_session_id(values: Mapping, headers: Mapping) -> Optional[str]:
+    """
+    Return the session_id in values if it came with its token, else None.
+    The token may be sent as session_token alongside it or in an X-Session-Token header.
+    """
+    session_id = values.get('session_id')
+    token = headers.get('X-Session-Token') or values.get('session_token')
+    if session_id and verify_session_token(session_id, token):
+        return session_id
+    return None
@@ -3,8 +3,10 @@ WebSocket event handlers for real-time communication
 """
 
 import logging
-from flask_socketio import emit, disconnect
+from flask_socketio import emit, disconnect, join_room
 from flask import request
+from app.services.chat_dispatcher import get_chat_dispatcher_instance
+from app.utils.session_auth import make_session_token, verify_session_token
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +20,9 @@ def register_websocket_events(socketio):
         emit('connection_response', {
             'status': 'connected',
             'message': 'Successfully connected to WhiteLabelRAG',
-            'session_id': request.sid
+            'session_id': request.sid,
+            # Sent back with session_id on later connections to resume this session
+            'session_token': make_session_token(request.sid)
         })
     
     @socketio.on('disconnect')
@@ -34,6 +38,50 @@ def register_websocket_events(socketio):
             'timestamp': str(datetime.now())
         })
     
+    def process_chat_message(message, session_id):
+        """Run a chat message through the Concierge on a chat worker, replying to the session's room."""
+        # Stream partial answer text as it is generated; chat_response carries the final text
+        def emit_chunk(text):
+            socketio.emit('chat_response_chunk', {
+                'text': text,
+                'session_id': session_id
+            }, room=session_id)
+        
+        # Process message through Concierge with timeout protection
+        try:
+            from app.services.concierge import get_concierge_instance
+            concierge = get_concierge_instance()
+            response = concierge.handle_message(message, session_id, stream_callback=emit_chunk)
+            
+            # Validate response
+            if not response or not isinstance(response, dict):
+                raise ValueError("Invalid response from Concierge")
+            
+        except Exception as processing_error:
+            logger.error(f"Error in message processing: {str(processing_error)}")
+            response = {
+                'text': 'I encountered an error while processing your message. Please try again.',
+                'error': True,
+                'timestamp': str(datetime.now())
+            }
+        
+        # Emit response
+        socketio.emit('chat_response', {
+            'text': response.get('text', 'No response generated.'),
+            'sources': response.get('sources', []),
+            'timestamp': response.get('timestamp', str(datetime.now())),
+            'session_id': session_id,
+            'error': response.get('error', False)
+        }, room=session_id)
+        
+        # Emit completion status
+        status = 'error' if response.get('error') else 'completed'
+        socketio.emit('assistant_status', {
+            'status': status,
+            'progress': 100,
+            'details': 'Error processing message' if response.get('error') else 'Message processed successfully'
+        }, room=session_id)
+    
     @socketio.on('chat_message')
     def handle_chat_message(data):
         """Handle incoming chat messages."""
@@ -51,7 +99,17 @@ def register_websocket_events(socketio):
                 return
             
             message = data.get('message', '')
-            session_id = data.get('session_id', request.sid)
+            session_id = data.get('session_id') or request.sid
+            
+            # Another connection's session may only be resumed with the token it was issued
+            if session_id != request.sid and not verify_session_token(session_id, data.get('session_token')):
+                logger.warning(f"Rejected session {session_id} without a valid token from {request.sid}")
+                emit('chat_response', {
+                    'text': 'Your session could not be verified. Please refresh the page.',
+                    'error': True,
+                    'timestamp': str(datetime.now())
+                })
+                return
             
             if not message.strip():
                 logger.warning("Empty message received")
@@ -64,6 +122,11 @@ def register_websocket_events(socketio):
             
             logger.info(f"Received message from {session_id}: {message[:100]}...")
             
+            # Server-side events for this session are emitted to its room; a client that
+            # keeps its session ID and token across reconnects rejoins the room with its new sid
+            if session_id != request.sid:
+                join_room(session_id)
+            
             # Emit status update
             emit('assistant_status', {
                 'status': 'processing',
@@ -71,40 +134,27 @@ def register_websocket_events(socketio):
                 'details': 'Processing your message...'
             })
             
-            # Process message through Concierge with timeout protection
-            try:
-                from app.services.concierge import get_concierge_instance
-                concierge = get_concierge_instance()
-                response = concierge.handle_message(message, session_id)
-                
-                # Validate response
-                if not response or not isinstance(response, dict):
-                    raise ValueError("Invalid response from Concierge")
-                
-            except Exception as processing_error:
-                logger.error(f"Error in message processing: {str(processing_error)}")
-                response = {
-                    'text': 'I encountered an error while processing your message. Please try again.',
-                    'error': True,
-                    'timestamp': str(datetime.now())
-                }
-            
-            # Emit response
-            emit('chat_response', {
-                'text': response.get('text', 'No response generated.'),
-                'sources': response.get('sources', []),
-                'timestamp': response.get('timestamp', str(datetime.now())),
-                'session_id': session_id,
-                'error': response.get('error', False)
-            })
+            # Run the pipeline on the chat worker pool; this handler returns immediately
+            accepted = get_chat_dispatcher_instance().submit(
+                session_id,
+                lambda: process_chat_message(message, session_id)
+            )
             
-            # Emit completion status
-            status = 'error' if response.get('error') else 'completed'
-            emit('assistant_status', {
-                'status': status,
-                'progress': 100,
-                'details': 'Error processing message' if response.get('error') else 'Message processed successfully'
-            })
+            if not accepted:
+                logger.warning(f"Chat backlog full, rejecting message from {session_id}")
+                emit('chat_response', {
+                    'text': 'The assistant is busy right now. Please try again in a moment.',
+                    'error': True,
+                    'busy': True,
+                    'timestamp': str(datetime.now()),
+                    'session_id': session_id
+                })
+                emit('assistant_status', {
+                    'status': 'busy',
+                    'progress': 100,
+                    'details': 'Server busy, message not processed'
+                })
+                return
             
         except Exception as e:
             logger.error(f"Critical error in chat message handler: {str(e)}")
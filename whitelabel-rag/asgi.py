@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+WhiteLabelRAG ASGI Entry Point
+
+Serves the asyncio chat and query path natively and the rest of the Flask app
+through a WSGI adapter:
+
+    uvicorn asgi:app --host 127.0.0.1 --port 8000
+
+Socket.IO stays on the eventlet server started by run.py.
+"""
+
+import os
+import sys
+import json
+import logging
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from app.services.concierge import get_concierge_instance
+from app.services.rag_manager import get_rag_manager
+
+logger = logging.getLogger(__name__)
+
+flask_app = create_app()
+wsgi_app = WsgiToAsgi(flask_app)
+
+async def _read_json(receive):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+async def _send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def async_query(data):
+    """Asyncio variant of POST /api/query."""
+    if not data or 'query' not in data:
+        return {'error': 'Query is required'}, 400
+
+    combined_response = await get_rag_manager().query_documents_async(
+        data['query'],
+        n_results=data.get('top_k', 3),
+        workflow_type=data.get('workflow', 'basic'),
+        force_internet_search=data.get('use_internet_search', True)
+    )
+
+    return {
+        'success': True,
+        'rag_response': combined_response.get('rag_response', {}),
+        'internet_search_response': combined_response.get('internet_search_response', None)
+    }, 200
+
+async def async_chat(data):
+    """Asyncio variant of the Socket.IO chat_message handler."""
+    if not data or not data.get('message'):
+        return {'error': 'Message is required'}, 400
+
+    session_id = data.get('session_id')
+    response = await get_concierge_instance().handle_message_async(data['message'], session_id)
+
+    return {
+        'text': response.get('text', 'No response generated.'),
+        'sources': response.get('sources', []),
+        'timestamp': response.get('timestamp', str(datetime.now())),
+        'session_id': session_id,
+        'error': response.get('error', False)
+    }, 200
+
+ASYNC_ROUTES = {
+    '/api/async/query': async_query,
+    '/api/async/chat': async_chat
+}
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'websocket':
+        # Socket.IO is served by run.py; refuse the handshake instead of handing
+        # the scope to the WSGI adapter, which only speaks HTTP
+        await receive()
+        await send({'type': 'websocket.close', 'code': 1008})
+        return
+
+    if scope['type'] != 'http':
+        logger.warning(f"Unsupported ASGI scope type: {scope['type']}")
+        return
+
+    handler = ASYNC_ROUTES.get(scope.get('path'))
+    if handler is None:
+        await wsgi_app(scope, receive, send)
+        return
+
+    if scope['method'] != 'POST':
+        await _send_json(send, {'error': 'Method not allowed'}, 405)
+        return
+
+    try:
+        payload, status = await handler(await _read_json(receive))
+    except Exception as e:
+        logger.error(f"Error in {scope['path']}: {str(e)}")
+        payload, status = {'error': 'Internal server error'}, 500
+    await _send_json(send, payload, status)
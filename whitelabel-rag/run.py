@@ -5,8 +5,10 @@ WhiteLabelRAG Application Entry Point
 
 # Apply eventlet monkey patching as the very first thing
 # to ensure all standard libraries are greened for asynchronous operations.
+# Spawned worker processes re-import this file as __mp_main__ and must stay unpatched.
 import eventlet
-eventlet.monkey_patch()
+if __name__ != '__mp_main__':
+    eventlet.monkey_patch()
 
 import os
 import sys
@@ -47,8 +49,17 @@ def create_application():
     from app import create_app
     return create_app()
 
-# For Gunicorn
-app = create_application()
+# For Gunicorn (run:app). Created on first access so that spawned worker
+# processes, which re-import this file, don't build the app and its services.
+_application = None
+
+def __getattr__(name):
+    global _application
+    if name == 'app':
+        if _application is None:
+            _application = create_application()
+        return _application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
     print("🚀 Starting WhiteLabelRAG...")
@@ -60,6 +71,7 @@ if __name__ == '__main__':
     
     try:
         from app import socketio
+        app = create_application()
         
         # Development server
         port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,80 @@
+"""
+Compare the eventlet/WSGI query endpoint with the asyncio/ASGI one under concurrency.
+Start both servers first:
+
+    python run.py                                   # http://127.0.0.1:5000/api/query
+    uvicorn asgi:app --host 127.0.0.1 --port 8000   # http://127.0.0.1:8000/api/async/query
+
+Each target gets the same number of requests at the same concurrency; the script
+reports throughput, error count and p50/p95/p99 latency for both.
+"""
+
+import json
+import time
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TARGETS = [
+    ('eventlet (WSGI)', 'http://127.0.0.1:5000/api/query'),
+    ('asyncio (ASGI)', 'http://127.0.0.1:8000/api/async/query')
+]
+
+def send_query(url, query, top_k, timeout):
+    body = json.dumps({'query': query, 'top_k': top_k, 'use_internet_search': False}).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return ok, (time.perf_counter() - start) * 1000
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def benchmark(name, url, queries, concurrency, timeout, top_k):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda q: send_query(url, q, top_k, timeout), queries))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = len(results) - len(latencies)
+    print(name)
+    print(f"  url:                      {url}")
+    print(f"  throughput (req/s):       {len(results) / elapsed:.1f}")
+    print(f"  errors:                   {errors}/{len(results)}")
+    if latencies:
+        print(f"  latency p50 / p95 / p99:  {percentile(latencies, 0.5):.0f} / "
+              f"{percentile(latencies, 0.95):.0f} / {percentile(latencies, 0.99):.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--query', action='append',
+                        help='Query to send (repeatable); requests cycle through them')
+    parser.add_argument('--wsgi-url', default=DEFAULT_TARGETS[0][1])
+    parser.add_argument('--asgi-url', default=DEFAULT_TARGETS[1][1])
+    args = parser.parse_args()
+
+    base_queries = args.query or [
+        'What does the onboarding guide say about security?',
+        'Summarize the deployment requirements',
+        'Which file formats can be uploaded?'
+    ]
+    # Number each request so the response cache cannot answer the run on its own
+    queries = [f"{base_queries[i % len(base_queries)]} (#{i})" for i in range(args.requests)]
+
+    print(f"{args.requests} requests at concurrency {args.concurrency}\n")
+    benchmark('eventlet (WSGI)', args.wsgi_url, queries, args.concurrency, args.timeout, args.top_k)
+    print()
+    benchmark('asyncio (ASGI)', args.asgi_url, queries, args.concurrency, args.timeout, args.top_k)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the local intent classifier against the labelled intent set.
+Reports accuracy, fallback rate and latency; with --llm the Gemini fallback
+Concierge uses (same prompt and system prompt, each message as the start of a
+conversation) is measured on the same set for comparison.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Add the root directory to sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+from app.services.intent_classifier import (
+    IntentClassifier,
+    SEED_EXAMPLES_PATH,
+    VALID_INTENTS,
+    load_examples
+)
+
+BENCHMARK_PATH = os.path.join(os.path.dirname(SEED_EXAMPLES_PATH), 'intent_benchmark.jsonl')
+
+def benchmark_local(examples, threshold):
+    classifier = IntentClassifier()
+    classifier.train(load_examples(SEED_EXAMPLES_PATH))
+
+    correct = 0
+    confident = 0
+    confident_correct = 0
+    latencies = []
+
+    for example in examples:
+        start = time.perf_counter()
+        intent, confidence = classifier.predict(example['text'])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if intent == example['intent']:
+            correct += 1
+        if confidence >= threshold:
+            confident += 1
+            if intent == example['intent']:
+                confident_correct += 1
+
+    latencies.sort()
+    total = len(examples)
+    print("Local classifier")
+    print(f"  accuracy (all):           {correct / total:.1%}")
+    print(f"  accuracy (confident):     {confident_correct / confident:.1%}" if confident else "  accuracy (confident):     n/a")
+    print(f"  LLM fallback rate:        {1 - confident / total:.1%} (threshold {threshold})")
+    print(f"  latency p50 / p99 (ms):   {latencies[total // 2]:.3f} / {latencies[int(total * 0.99)]:.3f}")
+
+def benchmark_llm(examples):
+    from app.services.llm_factory import LLMFactory
+    from app.services.conversation_store import Conversation
+    from app.services.concierge import INTENT_SYSTEM_PROMPT, build_intent_prompt, parse_llm_intent
+
+    correct = 0
+    latencies = []
+    for example in examples:
+        # Concierge adds the user's message to the conversation before classifying it
+        conversation = Conversation('intent-benchmark')
+        conversation.add_message('user', example['text'])
+
+        start = time.perf_counter()
+        response = LLMFactory.generate_response(
+            prompt=build_intent_prompt(example['text'], conversation),
+            system_prompt=INTENT_SYSTEM_PROMPT,
+            temperature=0.1,
+            task='classification',
+            use_cache=False  # measure the model, not the response cache
+        )
+        intent = parse_llm_intent(response) or 'simple_query'
+        latencies.append((time.perf_counter() - start) * 1000)
+        if intent == example['intent']:
+            correct += 1
+
+    latencies.sort()
+    total = len(examples)
+    print("LLM classifier")
+    print(f"  accuracy:                 {correct / total:.1%}")
+    print(f"  latency p50 / p99 (ms):   {latencies[total // 2]:.1f} / {latencies[int(total * 0.99)]:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threshold', type=float, default=Config.INTENT_CLASSIFIER_THRESHOLD)
+    parser.add_argument('--llm', action='store_true', help="Also benchmark Concierge's Gemini classification fallback")
+    args = parser.parse_args()
+
+    examples = load_examples(BENCHMARK_PATH)
+    print(f"Benchmark set: {len(examples)} examples across {len(VALID_INTENTS)} intents\n")
+
+    benchmark_local(examples, args.threshold)
+    if args.llm:
+        print()
+        benchmark_llm(examples)
+
+if __name__ == "__main__":
+    main()
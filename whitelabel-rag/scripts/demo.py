@@ -54,6 +54,7 @@ class WhiteLabelRAGDemo:
                 files = {"file": (file_path.name, f)}
                 response = requests.post(
                     f"{self.base_url}/api/documents/upload_and_ingest_document",
+                    params={"wait": "true"},
                     files=files,
                     timeout=60
                 )
@@ -176,6 +176,7 @@ The system should be able to extract text, create chunks, and store embeddings.
             files = {"file": ("test_document.md", f, "text/markdown")}
             response = requests.post(
                 f"{base_url}/api/documents/upload_and_ingest_document", 
+                params={"wait": "true"},
                 files=files, 
                 timeout=60
             )
@@ -0,0 +1,188 @@
+"""
+Tests for the in-process and Redis conversation stores
+"""
+
+import pytest
+
+from app.services.conversation_store import ConversationStore, RedisConversationStore
+
+class TestConversationStore:
+    """Test LRU, byte and expiry bounds of the in-process store."""
+
+    def test_least_recently_used_session_is_evicted(self):
+        store = ConversationStore(max_sessions=2)
+        store.get_conversation('first')
+        store.get_conversation('second')
+        store.get_conversation('first')
+        store.get_conversation('third')
+
+        assert set(store.conversations) == {'first', 'third'}
+        assert store.get_conversation_stats()['evictions'] == 1
+
+    def test_adding_messages_marks_session_recently_used(self):
+        store = ConversationStore(max_sessions=2)
+        first = store.get_conversation('first')
+        store.get_conversation('second')
+        first.add_message('user', 'still here')
+        store.get_conversation('third')
+
+        assert set(store.conversations) == {'first', 'third'}
+
+    def test_byte_limit_evicts_oldest_sessions(self):
+        store = ConversationStore(max_bytes=4000)
+        store.get_conversation('first').add_message('user', 'a' * 1500)
+        store.get_conversation('second').add_message('user', 'b' * 1500)
+        store.get_conversation('third').add_message('user', 'c' * 1500)
+
+        assert list(store.conversations) == ['second', 'third']
+        assert store.get_conversation_stats()['memory_bytes'] <= 4000
+
+    def test_most_recent_session_is_kept_over_byte_limit(self):
+        store = ConversationStore(max_bytes=100)
+        store.get_conversation('only').add_message('user', 'x' * 1000)
+
+        assert list(store.conversations) == ['only']
+
+    def test_memory_accounting_follows_deletes(self):
+        store = ConversationStore()
+        store.get_conversation('first').add_message('user', 'hello')
+        store.get_conversation('second').add_message('user', 'world')
+        store.delete_conversation('first')
+        store.delete_conversation('second')
+
+        assert store.get_conversation_stats()['memory_bytes'] == 0
+
+    def test_expiry_heap_is_compacted_after_deletes(self):
+        store = ConversationStore()
+        for i in range(50):
+            store.get_conversation(f'session-{i}')
+        for i in range(45):
+            store.delete_conversation(f'session-{i}')
+
+        assert len(store._expiry_heap) <= 2 * len(store.conversations)
+        assert {session_id for _, session_id in store._expiry_heap} <= set(store.conversations)
+
+    def test_idle_sessions_expire(self):
+        store = ConversationStore(timeout_hours=0)
+        store.get_conversation('idle')
+        store.cleanup_expired_conversations()
+
+        assert store.get_active_conversations_count() == 0
+        assert store._expiry_heap == []
+
+    def test_active_sessions_are_rescheduled(self):
+        store = ConversationStore(timeout_hours=0)
+        store.get_conversation('active')
+        store.cleanup_expired_conversations(timeout_hours=1)
+
+        assert store.get_active_conversations_count() == 1
+        assert len(store._expiry_heap) == 1
+        assert store._expiry_heap[0][0] > store.conversations['active'].last_activity.timestamp()
+
+class TestRedisConversationStore:
+    """Test the shared store against an in-memory Redis server."""
+
+    @pytest.fixture
+    def server(self):
+        fakeredis = pytest.importorskip('fakeredis')
+        return fakeredis.FakeServer()
+
+    @staticmethod
+    def make_store(server, **kwargs):
+        import fakeredis
+        return RedisConversationStore(fakeredis.FakeRedis(server=server), ttl_hours=1, **kwargs)
+
+    def test_first_read_initializes_session(self, server):
+        store = self.make_store(server)
+        conversation = store.get_conversation('session')
+        meta = store.client.hgetall(store._meta_key('session'))
+
+        assert conversation.messages == []
+        # The read path's hset of last_activity must not leave a bare hash behind
+        assert meta[b'state'] == b'information_gathering'
+        assert int(meta[b'version']) >= 1
+        assert store.client.ttl(store._meta_key('session')) > 0
+
+    def test_unchanged_session_is_served_locally(self, server):
+        store = self.make_store(server)
+        conversation = store.get_conversation('session')
+        conversation.add_message('user', 'hello')
+
+        assert store.get_conversation('session') is conversation
+
+    def test_messages_are_shared_between_instances(self, server):
+        first, second = self.make_store(server), self.make_store(server)
+        first.get_conversation('session').add_message('user', 'hello', sources=['a.pdf'])
+
+        messages = second.get_conversation('session').messages
+        assert [(m['role'], m['content'], m['sources']) for m in messages] == [('user', 'hello', ['a.pdf'])]
+
+    def test_write_by_another_instance_invalidates_local_copy(self, server):
+        first, second = self.make_store(server), self.make_store(server)
+        stale = first.get_conversation('session')
+        second.get_conversation('session').add_message('user', 'from second')
+
+        fresh = first.get_conversation('session')
+        assert fresh is not stale
+        assert [m['content'] for m in fresh.messages] == ['from second']
+
+    def test_racing_write_drops_local_copy(self, server):
+        first, second = self.make_store(server), self.make_store(server)
+        mine = first.get_conversation('session')
+        second.get_conversation('session').add_message('user', 'from second')
+        # first still caches the version it read, so its write lands one version later than expected
+        mine.add_message('user', 'from first')
+
+        assert 'session' not in first._local
+        reloaded = first.get_conversation('session')
+        assert [m['content'] for m in reloaded.messages] == ['from second', 'from first']
+
+    def test_state_changes_are_shared(self, server):
+        first, second = self.make_store(server), self.make_store(server)
+        second.get_conversation('session')
+        first.get_conversation('session').set_state('answering')
+
+        assert second.get_conversation('session').conversation_state == 'answering'
+
+    def test_stored_messages_are_capped(self, server):
+        store = self.make_store(server)
+        conversation = store.get_conversation('session')
+        for i in range(conversation.max_messages + 5):
+            conversation.add_message('user', f'message {i}')
+
+        assert store.client.llen(store._messages_key('session')) == conversation.max_messages
+        loaded = self.make_store(server).get_conversation('session')
+        assert loaded.messages[0]['content'] == 'message 5'
+        assert loaded.messages[-1]['content'] == f'message {conversation.max_messages + 4}'
+
+    def test_reads_refresh_ttl(self, server):
+        store = self.make_store(server)
+        store.get_conversation('session').add_message('user', 'hello')
+        store.client.expire(store._meta_key('session'), 10)
+        store.client.expire(store._messages_key('session'), 10)
+
+        store.get_conversation('session')
+
+        assert store.client.ttl(store._meta_key('session')) > 10
+        assert store.client.ttl(store._messages_key('session')) > 10
+
+    def test_export_import_round_trip(self, server):
+        source = self.make_store(server, key_prefix='source')
+        conversation = source.get_conversation('session')
+        conversation.add_message('user', 'What is the refund policy?')
+        conversation.add_message('assistant', 'Refunds within 30 days', sources=['policy.pdf'])
+        conversation.update_summary('Asked about refunds', 12.5)
+        exported = source.export_conversation('session')
+
+        target = self.make_store(server, key_prefix='target')
+        assert target.import_conversation(exported)
+
+        assert target.export_conversation('session') == exported
+
+    def test_delete_conversation(self, server):
+        store = self.make_store(server)
+        store.get_conversation('session').add_message('user', 'hello')
+
+        assert store.delete_conversation('session')
+        assert not store.delete_conversation('session')
+        assert store.export_conversation('session') is None
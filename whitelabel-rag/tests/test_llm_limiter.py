@@ -0,0 +1,231 @@
+"""
+Tests for per-model LLM rate limiting and backpressure
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.llm_limiter import (
+    LLMBusyError,
+    LLMRateLimiter,
+    LocalTokenBucket,
+    ModelRateLimiter,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    get_llm_priority,
+    is_rate_limit_error,
+    llm_priority
+)
+
+class ManualBucket:
+    """Bucket whose tokens are handed out by the test."""
+
+    rate = 1.0
+    burst = 1
+
+    def __init__(self, tokens=0):
+        self.tokens = tokens
+        self.paused = []
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.tokens > 0:
+                self.tokens -= 1
+                return 0.0
+            return 0.01
+
+    def pause(self, seconds):
+        self.paused.append(seconds)
+
+    def add(self, count=1):
+        with self._lock:
+            self.tokens += count
+
+class FailingBucket(ManualBucket):
+    def take(self):
+        raise ConnectionError('redis down')
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+class TestLocalTokenBucket:
+    """Test the in-process token bucket."""
+
+    def test_grants_burst_then_waits(self):
+        bucket = LocalTokenBucket(rate_per_second=1, burst=3)
+
+        assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.take() > 0
+
+    def test_refills_over_time(self):
+        bucket = LocalTokenBucket(rate_per_second=100, burst=1)
+
+        assert bucket.take() == 0.0
+        time.sleep(0.05)
+        assert bucket.take() == 0.0
+
+    def test_pause_withholds_tokens(self):
+        bucket = LocalTokenBucket(rate_per_second=100, burst=5)
+        bucket.pause(0.5)
+
+        wait = bucket.take()
+        assert 0.4 < wait <= 0.5
+
+class TestModelRateLimiter:
+    """Test queueing, priorities and bounds of a model's limiter."""
+
+    def test_acquire_with_available_tokens(self):
+        limiter = ModelRateLimiter('model', ManualBucket(tokens=2))
+
+        assert limiter.acquire() >= 0
+        assert limiter.acquire() >= 0
+        stats = limiter.get_stats()
+        assert stats['acquired'] == 2
+        assert stats['queued'] == 0
+        assert stats['queue_wait_ms']['normal']['count'] == 2
+
+    def test_interactive_overtakes_queued_background(self):
+        bucket = ManualBucket()
+        limiter = ModelRateLimiter('model', bucket)
+        order = []
+
+        def call(name, priority):
+            limiter.acquire(priority)
+            order.append(name)
+
+        background = threading.Thread(target=call, args=('background', PRIORITY_BACKGROUND))
+        background.start()
+        assert _wait_until(lambda: limiter.get_stats()['queued'] == 1)
+        interactive = threading.Thread(target=call, args=('interactive', PRIORITY_INTERACTIVE))
+        interactive.start()
+        assert _wait_until(lambda: limiter.get_stats()['queued'] == 2)
+
+        bucket.add()
+        assert _wait_until(lambda: len(order) == 1)
+        bucket.add()
+        background.join(5)
+        interactive.join(5)
+
+        assert order == ['interactive', 'background']
+
+    def test_full_queue_is_refused(self):
+        bucket = ManualBucket()
+        limiter = ModelRateLimiter('model', bucket, max_queue=1)
+        waiter = threading.Thread(target=limiter.acquire)
+        waiter.start()
+        assert _wait_until(lambda: limiter.get_stats()['queued'] == 1)
+
+        with pytest.raises(LLMBusyError):
+            limiter.acquire()
+
+        bucket.add()
+        waiter.join(5)
+        assert limiter.get_stats()['rejected'] == 1
+
+    def test_wait_is_bounded(self):
+        limiter = ModelRateLimiter('model', ManualBucket(), max_wait_seconds=0.05)
+
+        with pytest.raises(LLMBusyError):
+            limiter.acquire()
+
+        stats = limiter.get_stats()
+        assert stats['rejected'] == 1
+        assert stats['queued'] == 0
+
+    def test_unreachable_bucket_fails_open(self):
+        limiter = ModelRateLimiter('model', FailingBucket())
+
+        assert limiter.acquire() >= 0
+
+    def test_rate_limited_pauses_bucket(self):
+        bucket = ManualBucket()
+        limiter = ModelRateLimiter('model', bucket)
+
+        limiter.on_rate_limited(2.5)
+        limiter.on_retry()
+
+        assert bucket.paused == [2.5]
+        stats = limiter.get_stats()
+        assert stats['rate_limited'] == 1
+        assert stats['retries'] == 1
+
+    def test_acquire_async(self):
+        bucket = ManualBucket()
+        limiter = ModelRateLimiter('model', bucket)
+
+        async def run():
+            task = asyncio.ensure_future(limiter.acquire_async(PRIORITY_INTERACTIVE))
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            bucket.add()
+            return await task
+
+        assert asyncio.run(run()) >= 50
+        assert limiter.get_stats()['queue_wait_ms']['interactive']['count'] == 1
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        bucket = ManualBucket()
+        limiter = ModelRateLimiter('model', bucket)
+
+        async def run():
+            task = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+        stats = limiter.get_stats()
+        assert stats['queued'] == 0
+        assert stats['rejected'] == 0
+        bucket.add()
+        assert limiter.acquire() >= 0
+
+class TestLLMRateLimiter:
+    """Test per-model limiter creation."""
+
+    def test_one_limiter_per_model(self):
+        limiters = LLMRateLimiter(requests_per_minute=120, burst=4)
+
+        flash = limiters.for_model('gemini-flash')
+        assert limiters.for_model('gemini-flash') is flash
+        assert limiters.for_model('gemini-pro') is not flash
+
+        stats = limiters.get_stats()
+        assert stats['backend'] == 'local'
+        assert set(stats['models']) == {'gemini-flash', 'gemini-pro'}
+        assert stats['models']['gemini-flash']['requests_per_minute'] == 120
+        assert stats['models']['gemini-flash']['burst'] == 4
+
+class TestPriorityContext:
+    """Test the priority context variable."""
+
+    def test_priority_is_scoped(self):
+        assert get_llm_priority() == PRIORITY_NORMAL
+        with llm_priority(PRIORITY_BACKGROUND):
+            assert get_llm_priority() == PRIORITY_BACKGROUND
+            with llm_priority(PRIORITY_INTERACTIVE):
+                assert get_llm_priority() == PRIORITY_INTERACTIVE
+            assert get_llm_priority() == PRIORITY_BACKGROUND
+        assert get_llm_priority() == PRIORITY_NORMAL
+
+class TestRateLimitErrors:
+    """Test recognition of quota errors."""
+
+    def test_recognizes_rate_limit_errors(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        assert is_rate_limit_error(ResourceExhausted('slow down'))
+        assert is_rate_limit_error(Exception('429 Too Many Requests'))
+        assert is_rate_limit_error(Exception('Quota exceeded for model'))
+        assert not is_rate_limit_error(ValueError('invalid prompt'))
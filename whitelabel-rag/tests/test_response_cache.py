@@ -0,0 +1,63 @@
+"""
+Tests for the LLM response cache
+"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from app.services.response_cache import ResponseCache
+
+VOCABULARY = ['refund', 'policy', 'shipping', 'time', 'days', 'return']
+
+def embed_words(texts):
+    """Bag-of-words embedding over a small vocabulary."""
+    return [[float(text.lower().count(word)) for word in VOCABULARY] for text in texts]
+
+def rag_prompt(question):
+    context = "Refunds are issued within 30 days. Shipping takes 5 days. " * 20
+    return f"Context:\n{context}\n\nQuestion: {question}"
+
+class TestResponseCache:
+    """Test the exact and semantic tiers."""
+
+    def test_exact_tier_uses_full_prompt(self):
+        cache = ResponseCache()
+        cache.put('prompt', 'system', 0.1, 256, 'model', 'answer')
+
+        assert cache.get('prompt', 'system', 0.1, 256, 'model') == 'answer'
+        assert cache.get('prompt', 'other system', 0.1, 256, 'model') is None
+
+    def test_semantic_tier_matches_on_question(self):
+        embedded = []
+
+        def embed(texts):
+            embedded.extend(texts)
+            return embed_words(texts)
+
+        cache = ResponseCache(semantic_enabled=True, semantic_threshold=0.95, embed_fn=embed)
+        question = 'What is the refund policy?'
+        cache.put(rag_prompt(question), 'system', 0.1, 256, 'model', 'refund answer', question)
+
+        rephrased = 'refund policy?'
+        assert cache.get(rag_prompt(rephrased), 'system', 0.1, 256, 'model', rephrased) == 'refund answer'
+        # Only the questions were embedded, never the context around them
+        assert embedded == [question, rephrased]
+
+    def test_different_questions_over_same_context_do_not_match(self):
+        cache = ResponseCache(semantic_enabled=True, semantic_threshold=0.95, embed_fn=embed_words)
+        refund = 'What is the refund policy?'
+        shipping = 'How long does shipping take?'
+        cache.put(rag_prompt(refund), 'system', 0.1, 256, 'model', 'refund answer', refund)
+
+        assert cache.get(rag_prompt(shipping), 'system', 0.1, 256, 'model', shipping) is None
+
+    def test_calls_without_semantic_text_skip_semantic_tier(self):
+        def embed(texts):
+            raise AssertionError('embedded without semantic text')
+
+        cache = ResponseCache(semantic_enabled=True, embed_fn=embed)
+        cache.put('prompt', 'system', 0.1, 256, 'model', 'answer')
+
+        assert cache.get('prompt', 'system', 0.1, 256, 'model') == 'answer'
+        assert cache.get('other prompt', 'system', 0.1, 256, 'model') is None
@@ -0,0 +1,83 @@
+"""
+Tests for the retrieval result cache
+"""
+
+import time
+
+from app.services.retrieval_cache import RetrievalCache
+
+class TestRetrievalCacheKeys:
+    """Test cache key construction."""
+
+    def test_where_filters_are_canonical(self):
+        key_a = RetrievalCache.make_key('query', 'text', 3, {'source': 'a.pdf', 'page': 1})
+        key_b = RetrievalCache.make_key('query', 'text', 3, {'page': 1, 'source': 'a.pdf'})
+
+        assert key_a == key_b
+        assert hash(key_a) == hash(key_b)
+
+    def test_parts_distinguish_keys(self):
+        base = RetrievalCache.make_key('query', 'text', 3, None)
+
+        assert RetrievalCache.make_key('query', 'text', 5, None) != base
+        assert RetrievalCache.make_key('query', 'other', 3, None) != base
+        assert RetrievalCache.make_key('lexical', 'text', 3, None) != base
+        assert RetrievalCache.make_key('query', 'text', 3, {'source': 'a.pdf'}) != base
+
+class TestRetrievalCache:
+    """Test lookups, corpus version invalidation and bounds."""
+
+    def test_hit_for_same_version(self):
+        cache = RetrievalCache()
+        key = RetrievalCache.make_key('query', 'text', 3)
+        cache.put(key, 1, {'documents': [['doc']]})
+
+        assert cache.get(key, 1) == {'documents': [['doc']]}
+        assert cache.get_stats()['hits'] == 1
+
+    def test_newer_corpus_version_misses(self):
+        cache = RetrievalCache()
+        key = RetrievalCache.make_key('query', 'text', 3)
+        cache.put(key, 1, {'documents': [['doc']]})
+
+        assert cache.get(key, 2) is None
+        # The stale entry is dropped rather than kept for the old version
+        assert cache.get(key, 1) is None
+        assert cache.get_stats()['entries'] == 0
+
+    def test_returned_values_are_copies(self):
+        cache = RetrievalCache()
+        key = RetrievalCache.make_key('query', 'text', 3)
+        value = {'documents': [['doc']]}
+        cache.put(key, 1, value)
+
+        value['documents'][0].append('changed by caller')
+        cache.get(key, 1)['documents'][0].append('changed by reader')
+
+        assert cache.get(key, 1) == {'documents': [['doc']]}
+
+    def test_entries_expire(self):
+        cache = RetrievalCache(ttl_seconds=0.01)
+        key = RetrievalCache.make_key('stats')
+        cache.put(key, 1, {'total_items': 1})
+        time.sleep(0.02)
+
+        assert cache.get(key, 1) is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = RetrievalCache(max_entries=2)
+        cache.put(('a',), 1, 'a')
+        cache.put(('b',), 1, 'b')
+        cache.get(('a',), 1)
+        cache.put(('c',), 1, 'c')
+
+        assert cache.get(('b',), 1) is None
+        assert cache.get(('a',), 1) == 'a'
+        assert cache.get(('c',), 1) == 'c'
+
+    def test_invalidate(self):
+        cache = RetrievalCache()
+        cache.put(('stats',), 1, {'total_items': 1})
+        cache.invalidate(('stats',))
+
+        assert cache.get(('stats',), 1) is None
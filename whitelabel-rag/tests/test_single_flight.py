@@ -0,0 +1,174 @@
+"""
+Tests for coalescing of identical in-flight calls
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight, get_single_flight_instance
+
+def _start_followers(flight, key, func, count):
+    """Start threads calling flight.do and collect their results or errors."""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def _wait_for_followers(flight, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while flight.coalesced < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+class TestSingleFlight:
+    """Test SingleFlight coalescing."""
+
+    def test_concurrent_calls_execute_once(self):
+        flight = SingleFlight('test')
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            release.wait(5)
+            return {'answer': 42}
+
+        threads, results, errors = _start_followers(flight, 'key', func, 10)
+        _wait_for_followers(flight, 9)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert not errors
+        assert results == [{'answer': 42}] * 10
+        stats = flight.get_stats()
+        assert stats['executed'] == 1
+        assert stats['coalesced'] == 9
+        assert stats['coalesced_rate'] == 0.9
+        assert stats['in_flight'] == 0
+
+    def test_followers_get_independent_copies(self):
+        flight = SingleFlight('test')
+        release = threading.Event()
+
+        def func():
+            release.wait(5)
+            return {'items': [1, 2]}
+
+        threads, results, _ = _start_followers(flight, 'key', func, 3)
+        _wait_for_followers(flight, 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        results[0]['items'].append(3)
+        assert results[1] == {'items': [1, 2]}
+        assert results[2] == {'items': [1, 2]}
+
+    def test_leader_error_reaches_followers(self):
+        flight = SingleFlight('test')
+        release = threading.Event()
+
+        def func():
+            release.wait(5)
+            raise ValueError('upstream failed')
+
+        threads, results, errors = _start_followers(flight, 'key', func, 4)
+        _wait_for_followers(flight, 3)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert not results
+        assert len(errors) == 4
+        assert all(isinstance(e, ValueError) for e in errors)
+        assert flight.get_stats()['in_flight'] == 0
+
+    def test_completed_calls_are_not_reused(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        def func():
+            calls.append(1)
+            return len(calls)
+
+        assert flight.do('key', func) == 1
+        assert flight.do('key', func) == 2
+        assert flight.get_stats()['coalesced'] == 0
+
+    def test_different_keys_do_not_coalesce(self):
+        flight = SingleFlight('test')
+
+        assert flight.do('a', lambda: 'a') == 'a'
+        assert flight.do('b', lambda: 'b') == 'b'
+        assert flight.get_stats()['executed'] == 2
+
+    def test_async_calls_coalesce(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ['result']
+
+        async def run():
+            return await asyncio.gather(*(flight.do_async('key', func) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert results == [['result']] * 5
+        assert flight.get_stats()['coalesced'] == 4
+
+    def test_cancelled_follower_leaves_leader_running(self):
+        flight = SingleFlight('test')
+
+        async def func():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do_async('key', func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do_async('key', func))
+            await asyncio.sleep(0)
+            follower.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await follower
+            return await leader
+
+        assert asyncio.run(run()) == 'done'
+
+    def test_cancelled_leader_fails_followers(self):
+        flight = SingleFlight('test')
+
+        async def func():
+            await asyncio.sleep(5)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do_async('key', func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do_async('key', func))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(RuntimeError):
+                await follower
+
+        asyncio.run(run())
+        assert flight.get_stats()['in_flight'] == 0
+
+    def test_instances_are_shared_by_name(self):
+        assert get_single_flight_instance('test-shared') is get_single_flight_instance('test-shared')
+        assert get_single_flight_instance('test-shared') is not get_single_flight_instance('test-other')
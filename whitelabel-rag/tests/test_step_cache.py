@@ -0,0 +1,56 @@
+"""
+Tests for the task step result cache
+"""
+
+import time
+
+from app.services.step_cache import StepResultCache
+
+class TestStepResultCache:
+    """Test step result keys and corpus version invalidation."""
+
+    def test_instruction_is_normalized(self):
+        cache = StepResultCache(agent_types=['SearchAgent'])
+        cache.put('Find the  refund policy.', 'SearchAgent', 1, 'Refunds within 30 days')
+
+        assert cache.get('find the refund policy', 'SearchAgent', 1) == 'Refunds within 30 days'
+        assert cache.get('  FIND THE REFUND POLICY?', 'SearchAgent', 1) == 'Refunds within 30 days'
+
+    def test_agent_type_is_part_of_key(self):
+        cache = StepResultCache(agent_types=['SearchAgent', 'FunctionAgent'])
+        cache.put('Find the refund policy', 'SearchAgent', 1, 'Refunds within 30 days')
+
+        assert cache.get('Find the refund policy', 'FunctionAgent', 1) is None
+
+    def test_newer_corpus_version_misses(self):
+        cache = StepResultCache(agent_types=['SearchAgent'])
+        cache.put('Find the refund policy', 'SearchAgent', 1, 'Refunds within 30 days')
+
+        assert cache.get('Find the refund policy', 'SearchAgent', 2) is None
+        stats = cache.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 0
+
+    def test_only_listed_agent_types_are_cacheable(self):
+        cache = StepResultCache(agent_types=['SearchAgent'])
+
+        assert cache.is_cacheable('SearchAgent')
+        assert not cache.is_cacheable('FunctionAgent')
+
+    def test_entries_expire(self):
+        cache = StepResultCache(agent_types=['SearchAgent'], ttl_seconds=0.01)
+        cache.put('Find the refund policy', 'SearchAgent', 1, 'Refunds within 30 days')
+        time.sleep(0.02)
+
+        assert cache.get('Find the refund policy', 'SearchAgent', 1) is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = StepResultCache(agent_types=['SearchAgent'], max_entries=2)
+        cache.put('first', 'SearchAgent', 1, '1')
+        cache.put('second', 'SearchAgent', 1, '2')
+        cache.get('first', 'SearchAgent', 1)
+        cache.put('third', 'SearchAgent', 1, '3')
+
+        assert cache.get('second', 'SearchAgent', 1) is None
+        assert cache.get('first', 'SearchAgent', 1) == '1'
+        assert cache.get_stats()['entries'] == 2
@@ -0,0 +1,182 @@
+"""
+Tests for the task assistant's step DAG scheduler
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import task_assistant as task_assistant_module
+from app.services.llm_factory import LLMFactory
+from app.services.task_assistant import Task, TaskAssistant, TaskStep
+
+class StubAgent:
+    """Agent whose steps sleep for a fixed time or block until released."""
+
+    def __init__(self, durations=None, blocked=()):
+        self.durations = durations or {}
+        self.blocked = set(blocked)
+        self.release = threading.Event()
+        self.started = {}
+        self._lock = threading.Lock()
+
+    def handle_message(self, instruction):
+        with self._lock:
+            self.started[instruction] = time.monotonic()
+        if instruction in self.blocked:
+            self.release.wait(5)
+        else:
+            time.sleep(self.durations.get(instruction, 0))
+        return {'text': f'done: {instruction}', 'success': True}
+
+@pytest.fixture
+def make_assistant(monkeypatch):
+    monkeypatch.setattr(LLMFactory, 'get_llm', classmethod(lambda cls, *args, **kwargs: None))
+    monkeypatch.setattr(task_assistant_module, 'get_task_store_instance', MagicMock)
+    assistants = []
+
+    def make(agent, **config):
+        assistant = TaskAssistant()
+        assistant.step_cache = None
+        assistant.config.update(config)
+        assistant._get_agent_for_step = lambda step: agent
+        assistant._compile_final_result = lambda task, step_results: 'compiled'
+        assistants.append((assistant, agent))
+        return assistant
+
+    yield make
+
+    for assistant, agent in assistants:
+        agent.release.set()
+        assistant.step_executor.shutdown(wait=True)
+
+def make_task(*steps):
+    """Build a task from (step_number, instruction, dependencies) tuples."""
+    task = Task('task-1', 'original request')
+    for step_number, instruction, dependencies in steps:
+        task.add_step(TaskStep(step_number, instruction, 'SearchAgent', dependencies))
+    return task
+
+def statuses(task):
+    return {step.step_number: step.status for step in task.steps}
+
+class TestTaskScheduler:
+    """Test concurrency, deadlines and cancellation of task steps."""
+
+    def test_parallel_branches_take_critical_path_time(self, make_assistant):
+        agent = StubAgent(durations={'a': 0.3, 'b': 0.3, 'c': 0.1})
+        assistant = make_assistant(agent, max_concurrent_steps=3)
+        task = make_task((1, 'a', []), (2, 'b', []), (3, 'c', [1, 2]))
+
+        started = time.monotonic()
+        result = assistant._execute_task(task)
+        elapsed = time.monotonic() - started
+
+        assert result == {'success': True, 'result': 'compiled'}
+        assert set(statuses(task).values()) == {'completed'}
+        # 0.4s critical path; running the branches one after another takes 0.7s
+        assert elapsed < 0.6
+        assert agent.started['c'] >= max(agent.started['a'], agent.started['b']) + 0.3
+
+    def test_concurrency_limit_is_respected(self, make_assistant):
+        agent = StubAgent(durations={'a': 0.2, 'b': 0.2})
+        assistant = make_assistant(agent, max_concurrent_steps=1)
+        task = make_task((1, 'a', []), (2, 'b', []))
+
+        assert assistant._execute_task(task)['success']
+        assert abs(agent.started['b'] - agent.started['a']) >= 0.2
+
+    def test_step_timeout_cancels_only_dependents(self, make_assistant):
+        agent = StubAgent(blocked={'slow'})
+        assistant = make_assistant(agent, step_timeout=0.2)
+        task = make_task((1, 'slow', []), (2, 'fast', []), (3, 'after slow', [1]), (4, 'after fast', [2]))
+
+        started = time.monotonic()
+        result = assistant._execute_task(task)
+
+        assert time.monotonic() - started < 2
+        assert not result['success']
+        assert statuses(task) == {1: 'failed', 2: 'completed', 3: 'cancelled', 4: 'completed'}
+        assert task.steps[0].error_message == 'Step timed out after 0.2s'
+        assert 'after slow' not in agent.started
+        assert assistant.get_step_pool_stats()['abandoned_running'] == 1
+
+        agent.release.set()
+        deadline = time.monotonic() + 5
+        while assistant.get_step_pool_stats()['abandoned_running'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = assistant.get_step_pool_stats()
+        assert stats['abandoned_running'] == 0
+        assert stats['abandoned_total'] == 1
+
+    def test_task_timeout_fails_running_and_pending_steps(self, make_assistant):
+        agent = StubAgent(blocked={'slow'})
+        assistant = make_assistant(agent, task_timeout=0.2, step_timeout=10)
+        task = make_task((1, 'slow', []), (2, 'after slow', [1]))
+
+        started = time.monotonic()
+        result = assistant._execute_task(task)
+
+        assert time.monotonic() - started < 2
+        assert result == {'success': False, 'error': 'Task timed out after 0.2s'}
+        assert task.status == 'failed'
+        assert statuses(task) == {1: 'failed', 2: 'cancelled'}
+        assert task.steps[0].error_message == 'Task timed out'
+
+    def test_saturated_pool_holds_new_steps(self, make_assistant):
+        agent = StubAgent(blocked={'stuck'})
+        assistant = make_assistant(agent, step_timeout=0.1, max_abandoned_steps=1)
+        assert not assistant._execute_task(make_task((1, 'stuck', [])))['success']
+        assert assistant.get_step_pool_stats()['abandoned_running'] == 1
+
+        released_at = []
+
+        def release():
+            released_at.append(time.monotonic())
+            agent.release.set()
+
+        timer = threading.Timer(0.3, release)
+        timer.start()
+        result = assistant._execute_task(make_task((1, 'next', [])))
+        timer.join()
+
+        assert result['success']
+        # The next task's step only started once the abandoned attempt returned
+        assert agent.started['next'] >= released_at[0]
+
+    def test_saturated_pool_respects_task_timeout(self, make_assistant):
+        agent = StubAgent(blocked={'stuck'})
+        assistant = make_assistant(agent, step_timeout=0.1, max_abandoned_steps=1)
+        assistant._execute_task(make_task((1, 'stuck', [])))
+
+        assistant.config['task_timeout'] = 0.2
+        task = make_task((1, 'next', []))
+        result = assistant._execute_task(task)
+
+        assert result == {'success': False, 'error': 'Task timed out after 0.2s'}
+        assert statuses(task) == {1: 'cancelled'}
+        assert 'next' not in agent.started
+
+    def test_cancel_task_during_run(self, make_assistant):
+        agent = StubAgent(blocked={'first'})
+        assistant = make_assistant(agent)
+        task = make_task((1, 'first', []), (2, 'second', [1]))
+        assistant.active_tasks[task.task_id] = task
+        results = []
+
+        runner = threading.Thread(target=lambda: results.append(assistant._execute_task(task)))
+        runner.start()
+        deadline = time.monotonic() + 5
+        while 'first' not in agent.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert assistant.cancel_task(task.task_id)
+        agent.release.set()
+        runner.join(5)
+
+        assert results == [{'success': False, 'error': 'Task was cancelled'}]
+        assert statuses(task) == {1: 'cancelled', 2: 'cancelled'}
+        assert 'second' not in agent.started
+        assert not assistant.cancel_task('unknown-task')